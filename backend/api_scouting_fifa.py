@@ -4,44 +4,28 @@ API REST - SISTEMA DE SCOUTING INTELIGENTE FIFA
 Endpoints para búsqueda, filtrado, análisis y predicción de valor de mercado de jugadores.
 
 Basado en:
-- Dataset: fifa_limpio.csv (122,501 jugadores × 73 columnas)
+- Dataset: fifa_limpio/ (Parquet particionado por año, 122,501 jugadores × 73 columnas)
 - Modelo ML: Random Forest R² = 98.30%
-- Artifacts: modelo_fifa.joblib, encoder_fifa.joblib, club_encoding_fifa.joblib
+- Artifacts: modelo_fifa.joblib, plan_caracteristicas_fifa.joblib (encoder_fifa.joblib y
+  club_encoding_fifa.joblib si el modelo no tiene plan guardado)
 
 Autor: Sistema Scouting FIFA
 Fecha: 8 de noviembre de 2025
 """
 
-import pandas as pd
 import numpy as np
 import os
-import joblib
-import unicodedata
-from fastapi import FastAPI, Query, HTTPException
+import sys
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Query, HTTPException, Depends, Header, Response
 from pydantic import BaseModel, Field
 from typing import Optional, List
 
-
-# ============================================================================
-# FUNCIONES AUXILIARES
-# ============================================================================
-
-def normalizar_texto(texto):
-    """
-    Normaliza texto para búsqueda flexible:
-    - Convierte a minúsculas
-    - Elimina tildes y acentos
-    - Útil para búsqueda insensible a mayúsculas y acentos
-    """
-    if pd.isna(texto) or texto is None:
-        return ""
-    texto = str(texto).lower()
-    # Eliminar tildes usando unicodedata
-    texto = ''.join(
-        c for c in unicodedata.normalize('NFD', texto)
-        if unicodedata.category(c) != 'Mn'
-    )
-    return texto
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from scripts.api.indices_busqueda import normalizar_texto
+from scripts.api.orden_resultados import codificar_cursor, decodificar_cursor
+from scripts.api.agrupador_predicciones import AgrupadorPredicciones
+from scripts.api.snapshot_servicio import SnapshotServicio, GestorSnapshots, construir_snapshot
 
 
 # ============================================================================
@@ -54,38 +38,125 @@ MODEL_DIR = os.path.join(BASE_DIR, "..", "datos", "modelos")
 MODEL_PATH = os.path.join(MODEL_DIR, "modelo_fifa.joblib")
 ENCODER_PATH = os.path.join(MODEL_DIR, "encoder_fifa.joblib")
 CLUB_ENCODING_PATH = os.path.join(MODEL_DIR, "club_encoding_fifa.joblib")
+PLAN_PATH = os.path.join(MODEL_DIR, "plan_caracteristicas_fifa.joblib")
+PARQUET_PATH = DATA_PATH.replace('.csv', '')  # carpeta con una partición Parquet por año
+ARROW_PATH = DATA_PATH.replace('.csv', '.arrow')
+# Predicciones del dataset completo, etiquetadas con la versión del modelo
+PREDICCIONES_PATH = os.path.join(BASE_DIR, "..", "datos", "procesados", "predicciones_ml.parquet")
+
+RUTAS_ARTEFACTOS = {
+    "modelo": MODEL_PATH,
+    "encoder": ENCODER_PATH,
+    "club_encoding": CLUB_ENCODING_PATH,
+    "plan_caracteristicas": PLAN_PATH,
+    "dataset_arrow": ARROW_PATH,
+    "dataset_parquet": PARQUET_PATH,
+    "dataset_csv": DATA_PATH,
+    "predicciones": PREDICCIONES_PATH
+}
 
-# Cargar modelo y archivos
-print("Cargando modelo y datos...")
-print(f"  - Cargando modelo desde: {MODEL_PATH}")
-modelo = joblib.load(MODEL_PATH)
-print(f"  ✓ Modelo cargado")
+# Recarga en caliente: vigilancia de datos/ (FIFA_VIGILAR_DATOS=1) y token
+# opcional para el endpoint de administración (FIFA_ADMIN_TOKEN)
+VIGILAR_DATOS = os.getenv("FIFA_VIGILAR_DATOS", "0") == "1"
+VIGILAR_INTERVALO_SEGUNDOS = float(os.getenv("FIFA_VIGILAR_INTERVALO", "30"))
+ADMIN_TOKEN = os.getenv("FIFA_ADMIN_TOKEN")
+
+# Memoria compartida entre workers (FIFA_MEMORIA_COMPARTIDA=1, lo activa
+# servidor_multiproceso.py): bosque, columnas numéricas y predicciones se
+# mapean desde archivos .npy en FIFA_DIRECTORIO_COMPARTIDO
+MEMORIA_COMPARTIDA = os.getenv("FIFA_MEMORIA_COMPARTIDA", "0") == "1"
+DIRECTORIO_COMPARTIDO = os.getenv(
+    "FIFA_DIRECTORIO_COMPARTIDO", os.path.join(BASE_DIR, "..", "datos", "cache_servicio")
+)
+
+
+def construir_snapshot_api(anterior=None, esperar_modelo=True):
+    """Construye un snapshot de servicio con la configuración de la API."""
+    return construir_snapshot(
+        RUTAS_ARTEFACTOS,
+        anterior=anterior,
+        esperar_modelo=esperar_modelo,
+        directorio_compartido=DIRECTORIO_COMPARTIDO if MEMORIA_COMPARTIDA else None,
+        # Bosque compilado para predicciones de 1 fila / lotes pequeños (FIFA_BOSQUE_COMPILADO=0 lo desactiva)
+        usar_bosque_compilado=os.getenv("FIFA_BOSQUE_COMPILADO", "1") != "0",
+        max_cache_consultas=int(os.getenv("FIFA_CACHE_CONSULTAS", "64")),
+        # Sin modelo sklearn (memoria compartida) los lotes grandes se reparten en hilos
+        hilos_bosque=int(os.getenv("FIFA_HILOS_BOSQUE", str(os.cpu_count() or 1)))
+    )
 
-print(f"  - Cargando encoder desde: {ENCODER_PATH}")
-encoder = joblib.load(ENCODER_PATH)
-print(f"  ✓ Encoder cargado")
 
-print(f"  - Cargando club encoding desde: {CLUB_ENCODING_PATH}")
-club_encoding = joblib.load(CLUB_ENCODING_PATH)
-print(f"  ✓ Club encoding cargado")
+# Dataset, índices, modelo y encoders viven en un snapshot que se reemplaza
+# atómicamente al recargar (POST /admin/recargar o vigilancia). La carga
+# corre en segundo plano: el servidor acepta conexiones de inmediato, las
+# búsquedas y EDA responden con el dataset listo y las predicciones
+# devuelven 503 hasta que el modelo termina de cargarse.
+gestor_snapshots = GestorSnapshots(construir_snapshot_api, RUTAS_ARTEFACTOS)
+if os.getenv("FIFA_CARGA_SINCRONA", "0") == "1":
+    # Servidor multiproceso: el proceso maestro carga todo antes del fork
+    gestor_snapshots.cargar()
+    print("\n✓ TODOS LOS COMPONENTES CARGADOS EXITOSAMENTE")
+else:
+    gestor_snapshots.iniciar_carga()
+
+# Segundos sugeridos en Retry-After mientras los artefactos se cargan
+REINTENTAR_EN_SEGUNDOS = int(os.getenv("FIFA_REINTENTAR_EN_SEGUNDOS", "5"))
+
+# Micro-batching de predicciones de 1 fila (perfil / predecir_valor) bajo carga concurrente
+AGRUPADOR_VENTANA_MS = float(os.getenv("FIFA_AGRUPADOR_VENTANA_MS", "2"))
+AGRUPADOR_MAX_LOTE = int(os.getenv("FIFA_AGRUPADOR_MAX_LOTE", "64"))
+agrupador_predicciones = AgrupadorPredicciones(
+    lambda X: gestor_snapshots.actual.predecir_log(X),
+    ventana_ms=AGRUPADOR_VENTANA_MS,
+    max_lote=AGRUPADOR_MAX_LOTE
+)
+print(f"  ✓ Agrupador de predicciones: ventana {AGRUPADOR_VENTANA_MS:g} ms, lote máximo {AGRUPADOR_MAX_LOTE}")
+
+
+@asynccontextmanager
+async def ciclo_de_vida(app):
+    """Arranca la vigilancia de artefactos si está habilitada."""
+    if VIGILAR_DATOS:
+        gestor_snapshots.iniciar_vigilancia(VIGILAR_INTERVALO_SEGUNDOS)
+    yield
+
+
+def servicio_no_disponible(detalle):
+    """HTTP 503 con Retry-After para componentes que todavía se están cargando."""
+    return HTTPException(
+        status_code=503,
+        detail=detalle,
+        headers={"Retry-After": str(REINTENTAR_EN_SEGUNDOS)}
+    )
+
+
+def obtener_snapshot(response: Response) -> SnapshotServicio:
+    """
+    Dependencia de todos los endpoints: fija el snapshot vigente para toda la
+    petición (aunque se recargue a mitad) e informa su versión en la cabecera
+    X-Snapshot-Version. 503 mientras el dataset se está cargando.
+    """
+    snapshot = gestor_snapshots.actual
+    if snapshot is None:
+        raise servicio_no_disponible("Dataset cargándose, reintenta en unos segundos")
+    response.headers["X-Snapshot-Version"] = snapshot.version
+    return snapshot
+
 
-print(f"  - Cargando dataset desde Parquet (7x más rápido)...")
-PARQUET_PATH = DATA_PATH.replace('.csv', '.parquet')
-try:
-    df_jugadores = pd.read_parquet(PARQUET_PATH)
-    print(f"  ✓ Dataset Parquet cargado: {len(df_jugadores):,} jugadores")
-except FileNotFoundError:
-    print(f"  ⚠️  Parquet no encontrado, cargando CSV...")
-    df_jugadores = pd.read_csv(DATA_PATH, low_memory=False)
-    print(f"  ✓ Dataset CSV cargado: {len(df_jugadores):,} jugadores")
+def obtener_snapshot_con_modelo(snapshot: SnapshotServicio = Depends(obtener_snapshot)) -> SnapshotServicio:
+    """Dependencia de los endpoints de predicción: 503 hasta que el modelo está cargado."""
+    if not snapshot.modelo_listo:
+        if snapshot.error_modelo is not None:
+            raise servicio_no_disponible(f"Modelo no disponible: {snapshot.error_modelo}")
+        raise servicio_no_disponible("Modelo cargándose, reintenta en unos segundos")
+    return snapshot
 
-print("\n✓ TODOS LOS COMPONENTES CARGADOS EXITOSAMENTE")
 
 # Inicializar FastAPI
 app = FastAPI(
     title="API Sistema Scouting Inteligente FIFA",
     description="API REST para búsqueda, análisis y predicción de valor de mercado de jugadores de fútbol",
-    version="2.0.0"
+    version="2.0.0",
+    lifespan=ciclo_de_vida
 )
 
 
@@ -123,6 +194,10 @@ class DatosJugadorPrediccion(BaseModel):
     nacionalidad: Optional[str] = Field(None, description="Nacionalidad del jugador")
     pie_preferido: Optional[str] = Field(None, description="Pie preferido (Left o Right)")
     ritmo_trabajo: Optional[str] = Field(None, description="Ritmo de trabajo (ej: High/Medium)")
+    categoria_posicion: Optional[str] = Field(None, description="Categoría de posición (Portero, Defensa, Mediocampista, Delantero)")
+    
+    # Cohorte para el percentil (no es un atributo del jugador)
+    año_datos: Optional[int] = Field(None, description="Año FIFA para calcular el percentil dentro de su cohorte")
     
     # Features calculadas opcionales
     altura_cm: Optional[float] = Field(None, ge=150, le=210, description="Altura en cm")
@@ -161,6 +236,8 @@ class RespuestaPrediccion(BaseModel):
     valor_predicho_formateado: str = Field(..., description="Valor formateado (ej: €5.2M)")
     confianza_prediccion: str = Field(..., description="Nivel de confianza (Alta/Media/Baja)")
     percentil_valor: int = Field(..., description="Percentil del valor predicho (0-100)")
+    percentil_cohorte: Optional[int] = Field(None, description="Percentil dentro de la cohorte año/posición (si se indica)")
+    cohorte: Optional[str] = Field(None, description="Cohorte usada para percentil_cohorte (ej: FIFA 2021 - Delantero)")
     categoria_valor: str = Field(..., description="Categoría del valor (Bajo/Medio/Alto/Muy Alto)")
     features_utilizadas: int = Field(..., description="Cantidad de features proporcionadas")
     features_imputadas: int = Field(..., description="Cantidad de features imputadas")
@@ -175,32 +252,32 @@ class RespuestaPrediccion(BaseModel):
     summary="Obtener opciones de filtros",
     description="Devuelve todas las opciones únicas disponibles para los filtros del dashboard"
 )
-def obtener_opciones_filtros():
+def obtener_opciones_filtros(snapshot: SnapshotServicio = Depends(obtener_snapshot)):
     """
     Endpoint que retorna listas de valores únicos para todos los filtros.
     Útil para poblar dropdowns y selectboxes en el frontend.
     """
     try:
         return {
-            "posiciones": sorted(df_jugadores["posiciones_jugador"].dropna().unique().tolist()),
-            "nacionalidades": sorted(df_jugadores["nacionalidad"].dropna().unique().tolist()),
-            "clubes": sorted(df_jugadores["club"].dropna().unique().tolist()),
-            "ligas": sorted(df_jugadores["liga"].dropna().unique().tolist()),
-            "categorias_edad": sorted(df_jugadores["categoria_edad"].dropna().unique().tolist()),
-            "categorias_posicion": sorted(df_jugadores["categoria_posicion"].dropna().unique().tolist()),
-            "categorias_reputacion": sorted(df_jugadores["categoria_reputacion"].dropna().unique().tolist()),
-            "pies_preferidos": sorted(df_jugadores["pie_preferido"].dropna().unique().tolist()),
+            "posiciones": sorted(snapshot.df_jugadores["posiciones_jugador"].dropna().unique().tolist()),
+            "nacionalidades": sorted(snapshot.df_jugadores["nacionalidad"].dropna().unique().tolist()),
+            "clubes": sorted(snapshot.df_jugadores["club"].dropna().unique().tolist()),
+            "ligas": sorted(snapshot.df_jugadores["liga"].dropna().unique().tolist()),
+            "categorias_edad": sorted(snapshot.df_jugadores["categoria_edad"].dropna().unique().tolist()),
+            "categorias_posicion": sorted(snapshot.df_jugadores["categoria_posicion"].dropna().unique().tolist()),
+            "categorias_reputacion": sorted(snapshot.df_jugadores["categoria_reputacion"].dropna().unique().tolist()),
+            "pies_preferidos": sorted(snapshot.df_jugadores["pie_preferido"].dropna().unique().tolist()),
             "rangos": {
-                "edad_min": int(df_jugadores["edad"].min()),
-                "edad_max": int(df_jugadores["edad"].max()),
-                "valoracion_min": int(df_jugadores["valoracion_global"].min()),
-                "valoracion_max": int(df_jugadores["valoracion_global"].max()),
-                "potencial_min": int(df_jugadores["potencial"].min()),
-                "potencial_max": int(df_jugadores["potencial"].max()),
-                "valor_min_eur": float(df_jugadores["valor_mercado_eur"].min()),
-                "valor_max_eur": float(df_jugadores["valor_mercado_eur"].max())
+                "edad_min": int(snapshot.df_jugadores["edad"].min()),
+                "edad_max": int(snapshot.df_jugadores["edad"].max()),
+                "valoracion_min": int(snapshot.df_jugadores["valoracion_global"].min()),
+                "valoracion_max": int(snapshot.df_jugadores["valoracion_global"].max()),
+                "potencial_min": int(snapshot.df_jugadores["potencial"].min()),
+                "potencial_max": int(snapshot.df_jugadores["potencial"].max()),
+                "valor_min_eur": float(snapshot.df_jugadores["valor_mercado_eur"].min()),
+                "valor_max_eur": float(snapshot.df_jugadores["valor_mercado_eur"].max())
             },
-            "total_jugadores": len(df_jugadores)
+            "total_jugadores": len(snapshot.df_jugadores)
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al obtener filtros: {str(e)}")
@@ -234,97 +311,78 @@ def buscar_jugadores(
     categoria_posicion: Optional[List[str]] = Query(None, description="Categoría de posición"),
     pie_preferido: Optional[str] = Query(None, description="Pie preferido (Left/Right)"),
     clasificacion_ml: Optional[List[str]] = Query(None, description="Clasificación ML (INFRAVALORADO/SOBREVALORADO/JUSTO)"),
-    limite: Optional[int] = Query(100, ge=1, le=1000, description="Límite de resultados"),
+    limite: Optional[int] = Query(100, ge=1, le=1000, description="Límite de resultados (tamaño de página si no se indica page_size)"),
     ordenar_por: Optional[str] = Query("valor_mercado_eur", description="Campo para ordenar"),
-    orden_descendente: Optional[bool] = Query(True, description="Orden descendente")
+    orden_descendente: Optional[bool] = Query(True, description="Orden descendente"),
+    offset: int = Query(0, ge=0, description="Cantidad de resultados a saltar (paginación por offset)"),
+    page_size: Optional[int] = Query(None, ge=1, le=1000, description="Tamaño de página"),
+    cursor: Optional[str] = Query(None, description="Cursor de la página siguiente (siguiente_cursor de la respuesta anterior)"),
+    snapshot: SnapshotServicio = Depends(obtener_snapshot)
 ):
     """
     Busca jugadores aplicando filtros combinados.
     Búsqueda flexible por nombre: parcial, sin tildes, mayúsculas/minúsculas.
     Retorna lista de jugadores con información resumida.
+    
+    Paginación: por offset/page_size o por cursor (keyset sobre la columna
+    de orden + id_sofifa + año_datos). La lista filtrada y ordenada se guarda
+    en caché por consulta, así la página siguiente es solo un corte.
     """
+    tamaño_pagina = page_size or limite
+    ordenable = ordenar_por in snapshot.df_jugadores.columns
+    
+    if cursor is not None:
+        try:
+            cursor_columna, cursor_descendente, *clave_cursor = decodificar_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if not ordenable or cursor_columna != ordenar_por or cursor_descendente != orden_descendente:
+            raise HTTPException(status_code=400, detail="El cursor no corresponde al orden solicitado")
+    
     try:
-        df_filtrado = df_jugadores.copy()
-        
-        # ⚽ FILTRO POR NOMBRE (BÚSQUEDA FLEXIBLE)
-        if nombre:
-            nombre_normalizado = normalizar_texto(nombre)
-            # Crear columnas temporales normalizadas para búsqueda eficiente
-            df_filtrado['nombre_completo_normalizado'] = df_filtrado['nombre_completo'].apply(normalizar_texto)
-            df_filtrado['nombre_corto_normalizado'] = df_filtrado['nombre_corto'].apply(normalizar_texto)
-            
-            # Buscar en nombre completo O nombre corto (búsqueda parcial)
-            mascara_nombre = (
-                df_filtrado['nombre_completo_normalizado'].str.contains(nombre_normalizado, na=False) |
-                df_filtrado['nombre_corto_normalizado'].str.contains(nombre_normalizado, na=False)
+        # Clave de caché: filtros normalizados + orden
+        clave_consulta = (
+            normalizar_texto(nombre) if nombre else None,
+            *(tuple(sorted(map(str, valores))) if valores else None for valores in [
+                posicion, nacionalidad, club, liga, categoria_edad, categoria_posicion, clasificacion_ml
+            ]),
+            edad_min, edad_max, valoracion_min, valoracion_max, potencial_min, potencial_max,
+            valor_min_eur, valor_max_eur, año_datos, pie_preferido,
+            ordenar_por, orden_descendente
+        )
+        resultado = snapshot.cache_consultas.obtener(clave_consulta)
+        if resultado is None:
+            resultado = resolver_busqueda(
+                snapshot, nombre, posicion, nacionalidad, club, liga, edad_min, edad_max,
+                valoracion_min, valoracion_max, potencial_min, potencial_max,
+                valor_min_eur, valor_max_eur, año_datos, categoria_edad,
+                categoria_posicion, pie_preferido, clasificacion_ml,
+                ordenar_por if ordenable else None, orden_descendente
             )
-            df_filtrado = df_filtrado[mascara_nombre]
-            
-            # Eliminar columnas temporales
-            df_filtrado = df_filtrado.drop(['nombre_completo_normalizado', 'nombre_corto_normalizado'], axis=1)
-        
-        # Aplicar filtros
-        if posicion:
-            df_filtrado = df_filtrado[df_filtrado["posiciones_jugador"].isin(posicion)]
-        
-        if nacionalidad:
-            df_filtrado = df_filtrado[df_filtrado["nacionalidad"].isin(nacionalidad)]
-        
-        if club:
-            df_filtrado = df_filtrado[df_filtrado["club"].isin(club)]
-        
-        if liga:
-            df_filtrado = df_filtrado[df_filtrado["liga"].isin(liga)]
-        
-        if edad_min is not None:
-            df_filtrado = df_filtrado[df_filtrado["edad"] >= edad_min]
-        
-        if edad_max is not None:
-            df_filtrado = df_filtrado[df_filtrado["edad"] <= edad_max]
-        
-        if valoracion_min is not None:
-            df_filtrado = df_filtrado[df_filtrado["valoracion_global"] >= valoracion_min]
-        
-        if valoracion_max is not None:
-            df_filtrado = df_filtrado[df_filtrado["valoracion_global"] <= valoracion_max]
-        
-        if potencial_min is not None:
-            df_filtrado = df_filtrado[df_filtrado["potencial"] >= potencial_min]
-        
-        if potencial_max is not None:
-            df_filtrado = df_filtrado[df_filtrado["potencial"] <= potencial_max]
-        
-        if valor_min_eur is not None:
-            df_filtrado = df_filtrado[df_filtrado["valor_mercado_eur"] >= valor_min_eur]
-        
-        if valor_max_eur is not None:
-            df_filtrado = df_filtrado[df_filtrado["valor_mercado_eur"] <= valor_max_eur]
-        
-        # ⚽ FILTRO DE AÑO FIFA (NUEVO)
-        if año_datos is not None:
-            if "año_datos" in df_filtrado.columns:
-                df_filtrado = df_filtrado[df_filtrado["año_datos"] == año_datos]
-        
-        if categoria_edad:
-            df_filtrado = df_filtrado[df_filtrado["categoria_edad"].isin(categoria_edad)]
-        
-        if categoria_posicion:
-            df_filtrado = df_filtrado[df_filtrado["categoria_posicion"].isin(categoria_posicion)]
-        
-        if pie_preferido:
-            df_filtrado = df_filtrado[df_filtrado["pie_preferido"] == pie_preferido]
-        
-        # 💎 FILTRO DE CLASIFICACIÓN ML (NUEVO)
-        if clasificacion_ml:
-            if "clasificacion_ml" in df_filtrado.columns:
-                df_filtrado = df_filtrado[df_filtrado["clasificacion_ml"].isin(clasificacion_ml)]
+            snapshot.cache_consultas.guardar(clave_consulta, resultado)
         
-        # Ordenar resultados
-        if ordenar_por in df_filtrado.columns:
-            df_filtrado = df_filtrado.sort_values(by=ordenar_por, ascending=not orden_descendente)
-        
-        # Limitar resultados
-        df_filtrado = df_filtrado.head(limite)
+        if cursor is not None:
+            try:
+                inicio = resultado.inicio_desde_posicion(snapshot.orden_resultados.posicion_cursor(
+                    ordenar_por, orden_descendente, *clave_cursor
+                ))
+            except (TypeError, ValueError):
+                raise HTTPException(status_code=400, detail="Cursor de paginación inválido")
+        else:
+            inicio = offset
+        
+        # Solo se ordenan las primeras inicio + tamaño_pagina filas (top-k)
+        filas_pagina = resultado.pagina(inicio, tamaño_pagina)
+        df_filtrado = snapshot.df_jugadores.iloc[filas_pagina]
+        
+        # Cursor de la siguiente página: clave de la última fila de esta
+        siguiente_cursor = None
+        if ordenable and inicio + len(filas_pagina) < len(resultado):
+            ultima = snapshot.df_jugadores.iloc[filas_pagina[-1]]
+            siguiente_cursor = codificar_cursor(
+                ordenar_por, orden_descendente, ultima[ordenar_por],
+                ultima["id_sofifa"], ultima.get("año_datos")
+            )
         
         # Seleccionar columnas para respuesta
         columnas_respuesta = [
@@ -344,15 +402,75 @@ def buscar_jugadores(
         jugadores_encontrados = df_filtrado[columnas_respuesta].to_dict("records")
         
         return {
-            "total_encontrados": len(df_filtrado),
-            "total_dataset": len(df_jugadores),
+            "total_encontrados": len(resultado),
+            "total_dataset": len(snapshot.df_jugadores),
+            "offset": inicio,
+            "page_size": tamaño_pagina,
+            "siguiente_cursor": siguiente_cursor,
             "jugadores": jugadores_encontrados
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error en búsqueda: {str(e)}")
 
 
+def resolver_busqueda(
+    snapshot, nombre, posicion, nacionalidad, club, liga, edad_min, edad_max,
+    valoracion_min, valoracion_max, potencial_min, potencial_max,
+    valor_min_eur, valor_max_eur, año_datos, categoria_edad,
+    categoria_posicion, pie_preferido, clasificacion_ml,
+    ordenar_por, orden_descendente
+):
+    """
+    Filtra con los índices las filas de una consulta de búsqueda.
+    
+    Returns:
+        ResultadoOrdenado con las filas y su clave de orden; el ordenamiento
+        se hace por páginas con selección parcial. Si ordenar_por es None se
+        conserva el orden del dataset.
+    """
+    # Resolver filtros con el índice de bitsets (sin copiar el DataFrame):
+    # OR entre valores de un mismo filtro, AND entre filtros distintos
+    filtros_valores = {
+        "posiciones_jugador": posicion,
+        "nacionalidad": nacionalidad,
+        "club": club,
+        "liga": liga,
+        "año_datos": [año_datos] if año_datos is not None else None,
+        "categoria_edad": categoria_edad,
+        "categoria_posicion": categoria_posicion,
+        "pie_preferido": [pie_preferido] if pie_preferido else None,
+        "clasificacion_ml": clasificacion_ml
+    }
+    filtros_rango = {
+        "edad": (edad_min, edad_max),
+        "valoracion_global": (valoracion_min, valoracion_max),
+        "potencial": (potencial_min, potencial_max),
+        "valor_mercado_eur": (valor_min_eur, valor_max_eur)
+    }
+    
+    bitsets = []
+    for columna, valores in filtros_valores.items():
+        if valores:
+            bitsets.append(snapshot.indice_busqueda.bitset_valores(columna, valores))
+    for columna, (minimo, maximo) in filtros_rango.items():
+        if minimo is not None or maximo is not None:
+            bitsets.append(snapshot.indice_busqueda.bitset_rango(columna, minimo, maximo))
+    
+    # ⚽ FILTRO POR NOMBRE (BÚSQUEDA FLEXIBLE) con el índice de trigramas
+    if nombre:
+        bitsets.append(snapshot.indice_busqueda.bitset_filas(snapshot.indice_nombres.filas(nombre)))
+    
+    filas = snapshot.indice_busqueda.resolver(bitsets)
+    if filas is None:
+        filas = np.arange(len(snapshot.df_jugadores))
+    
+    # Orden por posiciones globales precalculadas (desempate por id_sofifa y año_datos)
+    return snapshot.orden_resultados.resultado(filas, ordenar_por, orden_descendente)
+
+
 # ============================================================================
 # ENDPOINT 3: PERFIL COMPLETO DE UN JUGADOR
 # ============================================================================
@@ -362,29 +480,34 @@ def buscar_jugadores(
     summary="Obtener perfil completo de un jugador",
     description="Retorna todos los atributos de un jugador específico más su valor predicho"
 )
-def obtener_perfil_jugador(jugador_id: int, año: int = Query(None, description="Año FIFA específico del jugador")):
+async def obtener_perfil_jugador(
+    jugador_id: int,
+    año: int = Query(None, description="Año FIFA específico del jugador"),
+    snapshot: SnapshotServicio = Depends(obtener_snapshot)
+):
     """
     Obtiene el perfil completo de un jugador por su ID de SoFIFA.
     Incluye todos sus atributos y el valor predicho por el modelo ML.
     Si se proporciona el parámetro año, devuelve el perfil de ese año específico.
     """
     try:
-        # Filtrar por ID y año si se proporciona
-        if año:
-            jugador = df_jugadores[(df_jugadores["id_sofifa"] == jugador_id) & (df_jugadores["año_datos"] == año)]
-        else:
-            jugador = df_jugadores[df_jugadores["id_sofifa"] == jugador_id]
+        # Buscar la fila por ID (y año si se proporciona) en el índice de jugadores
+        fila = snapshot.indice_jugadores.fila(jugador_id, año if año else None)
         
-        if jugador.empty:
+        if fila is None:
             raise HTTPException(status_code=404, detail=f"Jugador con ID {jugador_id}{f' en el año {año}' if año else ''} no encontrado")
         
-        jugador_dict = jugador.iloc[0].to_dict()
-        
-        # Preparar datos para predicción
-        datos_prediccion = preparar_datos_para_prediccion(jugador.iloc[0])
+        jugador = snapshot.df_jugadores.iloc[fila]
+        jugador_dict = jugador.to_dict()
         
         try:
-            valor_predicho = modelo.predict(datos_prediccion)[0]
+            # Sin modelo (todavía cargándose) el perfil se sirve sin predicción
+            if not snapshot.modelo_listo:
+                raise RuntimeError("Modelo cargándose, reintenta en unos segundos")
+            
+            # Preparar datos para predicción
+            datos_prediccion = preparar_datos_para_prediccion(snapshot, jugador)
+            valor_predicho = await agrupador_predicciones.predecir(datos_prediccion, snapshot.predecir_log)
             valor_predicho_eur = np.expm1(valor_predicho)  # Revertir log1p
             
             valor_real = jugador_dict["valor_mercado_eur"]
@@ -407,7 +530,12 @@ def obtener_perfil_jugador(jugador_id: int, año: int = Query(None, description=
                 "valor_real_eur": float(valor_real),
                 "diferencia_eur": float(diferencia),
                 "diferencia_porcentual": float(diferencia_porcentual),
-                "clasificacion": clasificacion
+                "clasificacion": clasificacion,
+                # Percentil del valor real: global y dentro de su año/posición
+                "percentil_valor": snapshot.indice_distribucion.percentil(valor_real),
+                "percentil_cohorte": snapshot.indice_distribucion.percentil_cohorte(
+                    valor_real, jugador_dict.get("año_datos"), jugador_dict.get("categoria_posicion")
+                )
             }
         except Exception as e:
             prediccion_info = {"error_prediccion": str(e)}
@@ -424,20 +552,17 @@ def obtener_perfil_jugador(jugador_id: int, año: int = Query(None, description=
 
 
 @app.get("/jugadores/{jugador_id}/años", tags=["Jugadores"])
-def obtener_años_jugador(jugador_id: int):
+def obtener_años_jugador(jugador_id: int, snapshot: SnapshotServicio = Depends(obtener_snapshot)):
     """
     Obtiene todos los años FIFA en los que un jugador específico está presente en la base de datos.
     """
     try:
-        # Filtrar todos los registros del jugador por su id_sofifa
-        registros_jugador = df_jugadores[df_jugadores["id_sofifa"] == jugador_id]
+        # Años del jugador desde el índice id_sofifa -> filas
+        años_disponibles = snapshot.indice_jugadores.años(jugador_id)[::-1]
         
-        if registros_jugador.empty:
+        if not años_disponibles:
             raise HTTPException(status_code=404, detail=f"Jugador con ID {jugador_id} no encontrado")
         
-        # Obtener años únicos ordenados
-        años_disponibles = sorted(registros_jugador["año_datos"].unique().tolist(), reverse=True)
-        
         return {
             "id_sofifa": jugador_id,
             "años": años_disponibles,
@@ -460,7 +585,7 @@ def obtener_años_jugador(jugador_id: int):
     description="Recibe atributos de un jugador y predice su valor de mercado usando el modelo ML",
     response_model=RespuestaPrediccion
 )
-def predecir_valor_jugador(datos: DatosJugadorPrediccion):
+async def predecir_valor_jugador(datos: DatosJugadorPrediccion, snapshot: SnapshotServicio = Depends(obtener_snapshot_con_modelo)):
     """
     Endpoint principal de Machine Learning.
     Recibe atributos parciales o completos de un jugador y predice su valor de mercado.
@@ -470,65 +595,79 @@ def predecir_valor_jugador(datos: DatosJugadorPrediccion):
     try:
         # Convertir datos de entrada a diccionario
         datos_dict = datos.model_dump(exclude_none=True)
-        features_proporcionadas = len(datos_dict)
-        
-        # Crear DataFrame con los datos proporcionados
-        df_input = pd.DataFrame([datos_dict])
         
-        # Imputar valores faltantes con medianas/modas del dataset
-        df_input = imputar_valores_faltantes(df_input)
+        # Vector float32 de tamaño fijo: lo no proporcionado sale de las
+        # medianas/modas congeladas en el plan de características
+        X_prediccion = snapshot.plan_caracteristicas.vectorizar(datos_dict).reshape(1, -1)
         
-        # Preparar datos para el modelo (mismo preprocesamiento que entrenamiento)
-        X_prediccion = preparar_datos_para_prediccion_api(df_input)
-        
-        features_totales = X_prediccion.shape[1]
-        features_imputadas = features_totales - features_proporcionadas
-        
-        # Realizar predicción
-        valor_log = modelo.predict(X_prediccion)[0]
+        # Realizar predicción (agrupada con las peticiones concurrentes)
+        valor_log = await agrupador_predicciones.predecir(X_prediccion, snapshot.predecir_log)
         valor_eur = np.expm1(valor_log)  # Revertir transformación log1p
         
-        # Calcular confianza basada en features proporcionadas
-        porcentaje_features = (features_proporcionadas / 20) * 100  # 20 features clave aprox
-        if porcentaje_features >= 80:
-            confianza = "Alta"
-        elif porcentaje_features >= 50:
-            confianza = "Media"
-        else:
-            confianza = "Baja"
+        return construir_respuesta_prediccion(snapshot, valor_eur, datos_dict, X_prediccion.shape[1])
         
-        # Calcular percentil del valor predicho
-        valores_dataset = df_jugadores["valor_mercado_eur"].values
-        percentil = int((valores_dataset < valor_eur).sum() / len(valores_dataset) * 100)
-        
-        # Categorizar valor
-        if valor_eur >= 50_000_000:
-            categoria = "Muy Alto (Top 1%)"
-        elif valor_eur >= 10_000_000:
-            categoria = "Alto (Top 10%)"
-        elif valor_eur >= 1_000_000:
-            categoria = "Medio (Top 50%)"
-        else:
-            categoria = "Bajo"
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error en predicción: {str(e)}")
+
+
+# ============================================================================
+# ENDPOINT 4b: PREDICCIÓN EN LOTE (ML)
+# ============================================================================
+
+# Máximo de jugadores por lote (FIFA_MAX_LOTE)
+MAX_LOTE = int(os.getenv("FIFA_MAX_LOTE", "5000"))
+
+
+@app.post(
+    "/ml/predecir_lote",
+    summary="Predecir valor de mercado de un lote de jugadores",
+    description="Recibe una lista de jugadores y predice todos sus valores con una sola llamada al modelo",
+    response_model=List[RespuestaPrediccion]
+)
+def predecir_valor_lote(datos_lote: List[DatosJugadorPrediccion], snapshot: SnapshotServicio = Depends(obtener_snapshot_con_modelo)):
+    """
+    Versión en lote de /ml/predecir_valor para listas de seguimiento completas.
+    Imputa y codifica todos los jugadores en una sola matriz y ejecuta un
+    único modelo.predict. Las respuestas se devuelven en el orden de entrada.
+    """
+    if len(datos_lote) > MAX_LOTE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Lote excede el máximo permitido ({MAX_LOTE})."
+        )
+    
+    if not datos_lote:
+        return []
+    
+    try:
+        registros = [datos.model_dump(exclude_none=True) for datos in datos_lote]
         
-        # Formatear valor
-        if valor_eur >= 1_000_000:
-            valor_formateado = f"€{valor_eur/1_000_000:.2f}M"
-        else:
-            valor_formateado = f"€{valor_eur:,.0f}"
+        # Una sola matriz float32 para todo el lote y una sola predicción
+        X_lote = snapshot.plan_caracteristicas.vectorizar_lote(registros)
+        valores_eur = np.expm1(snapshot.predecir_log(X_lote))
         
-        return RespuestaPrediccion(
-            valor_predicho_eur=float(valor_eur),
-            valor_predicho_formateado=valor_formateado,
-            confianza_prediccion=confianza,
-            percentil_valor=percentil,
-            categoria_valor=categoria,
-            features_utilizadas=features_proporcionadas,
-            features_imputadas=features_imputadas
-        )
+        return [
+            construir_respuesta_prediccion(snapshot, valor_eur, datos, X_lote.shape[1])
+            for valor_eur, datos in zip(valores_eur, registros)
+        ]
         
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error en predicción: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error en predicción en lote: {str(e)}")
+
+
+@app.get(
+    "/ml/metricas_agrupador",
+    summary="Métricas del agrupador de predicciones",
+    description="Tamaños de lote y tiempos de espera en cola del micro-batching de predicciones"
+)
+async def obtener_metricas_agrupador():
+    """
+    Retorna la configuración y las métricas recientes del agrupador que
+    combina las predicciones concurrentes de perfil y predecir_valor.
+    async: se lee en el hilo del event loop, el mismo que actualiza las
+    métricas al terminar cada lote (sin leerlas a medio modificar).
+    """
+    return agrupador_predicciones.metricas()
 
 
 # ============================================================================
@@ -544,61 +683,35 @@ def obtener_jugadores_infravalorados(
     top: int = Query(10, ge=1, le=100, description="Cantidad de jugadores a retornar"),
     diferencia_minima_porcentual: float = Query(10.0, description="Diferencia mínima % para considerar infravalorado"),
     edad_maxima: Optional[int] = Query(None, description="Edad máxima para filtrar"),
-    posicion: Optional[List[str]] = Query(None, description="Filtrar por posiciones")
+    posicion: Optional[List[str]] = Query(None, description="Filtrar por posiciones"),
+    snapshot: SnapshotServicio = Depends(obtener_snapshot)
 ):
     """
     Identifica oportunidades de mercado: jugadores infravalorados.
     
     Criterio: valor_predicho > valor_actual + diferencia_minima%
     """
+    if snapshot.almacen_predicciones is None:
+        raise servicio_no_disponible("Predicciones del dataset cargándose, reintenta en unos segundos")
+    
     try:
-        # Hacer predicciones para todo el dataset (o usar caché si existe)
-        df_con_predicciones = calcular_predicciones_dataset()
-        
-        # Filtrar por edad si se especifica
+        # Filtros adicionales resueltos con el índice de bitsets
+        bitsets = []
         if edad_maxima:
-            df_con_predicciones = df_con_predicciones[df_con_predicciones["edad"] <= edad_maxima]
-        
-        # Filtrar por posición si se especifica
+            bitsets.append(snapshot.indice_busqueda.bitset_rango("edad", None, edad_maxima))
         if posicion:
-            df_con_predicciones = df_con_predicciones[
-                df_con_predicciones["posiciones_jugador"].isin(posicion)
-            ]
-        
-        # Filtrar jugadores con valor de mercado > 0 para evitar división por cero
-        df_con_predicciones = df_con_predicciones[df_con_predicciones["valor_mercado_eur"] > 0]
+            bitsets.append(snapshot.indice_busqueda.bitset_valores("posiciones_jugador", posicion))
         
-        # Calcular diferencia porcentual
-        df_con_predicciones["diferencia_porcentual"] = (
-            (df_con_predicciones["valor_predicho_eur"] - df_con_predicciones["valor_mercado_eur"]) 
-            / df_con_predicciones["valor_mercado_eur"] * 100
+        # Corte sobre el orden precalculado por diferencia porcentual (todo el dataset)
+        filas_infravalorados = snapshot.almacen_predicciones.infravalorados(
+            diferencia_minima_porcentual,
+            snapshot.indice_busqueda.mascara(bitsets)
         )
         
-        # Reemplazar valores infinitos o NaN con 0
-        df_con_predicciones["diferencia_porcentual"] = df_con_predicciones["diferencia_porcentual"].replace([np.inf, -np.inf], np.nan).fillna(0)
-        
-        # Filtrar infravalorados
-        df_infravalorados = df_con_predicciones[
-            df_con_predicciones["diferencia_porcentual"] >= diferencia_minima_porcentual
-        ]
-        
-        # Ordenar por diferencia porcentual descendente
-        df_infravalorados = df_infravalorados.sort_values("diferencia_porcentual", ascending=False)
-        
-        # Tomar top N
-        df_top = df_infravalorados.head(top)
-        
-        # Seleccionar columnas relevantes
-        columnas_resultado = [
-            "id_sofifa", "nombre_corto", "edad", "nacionalidad", "club", "liga",
-            "posiciones_jugador", "valoracion_global", "potencial",
-            "valor_mercado_eur", "valor_predicho_eur", "diferencia_porcentual", "url_jugador"
-        ]
-        
-        resultados = df_top[columnas_resultado].to_dict("records")
+        resultados = formatear_resultados_prediccion(snapshot, filas_infravalorados[:top])
         
         return {
-            "total_infravalorados": len(df_infravalorados),
+            "total_infravalorados": len(filas_infravalorados),
             "top_jugadores": resultados
         }
         
@@ -617,49 +730,25 @@ def obtener_jugadores_infravalorados(
 )
 def obtener_jugadores_sobrevalorados(
     top: int = Query(10, ge=1, le=100, description="Cantidad de jugadores a retornar"),
-    diferencia_minima_porcentual: float = Query(10.0, description="Diferencia mínima % para considerar sobrevalorado")
+    diferencia_minima_porcentual: float = Query(10.0, description="Diferencia mínima % para considerar sobrevalorado"),
+    snapshot: SnapshotServicio = Depends(obtener_snapshot)
 ):
     """
     Identifica jugadores potencialmente sobrevalorados en el mercado.
     
     Criterio: valor_actual > valor_predicho + diferencia_minima%
     """
+    if snapshot.almacen_predicciones is None:
+        raise servicio_no_disponible("Predicciones del dataset cargándose, reintenta en unos segundos")
+    
     try:
-        df_con_predicciones = calcular_predicciones_dataset()
-        
-        # Filtrar jugadores con valor de mercado > 0 para evitar división por cero
-        df_con_predicciones = df_con_predicciones[df_con_predicciones["valor_mercado_eur"] > 0]
-        
-        # Calcular diferencia porcentual (negativa para sobrevalorados)
-        df_con_predicciones["diferencia_porcentual"] = (
-            (df_con_predicciones["valor_predicho_eur"] - df_con_predicciones["valor_mercado_eur"]) 
-            / df_con_predicciones["valor_mercado_eur"] * 100
-        )
-        
-        # Reemplazar valores infinitos o NaN con 0
-        df_con_predicciones["diferencia_porcentual"] = df_con_predicciones["diferencia_porcentual"].replace([np.inf, -np.inf], np.nan).fillna(0)
-        
-        # Filtrar sobrevalorados (diferencia negativa)
-        df_sobrevalorados = df_con_predicciones[
-            df_con_predicciones["diferencia_porcentual"] <= -diferencia_minima_porcentual
-        ]
-        
-        # Ordenar por diferencia porcentual ascendente (más negativo = más sobrevalorado)
-        df_sobrevalorados = df_sobrevalorados.sort_values("diferencia_porcentual", ascending=True)
-        
-        # Tomar top N
-        df_top = df_sobrevalorados.head(top)
-        
-        columnas_resultado = [
-            "id_sofifa", "nombre_corto", "edad", "nacionalidad", "club", "liga",
-            "posiciones_jugador", "valoracion_global", "potencial",
-            "valor_mercado_eur", "valor_predicho_eur", "diferencia_porcentual", "url_jugador"
-        ]
+        # Corte sobre el orden precalculado (más negativo = más sobrevalorado)
+        filas_sobrevalorados = snapshot.almacen_predicciones.sobrevalorados(diferencia_minima_porcentual)
         
-        resultados = df_top[columnas_resultado].to_dict("records")
+        resultados = formatear_resultados_prediccion(snapshot, filas_sobrevalorados[:top])
         
         return {
-            "total_sobrevalorados": len(df_sobrevalorados),
+            "total_sobrevalorados": len(filas_sobrevalorados),
             "top_jugadores": resultados
         }
         
@@ -674,38 +763,55 @@ def obtener_jugadores_sobrevalorados(
 @app.get(
     "/eda/estadisticas_generales",
     summary="Estadísticas generales del dataset",
-    description="Retorna KPIs generales del dataset de jugadores"
+    description="Retorna KPIs generales del dataset de jugadores, opcionalmente filtrados por año, liga y posición"
 )
-def obtener_estadisticas_generales():
+def obtener_estadisticas_generales(
+    año: Optional[int] = Query(None, description="Año FIFA específico (opcional)"),
+    liga: Optional[str] = Query(None, description="Liga (opcional)"),
+    categoria_posicion: Optional[str] = Query(None, description="Categoría de posición (opcional)"),
+    snapshot: SnapshotServicio = Depends(obtener_snapshot)
+):
     """
     Endpoint para obtener estadísticas generales y KPIs del dataset.
-    Útil para el dashboard principal.
+    Útil para el dashboard principal. Se responde con roll-ups del cubo OLAP.
     """
     try:
+        filtros = filtros_eda(año, liga, categoria_posicion)
+        totales = snapshot.cubo_eda.agregar(filtros=filtros, medianas=True).iloc[0]
+        
+        if totales["filas"] == 0:
+            raise HTTPException(status_code=404, detail="No hay datos para los filtros indicados")
+        
+        jugador = snapshot.df_jugadores.iloc[snapshot.cubo_eda.fila_maximo("valor_mercado_eur", filtros)]
+        valor_por_club = snapshot.cubo_eda.agregar(por="club", filtros=filtros)["valor_mercado_eur_suma"]
+        valor_por_liga = snapshot.cubo_eda.agregar(por="liga", filtros=filtros)["valor_mercado_eur_suma"]
+        
         return {
-            "total_jugadores": int(len(df_jugadores)),
-            "total_clubes": int(df_jugadores["club"].nunique()),
-            "total_ligas": int(df_jugadores["liga"].nunique()),
-            "total_nacionalidades": int(df_jugadores["nacionalidad"].nunique()),
-            "edad_promedio": float(df_jugadores["edad"].mean()),
-            "valoracion_promedio": float(df_jugadores["valoracion_global"].mean()),
-            "valor_mercado_promedio_eur": float(df_jugadores["valor_mercado_eur"].mean()),
-            "valor_mercado_total_eur": float(df_jugadores["valor_mercado_eur"].sum()),
-            "valor_mercado_mediana_eur": float(df_jugadores["valor_mercado_eur"].median()),
+            "total_jugadores": int(totales["filas"]),
+            "total_clubes": snapshot.cubo_eda.valores_distintos("club", filtros),
+            "total_ligas": snapshot.cubo_eda.valores_distintos("liga", filtros),
+            "total_nacionalidades": snapshot.cubo_nacionalidades.valores_distintos("nacionalidad", filtros),
+            "edad_promedio": float(totales["edad_promedio"]),
+            "valoracion_promedio": float(totales["valoracion_global_promedio"]),
+            "valor_mercado_promedio_eur": float(totales["valor_mercado_eur_promedio"]),
+            "valor_mercado_total_eur": float(totales["valor_mercado_eur_suma"]),
+            "valor_mercado_mediana_eur": float(totales["valor_mercado_eur_mediana"]),
             "jugador_mas_valioso": {
-                "nombre": df_jugadores.loc[df_jugadores["valor_mercado_eur"].idxmax(), "nombre_corto"],
-                "valor_eur": float(df_jugadores["valor_mercado_eur"].max()),
-                "club": df_jugadores.loc[df_jugadores["valor_mercado_eur"].idxmax(), "club"]
+                "nombre": jugador["nombre_corto"],
+                "valor_eur": float(jugador["valor_mercado_eur"]),
+                "club": jugador["club"]
             },
             "club_mas_valioso": {
-                "nombre": df_jugadores.groupby("club")["valor_mercado_eur"].sum().idxmax(),
-                "valor_total_eur": float(df_jugadores.groupby("club")["valor_mercado_eur"].sum().max())
+                "nombre": valor_por_club.idxmax(),
+                "valor_total_eur": float(valor_por_club.max())
             },
             "liga_mas_valiosa": {
-                "nombre": df_jugadores.groupby("liga")["valor_mercado_eur"].sum().idxmax(),
-                "valor_total_eur": float(df_jugadores.groupby("liga")["valor_mercado_eur"].sum().max())
+                "nombre": valor_por_liga.idxmax(),
+                "valor_total_eur": float(valor_por_liga.max())
             }
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al calcular estadísticas: {str(e)}")
 
@@ -713,25 +819,25 @@ def obtener_estadisticas_generales():
 @app.get(
     "/eda/jugador_mas_valioso",
     summary="Obtener jugador más valioso",
-    description="Retorna el jugador más valioso del dataset, opcionalmente filtrado por año"
+    description="Retorna el jugador más valioso del dataset, opcionalmente filtrado por año, liga y posición"
 )
-def obtener_jugador_mas_valioso(año: int = Query(None, description="Año FIFA específico (opcional)")):
+def obtener_jugador_mas_valioso(
+    año: int = Query(None, description="Año FIFA específico (opcional)"),
+    liga: Optional[str] = Query(None, description="Liga (opcional)"),
+    categoria_posicion: Optional[str] = Query(None, description="Categoría de posición (opcional)"),
+    snapshot: SnapshotServicio = Depends(obtener_snapshot)
+):
     """
     Obtiene el jugador más valioso del dataset.
-    Si se proporciona el parámetro año, filtra por ese año específico.
+    Si se proporcionan filtros (año, liga, posición), busca dentro de ellos.
     """
     try:
-        # Filtrar por año si se proporciona
-        if año:
-            df_filtrado = df_jugadores[df_jugadores["año_datos"] == año]
-            if df_filtrado.empty:
-                raise HTTPException(status_code=404, detail=f"No hay datos para el año {año}")
-        else:
-            df_filtrado = df_jugadores
+        # Fila del máximo desde el cubo (máximo por celda precalculado)
+        fila = snapshot.cubo_eda.fila_maximo("valor_mercado_eur", filtros_eda(año, liga, categoria_posicion))
+        if fila is None:
+            raise HTTPException(status_code=404, detail=f"No hay datos para el año {año}" if año else "No hay datos para los filtros indicados")
         
-        # Obtener el jugador más valioso
-        idx_max = df_filtrado["valor_mercado_eur"].idxmax()
-        jugador = df_filtrado.loc[idx_max]
+        jugador = snapshot.df_jugadores.iloc[fila]
         
         return {
             "id_sofifa": int(jugador["id_sofifa"]),
@@ -764,50 +870,62 @@ def obtener_jugador_mas_valioso(año: int = Query(None, description="Año FIFA e
 )
 def obtener_datos_graficos(
     tipo_analisis: str = Query(..., description="Tipo de análisis: posiciones, nacionalidades, clubes, ligas, edades"),
-    top_n: int = Query(20, ge=5, le=50, description="Cantidad de elementos a retornar")
+    top_n: int = Query(20, ge=5, le=50, description="Cantidad de elementos a retornar"),
+    año: Optional[int] = Query(None, description="Año FIFA específico (opcional)"),
+    liga: Optional[str] = Query(None, description="Liga (opcional)"),
+    categoria_posicion: Optional[str] = Query(None, description="Categoría de posición (opcional)"),
+    snapshot: SnapshotServicio = Depends(obtener_snapshot)
 ):
     """
     Endpoint para obtener datos agregados para diferentes tipos de gráficos.
+    Cada análisis es un roll-up del cubo OLAP con los filtros indicados.
     """
     try:
+        filtros = filtros_eda(año, liga, categoria_posicion)
+        
         if tipo_analisis == "posiciones":
             # Distribución por posiciones
-            datos = df_jugadores["categoria_posicion"].value_counts().head(top_n).reset_index()
+            datos = snapshot.cubo_eda.agregar(por="categoria_posicion", filtros=filtros)["filas"]
+            datos = datos.sort_values(ascending=False, kind="stable").head(top_n).reset_index()
             datos.columns = ["categoria", "cantidad"]
             
         elif tipo_analisis == "nacionalidades":
             # Top nacionalidades por valor promedio
-            datos = df_jugadores.groupby("nacionalidad").agg({
-                "valor_mercado_eur": "mean",
-                "id_sofifa": "count"
-            }).sort_values("valor_mercado_eur", ascending=False).head(top_n).reset_index()
+            datos = snapshot.cubo_nacionalidades.agregar(por="nacionalidad", filtros=filtros)
+            datos = datos[["valor_mercado_eur_promedio", "filas"]].sort_values(
+                "valor_mercado_eur_promedio", ascending=False, kind="stable"
+            ).head(top_n).reset_index()
             datos.columns = ["nacionalidad", "valor_promedio_eur", "cantidad_jugadores"]
             
         elif tipo_analisis == "clubes":
             # Top clubes por valor total de plantilla
-            datos = df_jugadores.groupby("club").agg({
-                "valor_mercado_eur": ["sum", "mean", "count"]
-            }).sort_values(("valor_mercado_eur", "sum"), ascending=False).head(top_n).reset_index()
+            datos = snapshot.cubo_eda.agregar(por="club", filtros=filtros)
+            datos = datos[["valor_mercado_eur_suma", "valor_mercado_eur_promedio", "valor_mercado_eur_conteo"]].sort_values(
+                "valor_mercado_eur_suma", ascending=False, kind="stable"
+            ).head(top_n).reset_index()
             datos.columns = ["club", "valor_total_eur", "valor_promedio_eur", "cantidad_jugadores"]
             
         elif tipo_analisis == "ligas":
             # Top ligas por valor promedio
-            datos = df_jugadores.groupby("liga").agg({
-                "valor_mercado_eur": ["sum", "mean", "count"]
-            }).sort_values(("valor_mercado_eur", "mean"), ascending=False).head(top_n).reset_index()
+            datos = snapshot.cubo_eda.agregar(por="liga", filtros=filtros)
+            datos = datos[["valor_mercado_eur_suma", "valor_mercado_eur_promedio", "valor_mercado_eur_conteo"]].sort_values(
+                "valor_mercado_eur_promedio", ascending=False, kind="stable"
+            ).head(top_n).reset_index()
             datos.columns = ["liga", "valor_total_eur", "valor_promedio_eur", "cantidad_jugadores"]
             
         elif tipo_analisis == "edades":
             # Distribución por categorías de edad
-            datos = df_jugadores.groupby("categoria_edad").agg({
-                "valor_mercado_eur": "mean",
-                "id_sofifa": "count"
-            }).reset_index()
+            datos = snapshot.cubo_eda.agregar(por="categoria_edad", filtros=filtros)
+            datos = datos[["valor_mercado_eur_promedio", "filas"]].reset_index()
             datos.columns = ["categoria_edad", "valor_promedio_eur", "cantidad_jugadores"]
             
         else:
             raise HTTPException(status_code=400, detail=f"Tipo de análisis '{tipo_analisis}' no soportado")
         
+        # Conteos enteros y promedios sin datos como null (JSON no admite NaN)
+        datos = datos.astype({col: "int64" for col in datos.columns if col.startswith("cantidad")})
+        datos = datos.astype(object).where(datos.notna(), None)
+        
         return {
             "tipo_analisis": tipo_analisis,
             "datos": datos.to_dict("records")
@@ -820,213 +938,194 @@ def obtener_datos_graficos(
 
 
 # ============================================================================
-# FUNCIONES AUXILIARES
+# ENDPOINT 9: RECARGA EN CALIENTE DEL SNAPSHOT DE SERVICIO
 # ============================================================================
 
-def preparar_datos_para_prediccion(jugador_serie):
+def verificar_token_admin(x_admin_token: Optional[str] = Header(None)):
+    """Si FIFA_ADMIN_TOKEN está definido, exige la cabecera X-Admin-Token."""
+    if ADMIN_TOKEN and x_admin_token != ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Token de administración inválido")
+
+
+@app.post(
+    "/admin/recargar",
+    summary="Recargar datos y modelo sin reiniciar",
+    description="Construye en segundo plano un snapshot nuevo (dataset, índices, modelo y encoders) y lo activa al terminar",
+    status_code=202,
+    dependencies=[Depends(verificar_token_admin)]
+)
+def recargar_snapshot(response: Response):
     """
-    Prepara los datos de un jugador (Serie de pandas) para hacer predicción.
-    Replica el preprocesamiento del entrenamiento.
+    Inicia la recarga en segundo plano. Mientras se construye el snapshot
+    nuevo se sigue respondiendo con el actual; al terminar se reemplaza de
+    forma atómica y las peticiones en curso terminan con el anterior.
+    Si el modelo no cambió en disco, se reutiliza el ya cargado.
     """
-    # Crear DataFrame de una fila
-    df = pd.DataFrame([jugador_serie])
-    
-    # Aplicar mismo preprocesamiento que en entrenamiento
-    return preparar_datos_para_prediccion_api(df)
+    iniciada = gestor_snapshots.recargar_en_segundo_plano(motivo="endpoint /admin/recargar")
+    if not iniciada:
+        response.status_code = 409
+    return {
+        "recarga_iniciada": iniciada,
+        "mensaje": "Recarga iniciada" if iniciada else "Ya hay una recarga en curso",
+        **gestor_snapshots.estado()
+    }
 
 
-def preparar_datos_para_prediccion_api(df_input):
+@app.get(
+    "/admin/snapshot",
+    summary="Estado del snapshot de servicio",
+    description="Versión del snapshot activo y resultado de la última recarga"
+)
+def obtener_estado_snapshot():
     """
-    Prepara datos de entrada de la API para predicción ML.
-    Replica EXACTAMENTE el preprocesamiento de entrenamiento.py
+    Retorna la versión activa, si hay una recarga en curso y el resultado
+    (o error) de la última recarga.
     """
-    # IMPORTANTE: Estas columnas deben coincidir EXACTAMENTE con preprocesamiento_modelo.py
-    
-    # Columnas numéricas (ORDEN EXACTO del entrenamiento)
-    col_numericas = [
-        # TOP FEATURES
-        "reputacion_internacional",
-        "valoracion_global",
-        "potencial",
-        "movimiento_reacciones",
-        # FEATURES MODERADAS
-        "calidad_promedio",
-        "pase",
-        "mentalidad_compostura",
-        "regate_gambeta",
-        "mentalidad_vision",
-        "tiro_disparo",
-        "ataque_pase_corto",
-        # FEATURES ADICIONALES
-        "ataque_definicion",
-        "ataque_cabezazo",
-        "ataque_centros",
-        "ataque_voleas",
-        # Atributos físicos
-        "movimiento_velocidad_sprint",
-        "movimiento_aceleracion",
-        "movimiento_agilidad",
-        "movimiento_equilibrio",
-        "fisico",
-        # Atributos defensivos
-        "defensa",
-        "defensa_entrada_pie",
-        "defensa_entrada_deslizante",
-        "defensa_marcaje",
-        # Atributos mentales
-        "mentalidad_agresividad",
-        "mentalidad_intercepciones",
-        "mentalidad_posicionamiento",
-        "mentalidad_penales",
-        # Habilidades
-        "pie_debil",
-        "habilidades_regate",
-        "habilidad_regate",
-        "habilidad_control_balon",
-        "habilidad_efecto",
-        "habilidad_pase_largo",
-        "habilidad_tiros_libres",
-        # Features calculadas
-        "diferencia_potencial",
-        "ratio_valor_salario",
-        "anos_contrato_restantes",
-        # Demografía
-        "edad"
-    ]
-    
-    # Columnas categóricas (ORDEN EXACTO del entrenamiento)
-    col_categoricas = [
-        "categoria_posicion",
-        "categoria_edad",
-        "pie_preferido",
-        "categoria_reputacion",
-        "liga"
-    ]
-    
-    # Crear DataFrame con todas las columnas necesarias (inicializadas con valores por defecto)
-    df_completo = pd.DataFrame(index=df_input.index)
-    
-    # Copiar columnas numéricas disponibles
-    for col in col_numericas:
-        if col in df_input.columns:
-            df_completo[col] = df_input[col]
-        else:
-            # Imputar con mediana del dataset si no está disponible
-            if col in df_jugadores.columns:
-                df_completo[col] = df_jugadores[col].median()
-            else:
-                df_completo[col] = 0
+    return gestor_snapshots.estado()
+
+
+# ============================================================================
+# ENDPOINT 10: SALUD Y DISPONIBILIDAD
+# ============================================================================
+
+@app.get(
+    "/health/live",
+    summary="Liveness",
+    description="El proceso está vivo y acepta conexiones (no depende de la carga de artefactos)"
+)
+def salud_viva():
+    """Responde siempre 200 mientras el proceso esté en pie."""
+    return {"estado": "vivo"}
+
+
+@app.get(
+    "/health/ready",
+    summary="Readiness",
+    description="200 cuando dataset y modelo están cargados; 503 con Retry-After mientras tanto"
+)
+def salud_preparada(response: Response):
+    """
+    Disponibilidad por componente. Búsquedas y EDA responden en cuanto
+    datos_listos es True; las predicciones, cuando modelo_listo es True.
+    """
+    estado = gestor_snapshots.estado()
+    preparado = estado["datos_listos"] and estado["modelo_listo"]
+    if not preparado:
+        response.status_code = 503
+        response.headers["Retry-After"] = str(REINTENTAR_EN_SEGUNDOS)
+    return {
+        "preparado": preparado,
+        "datos_listos": estado["datos_listos"],
+        "modelo_listo": estado["modelo_listo"],
+        "error_modelo": estado["error_modelo"],
+        "version_snapshot": estado["version_snapshot"]
+    }
+
+
+# ============================================================================
+# FUNCIONES AUXILIARES
+# ============================================================================
+
+def filtros_eda(año, liga, categoria_posicion):
+    """Filtros del cubo OLAP a partir de los parámetros de los endpoints EDA."""
+    return {
+        "año_datos": año if año else None,
+        "liga": liga,
+        "categoria_posicion": categoria_posicion
+    }
+
+
+def construir_respuesta_prediccion(snapshot, valor_eur, datos_dict, features_totales):
+    """
+    Construye la RespuestaPrediccion (confianza, percentiles, categoría y
+    formato) a partir del valor predicho en EUR y los datos de entrada.
+    Compartida por la predicción individual y en lote.
+    """
+    # año_datos solo selecciona la cohorte, no es un atributo del jugador
+    features_proporcionadas = len(datos_dict) - ("año_datos" in datos_dict)
+    features_imputadas = features_totales - features_proporcionadas
     
-    # Copiar columnas categóricas disponibles
-    for col in col_categoricas:
-        if col in df_input.columns:
-            df_completo[col] = df_input[col]
-        else:
-            # Imputar con moda del dataset si no está disponible
-            if col in df_jugadores.columns:
-                df_completo[col] = df_jugadores[col].mode()[0]
-            else:
-                # Valores por defecto
-                if col == "categoria_posicion":
-                    df_completo[col] = "Mediocampista"
-                elif col == "categoria_edad":
-                    df_completo[col] = "Prime"
-                elif col == "pie_preferido":
-                    df_completo[col] = "Right"
-                elif col == "categoria_reputacion":
-                    df_completo[col] = "Regional"
-                elif col == "liga":
-                    df_completo[col] = "English Premier League"
+    # Percentiles por búsqueda binaria sobre las distribuciones ordenadas
+    percentil = snapshot.indice_distribucion.percentil(valor_eur)
+    año = datos_dict.get("año_datos")
+    categoria_posicion = datos_dict.get("categoria_posicion")
+    percentil_cohorte = snapshot.indice_distribucion.percentil_cohorte(valor_eur, año, categoria_posicion)
+    cohorte = None
+    if percentil_cohorte is not None:
+        cohorte = " - ".join(
+            parte for parte in [f"FIFA {año}" if año is not None else None, categoria_posicion] if parte
+        )
     
-    # Extraer features numéricas
-    X_num = df_completo[col_numericas].copy()
+    # Calcular confianza basada en features proporcionadas
+    porcentaje_features = (features_proporcionadas / 20) * 100  # 20 features clave aprox
+    if porcentaje_features >= 80:
+        confianza = "Alta"
+    elif porcentaje_features >= 50:
+        confianza = "Media"
+    else:
+        confianza = "Baja"
     
-    # Target Encoding para club (si está disponible)
-    if "club" in df_input.columns and df_input["club"].notna().any():
-        club_valor = club_encoding.get(
-            df_input["club"].iloc[0], 
-            df_jugadores["valor_mercado_eur"].mean()
-        )
-        X_num["club_valor_promedio"] = club_valor
+    # Categorizar valor según su posición en la distribución real
+    if percentil >= 99:
+        categoria = "Muy Alto (Top 1%)"
+    elif percentil >= 90:
+        categoria = "Alto (Top 10%)"
+    elif percentil >= 50:
+        categoria = "Medio (Top 50%)"
     else:
-        # Si no hay club, usar promedio general
-        X_num["club_valor_promedio"] = df_jugadores["valor_mercado_eur"].mean()
+        categoria = "Bajo"
     
-    # OneHot Encoding para categóricas
-    X_cat = df_completo[col_categoricas]
-    X_cat_encoded = encoder.transform(X_cat)
-    col_encoded_nombres = encoder.get_feature_names_out(col_categoricas)
-    X_cat_df = pd.DataFrame(
-        X_cat_encoded, 
-        columns=col_encoded_nombres, 
-        index=df_completo.index
-    )
+    # Formatear valor
+    if valor_eur >= 1_000_000:
+        valor_formateado = f"€{valor_eur/1_000_000:.2f}M"
+    else:
+        valor_formateado = f"€{valor_eur:,.0f}"
     
-    # Concatenar numéricas + categóricas
-    X_final = pd.concat(
-        [X_num.reset_index(drop=True), X_cat_df.reset_index(drop=True)], 
-        axis=1
+    return RespuestaPrediccion(
+        valor_predicho_eur=float(valor_eur),
+        valor_predicho_formateado=valor_formateado,
+        confianza_prediccion=confianza,
+        percentil_valor=percentil,
+        percentil_cohorte=percentil_cohorte,
+        cohorte=cohorte,
+        categoria_valor=categoria,
+        features_utilizadas=features_proporcionadas,
+        features_imputadas=features_imputadas
     )
-    
-    return X_final
 
 
-def imputar_valores_faltantes(df_input):
+def preparar_datos_para_prediccion(snapshot, jugador_serie):
     """
-    Imputa valores faltantes con medianas/modas del dataset original.
+    Prepara los datos de un jugador (Serie de pandas) para hacer predicción.
+    Usa el plan de características guardado con el modelo (el mismo del entrenamiento).
     """
-    columnas_numericas = df_input.select_dtypes(include=[np.number]).columns
-    columnas_categoricas = df_input.select_dtypes(include=["object"]).columns
-    
-    # Imputar numéricas con mediana
-    for col in columnas_numericas:
-        if col in df_jugadores.columns and df_input[col].isnull().any():
-            df_input[col].fillna(df_jugadores[col].median(), inplace=True)
-    
-    # Imputar categóricas con moda
-    for col in columnas_categoricas:
-        if col in df_jugadores.columns and df_input[col].isnull().any():
-            df_input[col].fillna(df_jugadores[col].mode()[0], inplace=True)
-    
-    return df_input
+    return snapshot.plan_caracteristicas.vectorizar(jugador_serie.to_dict()).reshape(1, -1)
 
 
-def calcular_predicciones_dataset():
+def preparar_datos_para_prediccion_api(snapshot, df_input):
+    """
+    Prepara un DataFrame de jugadores para predicción ML en lote.
+    Devuelve la matriz float32 en el orden exacto de columnas del entrenamiento.
     """
-    Calcula predicciones para una muestra del dataset de forma optimizada.
-    Usa predicción en lote (batch) en lugar de fila por fila.
+    return snapshot.plan_caracteristicas.transformar(df_input)
+
+
+def formatear_resultados_prediccion(snapshot, filas):
     """
-    # Usar muestra más pequeña (2000 jugadores) para respuesta más rápida
-    # En producción, las predicciones deberían estar pre-calculadas
-    sample_size = min(2000, len(df_jugadores))
-    df_sample = df_jugadores.sample(sample_size, random_state=42).copy()
+    Construye los registros de respuesta de infravalorados/sobrevalorados
+    para las filas indicadas (ya ordenadas y recortadas al top N).
+    """
+    columnas_resultado = [
+        "id_sofifa", "nombre_corto", "edad", "nacionalidad", "club", "liga",
+        "posiciones_jugador", "valoracion_global", "potencial",
+        "valor_mercado_eur", "valor_predicho_eur", "diferencia_porcentual", "url_jugador"
+    ]
     
-    try:
-        # Preparar datos en lote (mucho más rápido que fila por fila)
-        X_batch = preparar_datos_para_prediccion_api(df_sample)
-        
-        # Predicción en lote
-        valores_log = modelo.predict(X_batch)
-        valores_eur = np.expm1(valores_log)
-        
-        df_sample["valor_predicho_eur"] = valores_eur
-        
-    except Exception as e:
-        print(f"Error en predicción en lote: {str(e)}")
-        # Fallback: predicción fila por fila (más lento pero más robusto)
-        predicciones = []
-        for idx, row in df_sample.iterrows():
-            try:
-                X_pred = preparar_datos_para_prediccion(row)
-                valor_log = modelo.predict(X_pred)[0]
-                valor_eur = np.expm1(valor_log)
-                predicciones.append(valor_eur)
-            except:
-                predicciones.append(np.nan)
-        
-        df_sample["valor_predicho_eur"] = predicciones
+    df_top = snapshot.df_jugadores.iloc[filas].copy()
+    df_top["valor_predicho_eur"] = snapshot.almacen_predicciones.valor_predicho[filas]
+    df_top["diferencia_porcentual"] = snapshot.almacen_predicciones.diferencia_porcentual[filas]
     
-    return df_sample
+    return df_top[columnas_resultado].to_dict("records")
 
 
 # ============================================================================
@@ -1034,7 +1133,7 @@ def calcular_predicciones_dataset():
 # ============================================================================
 
 @app.get("/", summary="Información de la API")
-def raiz():
+def raiz(snapshot: SnapshotServicio = Depends(obtener_snapshot)):
     """
     Endpoint raíz que retorna información sobre la API.
     """
@@ -1053,16 +1152,23 @@ def raiz():
             "buscar": "/jugadores/buscar",
             "perfil": "/jugadores/{jugador_id}/perfil",
             "predecir": "/ml/predecir_valor",
+            "predecir_lote": "/ml/predecir_lote",
+            "metricas_agrupador": "/ml/metricas_agrupador",
             "infravalorados": "/jugadores/infravalorados",
             "sobrevalorados": "/jugadores/sobrevalorados",
             "estadisticas": "/eda/estadisticas_generales",
             "graficos": "/eda/datos_graficos",
+            "recargar": "/admin/recargar",
+            "snapshot": "/admin/snapshot",
+            "salud": "/health/live",
+            "preparado": "/health/ready",
             "documentacion": "/docs"
         },
+        "version_snapshot": snapshot.version,
         "dataset": {
-            "total_jugadores": len(df_jugadores),
-            "total_clubes": df_jugadores["club"].nunique(),
-            "total_ligas": df_jugadores["liga"].nunique()
+            "total_jugadores": len(snapshot.df_jugadores),
+            "total_clubes": snapshot.df_jugadores["club"].nunique(),
+            "total_ligas": snapshot.df_jugadores["liga"].nunique()
         }
     }
 
@@ -1077,7 +1183,7 @@ if __name__ == "__main__":
     print("INICIANDO API SISTEMA SCOUTING FIFA")
     print("="*80)
     print(f"Modelo cargado: R² = 98.30%")
-    print(f"Dataset: {len(df_jugadores):,} jugadores")
+    print(f"Datos y modelo: cargando en segundo plano (ver /health/ready)")
     print(f"Servidor: http://localhost:8000")
     print(f"Documentación: http://localhost:8000/docs")
     print("="*80 + "\n")
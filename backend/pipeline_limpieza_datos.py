@@ -4,11 +4,30 @@ Sistema de Scouting FIFA
 
 Este script ejecuta todo el pipeline de procesamiento de datos.
 Procesa las 7 hojas del Excel (FIFA 15 a 21) y las unifica.
+
+Se ejecuta con copy-on-write de pandas: cada paso trabaja sobre una copia
+superficial y solo materializa las columnas que agrega o reemplaza, en lugar
+de copiar el DataFrame completo. Al final se imprime el tiempo y el pico de
+memoria (RSS) de cada paso.
+
+Los pasos se declaran en PASOS con sus entradas y salida. La salida de cada
+paso se guarda como checkpoint Parquet en ../datos/cache_pipeline, así que al
+volver a ejecutar solo corren los pasos cuyo código, parámetros o entrada
+cambiaron (ver scripts/limpieza/dag_pipeline.py):
+
+    python pipeline_limpieza_datos.py               # solo pasos invalidados
+    python pipeline_limpieza_datos.py --desde 4.1   # fuerza 4.1 y siguientes
+
+El resultado se guarda como Parquet particionado por año en
+../datos/procesados/fifa_limpio/; con --csv además se exporta fifa_limpio.csv.
 """
 
+import argparse
 import sys
 sys.path.append('.')
 
+import pandas as pd
+
 from scripts.limpieza.cargador_datos import cargar_datos_fifa
 from scripts.limpieza.renombrado_columnas import renombrar_columnas_espanol
 from scripts.limpieza.limpieza_datos import (
@@ -32,94 +51,91 @@ from scripts.limpieza.nuevas_caracteristicas import (
    crear_categoria_reputacion
 )
 from scripts.limpieza.guardado_datos import guardar_datos_limpios
+from scripts.limpieza.medicion_pasos import MedidorPasos
+from scripts.limpieza.dag_pipeline import Paso, ejecutar_pipeline
+
+
+RUTA_EXCEL = '../datos/originales/fifa.xlsx'
+DIRECTORIO_CACHE_PIPELINE = '../datos/cache_pipeline'
+RUTA_DATASET = '../datos/procesados/fifa_limpio'
+RUTA_CSV = '../datos/procesados/fifa_limpio.csv'
+
+FASE_CARGA = "FASE 1: CARGA DE DATOS"
+FASE_LIMPIEZA = "FASE 2: LIMPIEZA DE DATOS"
+FASE_IMPUTACION = "FASE 3: IMPUTACIÓN DE VALORES NULOS"
+FASE_CARACTERISTICAS = "FASE 4: INGENIERÍA DE CARACTERÍSTICAS"
+
+# Cada paso recibe las salidas indicadas en 'entradas' y produce 'salida'
+PASOS = [
+   Paso("1.1", "Carga de datos", cargar_datos_fifa, salida="crudo",
+        parametros={"ruta_archivo": RUTA_EXCEL}, archivos=(RUTA_EXCEL,), fase=FASE_CARGA),
+
+   Paso("2.1", "Selección de columnas relevantes", seleccionar_columnas_relevantes,
+        entradas=("crudo",), salida="seleccionado", fase=FASE_LIMPIEZA),
+   Paso("2.2", "Renombrado de columnas a español", renombrar_columnas_espanol,
+        entradas=("seleccionado",), salida="renombrado", fase=FASE_LIMPIEZA),
+   Paso("2.3", "Eliminación de duplicados", eliminar_duplicados,
+        entradas=("renombrado",), salida="sin_duplicados", fase=FASE_LIMPIEZA),
+   Paso("2.4", "Eliminación de columnas con exceso de nulos", eliminar_columnas_muchos_nulos,
+        entradas=("sin_duplicados",), salida="sin_columnas_nulas", parametros={"umbral": 0.5},
+        fase=FASE_LIMPIEZA),
+   Paso("2.5", "Normalización de valores monetarios", normalizar_valores_monetarios,
+        entradas=("sin_columnas_nulas",), salida="montos_normalizados", fase=FASE_LIMPIEZA),
+   Paso("2.6", "Normalización de fechas", normalizar_fechas,
+        entradas=("montos_normalizados",), salida="limpio", fase=FASE_LIMPIEZA),
+
+   Paso("3.1", "Imputación de valores nulos generales", imputar_valores_nulos,
+        entradas=("limpio",), salida="imputado", fase=FASE_IMPUTACION),
+   Paso("3.2", "Imputación de atributos de porteros", imputar_atributos_porteros,
+        entradas=("imputado",), salida="imputado_porteros", fase=FASE_IMPUTACION),
+
+   Paso("4.1", "Calidad promedio del jugador", crear_calidad_promedio,
+        entradas=("imputado_porteros",), salida="con_calidad", fase=FASE_CARACTERISTICAS),
+   Paso("4.2", "Diferencia de potencial", crear_diferencia_potencial,
+        entradas=("con_calidad",), salida="con_potencial", fase=FASE_CARACTERISTICAS),
+   Paso("4.3", "Categoría de edad", crear_categoria_edad,
+        entradas=("con_potencial",), salida="con_edad", fase=FASE_CARACTERISTICAS),
+   Paso("4.4", "Categoría de posición", crear_categoria_posicion,
+        entradas=("con_edad",), salida="con_posicion", fase=FASE_CARACTERISTICAS),
+   Paso("4.5", "Ratio valor/salario", crear_ratio_valor_salario,
+        entradas=("con_posicion",), salida="con_ratio", fase=FASE_CARACTERISTICAS),
+   Paso("4.6", "Años de contrato restantes", crear_anos_contrato_restantes,
+        entradas=("con_ratio",), salida="con_contrato", fase=FASE_CARACTERISTICAS),
+   Paso("4.7", "Categoría de reputación internacional", crear_categoria_reputacion,
+        entradas=("con_contrato",), salida="final", fase=FASE_CARACTERISTICAS),
+]
+
+
+def activar_copy_on_write():
+   """Activa copy-on-write en pandas 2.x (desde pandas 3.0 siempre está activo)."""
+   if int(pd.__version__.split('.')[0]) < 3:
+       pd.set_option('mode.copy_on_write', True)
 
 
-def main():
+def main(desde=None, exportar_csv=False):
    """
    Función principal que ejecuta el pipeline completo de limpieza.
+   
+   Args:
+       desde: id ("4.1") o salida de un paso a partir del cual se fuerza la
+           ejecución; los pasos anteriores se toman de su último checkpoint
+       exportar_csv: si es True, además del Parquet se exporta el CSV
    """
    print("\n" + "="*70)
    print(" PIPELINE DE LIMPIEZA DE DATOS FIFA (2015-2021)")
    print("="*70)
    
-   # ========================================================================
-   # FASE 1: CARGA DE DATOS (Múltiples hojas)
-   # ========================================================================
-   print("="*70)
-   print("FASE 1: CARGA DE DATOS")
-   print("="*70)
-   
-   df = cargar_datos_fifa('../datos/originales/fifa.xlsx')
-   
-   if df is None:
-       print("\nERROR: Error al cargar datos. Pipeline detenido.")
-       return
+   activar_copy_on_write()
+   medidor = MedidorPasos()
    
    # ========================================================================
-   # FASE 2: LIMPIEZA DE DATOS
+   # FASES 1 A 4: CARGA, LIMPIEZA, IMPUTACIÓN Y CARACTERÍSTICAS
    # ========================================================================
-   print("\n" + "="*70)
-   print("FASE 2: LIMPIEZA DE DATOS")
-   print("="*70)
-   
-   print("\n Paso 2.1: Selección de columnas relevantes")
-   df = seleccionar_columnas_relevantes(df)
-   
-   print("\n Paso 2.2: Renombrado de columnas a español")
-   df = renombrar_columnas_espanol(df)
-   
-   print("\n Paso 2.3: Eliminación de duplicados (mismo jugador, mismo año)")
-   df = eliminar_duplicados(df)
-   
-   print("\n Paso 2.4: Eliminación de columnas con exceso de nulos")
-   df = eliminar_columnas_muchos_nulos(df, umbral=0.5)
-   
-   print("\n Paso 2.5: Normalización de valores monetarios")
-   df = normalizar_valores_monetarios(df)
-   
-   print("\n Paso 2.6: Normalización de fechas")
-   df = normalizar_fechas(df)
-   
-   # ========================================================================
-   # FASE 3: IMPUTACIÓN DE VALORES NULOS
-   # ========================================================================
-   print("\n" + "="*70)
-   print("FASE 3: IMPUTACIÓN DE VALORES NULOS")
-   print("="*70)
-   
-   print("\n Paso 3.1: Imputación de valores nulos generales")
-   df = imputar_valores_nulos(df)
-   
-   print("\n Paso 3.2: Imputación de atributos de porteros")
-   df = imputar_atributos_porteros(df)
-   
-   # ========================================================================
-   # FASE 4: FEATURE ENGINEERING
-   # ========================================================================
-   print("\n" + "="*70)
-   print("FASE 4: INGENIERÍA DE CARACTERÍSTICAS")
-   print("="*70)
-   
-   print("\n Paso 4.1: Calidad promedio del jugador")
-   df = crear_calidad_promedio(df)
-   
-   print("\n Paso 4.2: Diferencia de potencial")
-   df = crear_diferencia_potencial(df)
-   
-   print("\n Paso 4.3: Categoría de edad")
-   df = crear_categoria_edad(df)
-   
-   print("\n Paso 4.4: Categoría de posición")
-   df = crear_categoria_posicion(df)
-   
-   print("\n Paso 4.5: Ratio valor/salario")
-   df = crear_ratio_valor_salario(df)
-   
-   print("\n Paso 4.6: Años de contrato restantes")
-   df = crear_anos_contrato_restantes(df)
-   
-   print("\n Paso 4.7: Categoría de reputación internacional")
-   df = crear_categoria_reputacion(df)
+   try:
+       df = ejecutar_pipeline(PASOS, DIRECTORIO_CACHE_PIPELINE, desde=desde, medidor=medidor)["final"]
+   except (ValueError, RuntimeError) as e:
+       print(f"\n❌ ERROR: {e}. Pipeline detenido.")
+       return
    
    # ========================================================================
    # FASE 5: VALIDACIÓN Y RESUMEN
@@ -164,7 +180,16 @@ def main():
    print("FASE 6: GUARDADO DE DATOS LIMPIOS")
    print("="*70)
    
-   guardar_datos_limpios(df, '../datos/procesados/fifa_limpio.csv')
+   with medidor.paso("6.1 Guardado"):
+       guardar_datos_limpios(df, RUTA_DATASET, ruta_csv=RUTA_CSV if exportar_csv else None)
+   
+   # ========================================================================
+   # TIEMPO Y MEMORIA POR PASO
+   # ========================================================================
+   print("\n" + "="*70)
+   print("TIEMPO Y MEMORIA POR PASO")
+   print("="*70)
+   medidor.imprimir_resumen()
    
    # ========================================================================
    # FINALIZACIÓN
@@ -173,9 +198,23 @@ def main():
    print(" PIPELINE COMPLETADO EXITOSAMENTE")
    print("="*70)
    print("\nDatos listos para entrenamiento de modelo ML!")
-   print(f"Archivo guardado: ../datos/procesados/fifa_limpio.csv")
+   print(f"Dataset guardado: {RUTA_DATASET}/ (Parquet particionado por año)")
+   if exportar_csv:
+       print(f"CSV exportado: {RUTA_CSV}")
    print("="*70 + "\n")
 
 
 if __name__ == "__main__":
-   main()
+   parser = argparse.ArgumentParser(description="Pipeline de limpieza de datos FIFA")
+   parser.add_argument(
+       "--desde",
+       help="Paso (id como 4.1 o nombre de su salida) desde el que se re-ejecuta; "
+            "los anteriores se toman de su último checkpoint"
+   )
+   parser.add_argument(
+       "--csv",
+       action="store_true",
+       help="Exportar también fifa_limpio.csv (el dataset principal es el Parquet particionado)"
+   )
+   args = parser.parse_args()
+   main(desde=args.desde, exportar_csv=args.csv)
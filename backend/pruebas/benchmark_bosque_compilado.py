@@ -0,0 +1,78 @@
+"""
+Benchmark: bosque compilado (NumPy) vs modelo.predict de sklearn
+==================================================================
+Compara latencia y exactitud de las predicciones de 1 fila y lotes pequeños,
+que es el caso de /ml/predecir_valor y /jugadores/{id}/perfil.
+
+Ejecutar desde la carpeta backend (requiere modelo entrenado y dataset):
+    cd backend
+    python pruebas/benchmark_bosque_compilado.py
+"""
+
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+import joblib
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.join(BASE_DIR, "..")
+sys.path.append(BACKEND_DIR)
+
+from scripts.ml.bosque_compilado import BosqueCompilado
+from scripts.ml.plan_caracteristicas import cargar_plan_caracteristicas
+from scripts.limpieza.dataset_particionado import leer_dataset_particionado
+
+DATA_PATH = os.path.join(BACKEND_DIR, "..", "datos", "procesados", "fifa_limpio.csv")
+MODEL_DIR = os.path.join(BACKEND_DIR, "..", "datos", "modelos")
+
+TAMAÑOS_LOTE = [1, 10, 100]
+REPETICIONES = 20
+
+
+def medir(funcion, X, repeticiones=REPETICIONES):
+    """Retorna (p50, p99) en milisegundos de funcion(X)."""
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion(X)
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return np.percentile(tiempos, 50), np.percentile(tiempos, 99)
+
+
+print("=" * 80)
+print("BENCHMARK: BOSQUE COMPILADO vs SKLEARN")
+print("=" * 80)
+
+modelo = joblib.load(os.path.join(MODEL_DIR, "modelo_fifa.joblib"))
+plan = cargar_plan_caracteristicas(os.path.join(MODEL_DIR, "plan_caracteristicas_fifa.joblib"))
+
+dataset_path = DATA_PATH.replace(".csv", "")
+df = leer_dataset_particionado(dataset_path) if os.path.isdir(dataset_path) else pd.read_csv(DATA_PATH, low_memory=False)
+X = plan.transformar(df.sample(max(TAMAÑOS_LOTE), random_state=42))
+
+print(f"\nModelo: {type(modelo).__name__} con {len(getattr(modelo, 'estimators_', [modelo]))} árboles")
+
+for precision in ["float64", "float32"]:
+    inicio = time.perf_counter()
+    bosque = BosqueCompilado(modelo, precision=precision)
+    tiempo_compilacion = time.perf_counter() - inicio
+
+    print("\n" + "-" * 80)
+    print(f"PRECISIÓN {precision.upper()}")
+    print("-" * 80)
+    print(f"Nodos: {bosque.total_nodos:,} | Memoria: {bosque.memoria_mb():.1f} MB | "
+          f"Compilación: {tiempo_compilacion:.2f} s | Profundidad: {bosque.profundidad_maxima}")
+
+    diferencia_maxima = np.abs(bosque.predict(X) - modelo.predict(X)).max()
+    print(f"Diferencia máxima vs sklearn (escala log): {diferencia_maxima:.2e}")
+
+    print(f"\n{'Filas':>6} {'sklearn p50':>12} {'sklearn p99':>12} {'compilado p50':>14} {'compilado p99':>14} {'speedup':>8}")
+    for filas in TAMAÑOS_LOTE:
+        lote = X[:filas]
+        sk_p50, sk_p99 = medir(modelo.predict, lote)
+        bc_p50, bc_p99 = medir(bosque.predict, lote)
+        print(f"{filas:>6} {sk_p50:>10.2f}ms {sk_p99:>10.2f}ms {bc_p50:>12.2f}ms {bc_p99:>12.2f}ms {sk_p50 / bc_p50:>7.1f}x")
+
+print("\n" + "=" * 80)
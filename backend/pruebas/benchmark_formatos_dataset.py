@@ -0,0 +1,139 @@
+"""
+Benchmark: carga del dataset desde CSV, Parquet particionado y Arrow IPC
+===========================================================
+Cada formato se carga en un proceso nuevo (spawn) para medir desde cero:
+
+- tiempo de carga hasta tener el DataFrame
+- RSS y USS tras la carga
+- tiempo y memoria tras recorrer todas las columnas numéricas (con Arrow
+  las páginas mapeadas se leen recién cuando se tocan)
+
+Las páginas del archivo Arrow mapeado cuentan en la memoria de un proceso
+solo, pero son páginas del page cache: con varios workers que mapean el
+mismo archivo se pagan una sola vez (ver benchmark_memoria_multiproceso.py).
+
+Ejecutar desde la carpeta backend (Linux, requiere haber ejecutado
+pipeline_limpieza_datos.py --csv y scripts/ml/optimizar_dataset.py):
+    cd backend
+    python pruebas/benchmark_formatos_dataset.py --repeticiones 3
+"""
+
+import argparse
+import multiprocessing
+import os
+import statistics
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.abspath(os.path.join(BASE_DIR, ".."))
+sys.path.append(BACKEND_DIR)
+
+from scripts.limpieza.dataset_particionado import tamaño_directorio_mb
+
+DATA_PATH = os.path.join(BACKEND_DIR, "..", "datos", "procesados", "fifa_limpio.csv")
+RUTAS_FORMATOS = {
+    "csv": DATA_PATH,
+    "parquet": DATA_PATH.replace(".csv", ""),
+    "arrow": DATA_PATH.replace(".csv", ".arrow")
+}
+
+
+def medir_carga(formato, ruta, cola):
+    """Proceso nuevo: carga el dataset en el formato indicado y reporta tiempos y memoria."""
+    import numpy as np
+    import pandas as pd
+    from scripts.ml.formato_arrow import cargar_arrow
+    from scripts.limpieza.dataset_particionado import leer_dataset_particionado
+    from scripts.api.memoria_compartida import memoria_proceso
+
+    cargadores = {
+        "csv": lambda: pd.read_csv(ruta, low_memory=False),
+        "parquet": lambda: leer_dataset_particionado(ruta),
+        "arrow": lambda: cargar_arrow(ruta)
+    }
+
+    memoria_inicial = memoria_proceso()
+    inicio = time.perf_counter()
+    df = cargadores[formato]()
+    tiempo_carga = time.perf_counter() - inicio
+    memoria_carga = memoria_proceso()
+
+    # Recorrer todas las columnas numéricas (lo que hacen índices y cubo al construirse)
+    inicio = time.perf_counter()
+    for columna in df.columns:
+        if isinstance(df[columna].dtype, np.dtype) and df[columna].dtype.kind in "biuf":
+            float(np.nansum(df[columna].to_numpy(dtype="float64")))
+    tiempo_recorrido = time.perf_counter() - inicio
+    memoria_recorrido = memoria_proceso()
+
+    cola.put({
+        "filas": len(df),
+        "tiempo_carga_s": tiempo_carga,
+        "tiempo_recorrido_s": tiempo_recorrido,
+        "rss_carga_mb": memoria_carga["rss_mb"] - memoria_inicial["rss_mb"],
+        "uss_carga_mb": memoria_carga["uss_mb"] - memoria_inicial["uss_mb"],
+        "rss_recorrido_mb": memoria_recorrido["rss_mb"] - memoria_inicial["rss_mb"],
+        "uss_recorrido_mb": memoria_recorrido["uss_mb"] - memoria_inicial["uss_mb"]
+    })
+
+
+def medir_formato(formato, ruta, repeticiones):
+    """Mediana de cada métrica sobre varias cargas, cada una en un proceso nuevo."""
+    contexto = multiprocessing.get_context("spawn")
+    resultados = []
+    for _ in range(repeticiones):
+        cola = contexto.Queue()
+        proceso = contexto.Process(target=medir_carga, args=(formato, ruta, cola))
+        proceso.start()
+        resultados.append(cola.get())
+        proceso.join()
+    return {
+        clave: statistics.median(resultado[clave] for resultado in resultados)
+        for clave in resultados[0]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Carga del dataset: CSV vs Parquet vs Arrow IPC")
+    parser.add_argument("--repeticiones", type=int, default=3)
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print("BENCHMARK: FORMATOS DEL DATASET (CSV vs PARQUET vs ARROW IPC)")
+    print("=" * 80)
+
+    resultados = {}
+    for formato, ruta in RUTAS_FORMATOS.items():
+        if not os.path.exists(ruta):
+            print(f"⚠️  {formato}: no existe {ruta} (ejecuta scripts/ml/optimizar_dataset.py)")
+            continue
+        tamaño_mb = tamaño_directorio_mb(ruta) if os.path.isdir(ruta) else os.path.getsize(ruta) / (1024 * 1024)
+        print(f"  - {formato}: {tamaño_mb:.1f} MB en disco, "
+              f"{args.repeticiones} cargas...")
+        resultados[formato] = medir_formato(formato, ruta, args.repeticiones)
+
+    if not resultados:
+        return
+
+    print(f"\nFilas: {next(iter(resultados.values()))['filas']:,} (mediana de {args.repeticiones} procesos nuevos)")
+    print(f"{'Formato':<10} {'Carga ms':>10} {'Recorrer ms':>12} {'RSS MB':>9} {'USS MB':>9} "
+          f"{'RSS tras recorrer':>18} {'USS tras recorrer':>18}")
+    for formato, r in resultados.items():
+        print(f"{formato:<10} {r['tiempo_carga_s'] * 1000:>10.1f} {r['tiempo_recorrido_s'] * 1000:>12.1f} "
+              f"{r['rss_carga_mb']:>9.1f} {r['uss_carga_mb']:>9.1f} "
+              f"{r['rss_recorrido_mb']:>18.1f} {r['uss_recorrido_mb']:>18.1f}")
+
+    if "arrow" in resultados:
+        arrow = resultados["arrow"]
+        print("\n" + "-" * 80)
+        for formato in ("csv", "parquet"):
+            if formato in resultados:
+                print(f"Arrow vs {formato}: carga {resultados[formato]['tiempo_carga_s'] / arrow['tiempo_carga_s']:,.0f}x "
+                      f"más rápida, USS tras recorrer {resultados[formato]['uss_recorrido_mb']:.1f} MB -> "
+                      f"{arrow['uss_recorrido_mb']:.1f} MB")
+    print("=" * 80)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Benchmark: limpieza vectorizada vs apply por celda/fila
+=======================================================
+Compara sobre un DataFrame sintético de 1M de filas:
+
+- Montos ('€1.5M', '€300K', ...): apply con una función Python por celda
+  vs convertir_montos (una extracción regex + mapa de multiplicadores).
+- Categoría de posición: apply por fila con búsquedas de subcadenas vs
+  categorizar_posiciones (tabla token -> categoría sobre los valores únicos).
+
+Además de los tiempos reporta en qué filas difieren los resultados. En
+posiciones, la versión anterior buscaba subcadenas: 'CB' coincidía dentro
+de 'LCB' por casualidad, pero 'LDM', 'RAM', 'LS', 'RS', 'LF' o 'RF' no
+contienen ninguna sigla de la lista y quedaban como 'Otro'.
+
+Ejecutar desde la carpeta backend:
+    cd backend
+    python pruebas/benchmark_limpieza_vectorizada.py --filas 1000000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.abspath(os.path.join(BASE_DIR, "..")))
+
+from scripts.limpieza.limpieza_datos import convertir_montos
+from scripts.limpieza.nuevas_caracteristicas import categorizar_posiciones
+
+
+# ============================================================================
+# IMPLEMENTACIONES ANTERIORES (referencia)
+# ============================================================================
+
+def convertir_monetario_anterior(valor):
+    if pd.isna(valor):
+        return valor
+    valor_str = str(valor).replace('€', '').replace('$', '').strip()
+    if 'M' in valor_str:
+        return float(valor_str.replace('M', '')) * 1_000_000
+    elif 'K' in valor_str:
+        return float(valor_str.replace('K', '')) * 1_000
+    else:
+        try:
+            return float(valor_str)
+        except:
+            return None
+
+
+def categorizar_posicion_anterior(posiciones):
+    if pd.isna(posiciones) or posiciones == 'Desconocido':
+        return 'Desconocido'
+
+    posiciones_str = str(posiciones).upper()
+
+    if 'GK' in posiciones_str:
+        return 'Portero'
+    elif any(x in posiciones_str for x in ['CB', 'LB', 'RB', 'LWB', 'RWB']):
+        return 'Defensa'
+    elif any(x in posiciones_str for x in ['CM', 'CDM', 'CAM', 'LM', 'RM']):
+        return 'Mediocampista'
+    elif any(x in posiciones_str for x in ['ST', 'CF', 'LW', 'RW']):
+        return 'Delantero'
+    else:
+        return 'Otro'
+
+
+# ============================================================================
+# DATOS SINTÉTICOS
+# ============================================================================
+
+POSICIONES = [
+    "ST", "CF", "LW", "RW", "LS", "RS", "LF", "RF", "CAM", "CM", "CDM", "LM", "RM",
+    "LCM", "RCM", "LDM", "RAM", "CB", "LCB", "RCB", "LB", "RB", "LWB", "RWB", "GK"
+]
+
+
+def generar_datos(filas, semilla=0):
+    rng = np.random.default_rng(semilla)
+
+    # Montos como en los CSV de SoFIFA, con algunos nulos
+    numeros = np.round(rng.lognormal(0.5, 1.2, filas), 1)
+    sufijos = rng.choice(["M", "K", ""], filas, p=[0.5, 0.45, 0.05])
+    montos = pd.Series([f"€{n}{s}" for n, s in zip(numeros, sufijos)], dtype=object)
+    montos[rng.random(filas) < 0.02] = np.nan
+
+    # 1 a 3 posiciones por jugador
+    cantidad = rng.choice([1, 2, 3], filas, p=[0.5, 0.35, 0.15])
+    elegidas = rng.choice(POSICIONES, (filas, 3))
+    posiciones = pd.Series([", ".join(fila[:n]) for fila, n in zip(elegidas, cantidad)], dtype=object)
+    posiciones[rng.random(filas) < 0.01] = np.nan
+
+    return montos, posiciones
+
+
+def medir(funcion, repeticiones=1):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return resultado, min(tiempos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Limpieza vectorizada vs apply")
+    parser.add_argument("--filas", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print(f"BENCHMARK: LIMPIEZA VECTORIZADA ({args.filas:,} filas)")
+    print("=" * 80)
+
+    montos, posiciones = generar_datos(args.filas)
+
+    # Montos
+    anterior, t_anterior = medir(lambda: montos.apply(convertir_monetario_anterior).astype("float64"))
+    nuevo, t_nuevo = medir(lambda: convertir_montos(montos), repeticiones=3)
+    diferentes = ~np.isclose(anterior.to_numpy(), nuevo.to_numpy(), rtol=0, atol=0, equal_nan=True)
+    print(f"\nMONTOS")
+    print(f"  apply por celda:      {t_anterior:8.3f} s")
+    print(f"  regex vectorizada:    {t_nuevo:8.3f} s  ({t_anterior / t_nuevo:.1f}x)")
+    print(f"  filas distintas:      {int(diferentes.sum()):,}")
+
+    # Posiciones
+    anterior, t_anterior = medir(lambda: posiciones.apply(categorizar_posicion_anterior))
+    nuevo, t_nuevo = medir(lambda: categorizar_posiciones(posiciones), repeticiones=3)
+    diferentes = anterior.to_numpy() != nuevo.to_numpy()
+    print(f"\nCATEGORÍA DE POSICIÓN")
+    print(f"  apply por fila:       {t_anterior:8.3f} s")
+    print(f"  tabla de tokens:      {t_nuevo:8.3f} s  ({t_anterior / t_nuevo:.1f}x)")
+    print(f"  filas distintas:      {int(diferentes.sum()):,} (falsos positivos/negativos de subcadenas)")
+    if diferentes.any():
+        cambios = pd.DataFrame({
+            "posiciones": posiciones[diferentes],
+            "anterior": anterior[diferentes],
+            "nuevo": nuevo[diferentes]
+        }).value_counts().head(8)
+        for (valor, antes, despues), cantidad in cambios.items():
+            print(f"     {valor:<14} {antes:>13} -> {despues:<13} ({cantidad:,})")
+    print("=" * 80)
+
+
+if __name__ == "__main__":
+    main()
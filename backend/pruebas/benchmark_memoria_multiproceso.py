@@ -0,0 +1,214 @@
+"""
+Benchmark: memoria de N workers independientes vs memoria compartida
+=====================================================================
+Compara la memoria de servir la API con N procesos:
+
+- INDEPENDIENTES: cada worker carga su propia copia del modelo y del
+  dataset (lo que hace `uvicorn --workers N`).
+- COMPARTIDA: un maestro precarga todo con el bosque y las columnas
+  numéricas mapeadas desde archivos .npy, ejecuta gc.freeze() y hace fork
+  de N workers (lo que hace servidor_multiproceso.py).
+
+Cada worker ejecuta las mismas peticiones (búsqueda, EDA, perfil y
+predicción en lote) antes de medir. Se reporta RSS (lo que cada proceso
+cree usar), USS (exclusivo) y PSS (memoria real repartida) por proceso.
+
+Antes de medir, el maestro compartido verifica que las columnas numéricas
+del dataset siguen mapeadas después de unir la tabla de predicciones
+(np.shares_memory): una copia silenciosa anularía la memoria compartida.
+
+Ejecutar desde la carpeta backend (Linux, requiere modelo entrenado y dataset):
+    cd backend
+    python pruebas/benchmark_memoria_multiproceso.py --workers 4
+"""
+
+import argparse
+import gc
+import multiprocessing
+import os
+import signal
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.abspath(os.path.join(BASE_DIR, ".."))
+sys.path.append(BACKEND_DIR)
+
+from scripts.api.memoria_compartida import (
+    reporte_memoria, imprimir_reporte_memoria, columnas_mapeables, mapear_dataframe
+)
+
+
+def ejecutar_carga_trabajo(api):
+    """Peticiones representativas para que cada worker toque sus datos."""
+    from fastapi.testclient import TestClient
+
+    cliente = TestClient(api.app)
+    snapshot = api.gestor_snapshots.actual
+    ids = snapshot.df_jugadores["id_sofifa"].iloc[:20].tolist()
+
+    cliente.get("/jugadores/buscar", params={"limite": 100})
+    cliente.get("/jugadores/buscar", params={"nombre": "mes", "ordenar_por": "potencial"})
+    cliente.get("/eda/estadisticas_generales")
+    cliente.get("/eda/datos_graficos", params={"tipo_analisis": "clubes"})
+    cliente.get("/jugadores/infravalorados", params={"top": 20})
+    for id_sofifa in ids:
+        cliente.get(f"/jugadores/{id_sofifa}/perfil")
+    cliente.post("/ml/predecir_lote", json=[{"edad": 20 + i % 15, "valoracion_global": 60 + i % 30} for i in range(500)])
+
+
+def verificar_columnas_compartidas(api):
+    """
+    Comprueba que unir la tabla de predicciones no copia las columnas
+    mapeadas (Arrow o .npy compartidos) y que las columnas numéricas del
+    snapshot cargado siguen siendo de solo lectura (mapeadas, no copias).
+
+    Raises:
+        AssertionError: si alguna columna se copió a la memoria del proceso
+    """
+    from scripts.api.snapshot_servicio import cargar_dataset
+    from scripts.ml.tabla_predicciones import COLUMNAS_PREDICCION, leer_predicciones, unir_predicciones
+
+    rutas = api.RUTAS_ARTEFACTOS
+    predicciones, metadatos = leer_predicciones(rutas["predicciones"])
+    if predicciones is not None:
+        df, formato = cargar_dataset(rutas["dataset_csv"], rutas["dataset_parquet"], rutas.get("dataset_arrow"))
+        with tempfile.TemporaryDirectory() as directorio:
+            if formato != "arrow":
+                df = mapear_dataframe(df, os.path.join(directorio, "dataset"))
+            unido, motivo = unir_predicciones(df, predicciones, metadatos, metadatos["version_modelo"])
+            assert motivo is None, f"La tabla de predicciones no se unió: {motivo}"
+            columnas = columnas_mapeables(df)
+            copiadas = [
+                columna for columna in columnas
+                if not np.shares_memory(df[columna].to_numpy(), unido[columna].to_numpy())
+            ]
+            assert not copiadas, f"unir_predicciones copió {len(copiadas)} de {len(columnas)} columnas: {copiadas[:5]}"
+            print(f"✓ unir_predicciones ({formato}): {len(columnas)} columnas numéricas sin copiar")
+
+    df_servicio = api.gestor_snapshots.actual.df_jugadores
+    privadas = [
+        columna for columna in columnas_mapeables(df_servicio)
+        if columna not in COLUMNAS_PREDICCION and df_servicio[columna].to_numpy().flags.writeable
+    ]
+    assert not privadas, f"{len(privadas)} columnas del snapshot copiadas en memoria del proceso: {privadas[:5]}"
+    print(f"✓ Snapshot: columnas numéricas del dataset mapeadas (solo lectura)")
+
+
+def importar_api(memoria_compartida):
+    os.chdir(BACKEND_DIR)
+    os.environ["FIFA_MEMORIA_COMPARTIDA"] = "1" if memoria_compartida else "0"
+    os.environ["FIFA_CARGA_SINCRONA"] = "1"
+    import api_scouting_fifa
+    return api_scouting_fifa
+
+
+def worker_independiente(cola):
+    """Proceso nuevo (spawn) que carga la API completa por su cuenta."""
+    api = importar_api(memoria_compartida=False)
+    ejecutar_carga_trabajo(api)
+    cola.put([os.getpid()])
+    signal.pause()
+
+
+def maestro_compartido(cola, total_workers):
+    """Precarga con memoria compartida, congela el heap y hace fork de los workers."""
+    api = importar_api(memoria_compartida=True)
+    try:
+        verificar_columnas_compartidas(api)
+    except AssertionError as e:
+        cola.put(e)
+        return
+    gc.collect()
+    gc.freeze()
+
+    lectura, escritura = os.pipe()
+    workers = []
+    for _ in range(total_workers):
+        pid = os.fork()
+        if pid == 0:
+            os.close(lectura)
+            ejecutar_carga_trabajo(api)
+            os.write(escritura, b"1")
+            signal.pause()
+            os._exit(0)
+        workers.append(pid)
+
+    os.close(escritura)
+    listos = 0
+    while listos < total_workers:
+        listos += len(os.read(lectura, total_workers))
+    cola.put([os.getpid(), *workers])
+    signal.pause()
+
+
+def medir_independientes(total_workers):
+    contexto = multiprocessing.get_context("spawn")
+    cola = contexto.Queue()
+    procesos = [contexto.Process(target=worker_independiente, args=(cola,)) for _ in range(total_workers)]
+    for proceso in procesos:
+        proceso.start()
+    pids = [pid for _ in procesos for pid in cola.get()]
+    reporte = reporte_memoria(pids)
+    for proceso in procesos:
+        proceso.terminate()
+        proceso.join()
+    return reporte
+
+
+def medir_compartida(total_workers):
+    contexto = multiprocessing.get_context("spawn")
+    cola = contexto.Queue()
+    maestro = contexto.Process(target=maestro_compartido, args=(cola, total_workers))
+    maestro.start()
+    pids = cola.get()
+    if isinstance(pids, AssertionError):
+        maestro.join()
+        raise pids
+    reporte = reporte_memoria(pids)
+    for pid in pids[1:]:
+        os.kill(pid, signal.SIGTERM)
+    maestro.terminate()
+    maestro.join()
+    return reporte
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memoria de N workers: independientes vs compartida")
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print(f"BENCHMARK: MEMORIA CON {args.workers} WORKERS")
+    print("=" * 80)
+
+    inicio = time.perf_counter()
+    independientes = medir_independientes(args.workers)
+    print(f"\n(workers independientes medidos en {time.perf_counter() - inicio:.1f} s)")
+    imprimir_reporte_memoria(independientes, titulo=f"INDEPENDIENTES ({args.workers} workers)")
+
+    inicio = time.perf_counter()
+    compartida = medir_compartida(args.workers)
+    print(f"\n(maestro + workers medidos en {time.perf_counter() - inicio:.1f} s)")
+    imprimir_reporte_memoria(compartida, titulo=f"COMPARTIDA (maestro + {args.workers} workers)")
+
+    pss_independientes = independientes["total"]["pss_mb"]
+    pss_compartida = compartida["total"]["pss_mb"]
+    print("\n" + "-" * 80)
+    print(f"Memoria real (suma PSS): {pss_independientes:,.1f} MB -> {pss_compartida:,.1f} MB "
+          f"({(1 - pss_compartida / pss_independientes) * 100:.0f}% menos)")
+    print(f"RSS por worker (promedio): "
+          f"{independientes['total']['rss_mb'] / args.workers:,.1f} MB -> "
+          f"{sum(p['rss_mb'] for p in compartida['procesos'][1:]) / args.workers:,.1f} MB "
+          f"(con páginas compartidas)")
+    print(f"USS por worker (promedio): "
+          f"{independientes['total']['uss_mb'] / args.workers:,.1f} MB -> "
+          f"{sum(p['uss_mb'] for p in compartida['procesos'][1:]) / args.workers:,.1f} MB")
+    print("=" * 80)
+
+
+if __name__ == "__main__":
+    main()
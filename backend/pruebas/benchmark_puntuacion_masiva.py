@@ -0,0 +1,151 @@
+"""
+Benchmark: predicción del dataset completo, matriz única vs por bloques
+=======================================================================
+Replica el dataset particionado N veces (ids desplazados, para simular un
+histórico grande) en una carpeta temporal y lo predice de dos formas, cada
+una en un proceso nuevo (spawn) para que el pico de memoria sea solo suyo:
+
+- matriz única (como la versión anterior de regenerar_predicciones_rapido.py):
+  lee todas las filas, arma una sola matriz con el plan de características,
+  un solo predict y clasifica con apply por fila.
+- por bloques (scripts/ml/puntuacion_masiva.py): bloques float32 predichos
+  en un pool de procesos con el modelo mapeado.
+
+Reporta tiempo, filas/s y pico de RSS del proceso principal (con pool, los
+procesos del pool comparten las páginas del modelo mapeado y no entran en
+ese pico), y verifica que las predicciones sean iguales.
+
+Ejecutar desde la carpeta backend (requiere el dataset particionado y el modelo):
+    cd backend
+    python pruebas/benchmark_puntuacion_masiva.py --replicas 20 --procesos 4
+"""
+
+import argparse
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.abspath(os.path.join(BASE_DIR, ".."))
+sys.path.append(BACKEND_DIR)
+
+DATASET_PATH = os.path.join(BACKEND_DIR, "..", "datos", "procesados", "fifa_limpio")
+MODEL_DIR = os.path.join(BACKEND_DIR, "..", "datos", "modelos")
+ARTEFACTOS = (
+    os.path.join(MODEL_DIR, "modelo_fifa.joblib"),
+    os.path.join(MODEL_DIR, "plan_caracteristicas_fifa.joblib")
+)
+
+
+def replicar_dataset(destino, replicas):
+    """Guarda el dataset repetido `replicas` veces con id_sofifa desplazado."""
+    import pandas as pd
+    from scripts.limpieza.dataset_particionado import leer_dataset_particionado, guardar_dataset_particionado
+    from scripts.ml.puntuacion_masiva import COLUMNAS_ENTRADA
+
+    df = leer_dataset_particionado(DATASET_PATH, columnas=COLUMNAS_ENTRADA)
+    ids = df["id_sofifa"].astype("int64")
+    desplazamiento = int(ids.max()) + 1
+    copias = [df.assign(id_sofifa=ids + i * desplazamiento) for i in range(replicas)]
+    guardar_dataset_particionado(pd.concat(copias, ignore_index=True), destino)
+    return len(df) * replicas
+
+
+def predecir_matriz_unica(ruta_dataset, cola):
+    """Proceso nuevo: implementación anterior (todas las filas en una matriz)."""
+    import joblib
+    import numpy as np
+    from scripts.limpieza.dataset_particionado import leer_dataset_particionado
+    from scripts.limpieza.medicion_pasos import leer_memoria_mb
+    from scripts.ml.plan_caracteristicas import cargar_plan_caracteristicas
+    from scripts.ml.puntuacion_masiva import COLUMNAS_ENTRADA
+
+    inicio = time.perf_counter()
+    modelo = joblib.load(ARTEFACTOS[0], mmap_mode="r")
+    plan = cargar_plan_caracteristicas(ARTEFACTOS[1])
+
+    df = leer_dataset_particionado(ruta_dataset, columnas=COLUMNAS_ENTRADA, categoricas=False)
+    df["valor_predicho_eur"] = np.expm1(modelo.predict(plan.transformar(df)))
+    df["diferencia_porcentual"] = (df["valor_mercado_eur"] - df["valor_predicho_eur"]) / df["valor_predicho_eur"] * 100
+
+    def clasificar(dif):
+        if dif < -8.0:
+            return "INFRAVALORADO"
+        elif dif > 8.0:
+            return "SOBREVALORADO"
+        return "JUSTO"
+
+    df["clasificacion_ml"] = df["diferencia_porcentual"].apply(clasificar)
+    segundos = time.perf_counter() - inicio
+    cola.put((segundos, leer_memoria_mb()[1], df[["id_sofifa", "año_datos", "valor_predicho_eur", "clasificacion_ml"]]))
+
+
+def predecir_por_bloques(ruta_dataset, filas_por_bloque, procesos, cola):
+    """Proceso nuevo: motor de puntuación por bloques."""
+    from scripts.limpieza.medicion_pasos import leer_memoria_mb
+    from scripts.ml.puntuacion_masiva import puntuar_dataset
+
+    inicio = time.perf_counter()
+    predicciones = puntuar_dataset(ruta_dataset, *ARTEFACTOS, filas_por_bloque=filas_por_bloque, procesos=procesos)
+    segundos = time.perf_counter() - inicio
+    cola.put((segundos, leer_memoria_mb()[1], predicciones[["id_sofifa", "año_datos", "valor_predicho_eur", "clasificacion_ml"]]))
+
+
+def ejecutar_en_proceso(contexto, funcion, *args):
+    cola = contexto.Queue()
+    proceso = contexto.Process(target=funcion, args=(*args, cola))
+    proceso.start()
+    resultado = cola.get()
+    proceso.join()
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Predicción del dataset: matriz única vs por bloques")
+    parser.add_argument("--replicas", type=int, default=10, help="Veces que se repite el dataset")
+    parser.add_argument("--filas-por-bloque", type=int, default=50_000)
+    parser.add_argument("--procesos", type=int, default=None, help="Procesos del pool (default: núcleos)")
+    args = parser.parse_args()
+
+    import numpy as np
+
+    contexto = multiprocessing.get_context("spawn")
+    temporal = tempfile.mkdtemp(prefix="benchmark_puntuacion_")
+    ruta_dataset = os.path.join(temporal, "fifa_replicado")
+    try:
+        filas = replicar_dataset(ruta_dataset, args.replicas)
+
+        print("=" * 80)
+        print(f"BENCHMARK: PREDICCIÓN DEL DATASET ({filas:,} filas, {args.replicas} réplicas)")
+        print("=" * 80)
+
+        t_unica, pico_unica, unica = ejecutar_en_proceso(contexto, predecir_matriz_unica, ruta_dataset)
+        t_bloques, pico_bloques, bloques = ejecutar_en_proceso(
+            contexto, predecir_por_bloques, ruta_dataset, args.filas_por_bloque, args.procesos
+        )
+
+        claves = ["id_sofifa", "año_datos"]
+        comparacion = unica.merge(bloques, on=claves, suffixes=("_unica", "_bloques"))
+        diferencia = np.abs(comparacion["valor_predicho_eur_unica"] - comparacion["valor_predicho_eur_bloques"]).max()
+        clasificaciones_distintas = int(
+            (comparacion["clasificacion_ml_unica"].astype(str) != comparacion["clasificacion_ml_bloques"].astype(str)).sum()
+        )
+
+        print(f"\n {'MÉTODO':<22} {'TIEMPO s':>10} {'FILAS/s':>12} {'PICO RSS MB':>12}")
+        print("-" * 60)
+        print(f" {'matriz única':<22} {t_unica:>10.2f} {filas / t_unica:>12,.0f} {pico_unica:>12,.1f}")
+        print(f" {'por bloques':<22} {t_bloques:>10.2f} {filas / t_bloques:>12,.0f} {pico_bloques:>12,.1f}")
+        print("-" * 60)
+        print(f"  filas comparadas: {len(comparacion):,} de {filas:,}")
+        print(f"  máxima diferencia en valor predicho: {diferencia:.6g} EUR")
+        print(f"  clasificaciones distintas: {clasificaciones_distintas:,}")
+        print("=" * 80)
+    finally:
+        shutil.rmtree(temporal, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
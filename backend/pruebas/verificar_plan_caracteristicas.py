@@ -0,0 +1,84 @@
+"""
+Verificación: vectorizar (dicts, /ml y /perfil) vs transformar (DataFrame)
+===========================================================================
+El plan de características arma la fila de un jugador de dos formas: desde
+un dict (vectorizar / vectorizar_lote, lo que usa la API por petición) y
+desde un DataFrame (transformar, lo que usan el entrenamiento, la tabla de
+predicciones y la puntuación masiva). Las dos tienen que dar la misma fila,
+también cuando faltan valores.
+
+Toma una muestra del dataset, pone NaN en numéricas, categóricas y club de
+algunas filas, y compara fila por fila. Termina con código 1 si difieren.
+
+Ejecutar desde la carpeta backend (requiere dataset y plan guardado):
+    cd backend
+    python pruebas/verificar_plan_caracteristicas.py
+"""
+
+import os
+import sys
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.join(BASE_DIR, "..")
+sys.path.append(BACKEND_DIR)
+
+from scripts.limpieza.dataset_particionado import leer_dataset_particionado
+from scripts.ml.plan_caracteristicas import (
+    COLUMNAS_NUMERICAS, COLUMNAS_CATEGORICAS, NOMBRE_ARCHIVO_PLAN, cargar_plan_caracteristicas
+)
+
+DATASET_PATH = os.path.join(BACKEND_DIR, "..", "datos", "procesados", "fifa_limpio")
+PLAN_PATH = os.path.join(BACKEND_DIR, "..", "datos", "modelos", NOMBRE_ARCHIVO_PLAN)
+
+FILAS_MUESTRA = 500
+
+
+def main():
+    print("=" * 80)
+    print("VERIFICACIÓN: vectorizar vs transformar (con valores faltantes)")
+    print("=" * 80)
+
+    plan = cargar_plan_caracteristicas(PLAN_PATH)
+    df = leer_dataset_particionado(
+        DATASET_PATH, columnas=COLUMNAS_NUMERICAS + COLUMNAS_CATEGORICAS + ["club"], categoricas=False
+    )
+    df = df.sample(min(FILAS_MUESTRA, len(df)), random_state=42).reset_index(drop=True)
+
+    # Huecos: una numérica, una categórica y el club en filas distintas
+    generador = np.random.default_rng(42)
+    columnas_con_huecos = COLUMNAS_NUMERICAS + COLUMNAS_CATEGORICAS + ["club"]
+    for fila in range(0, len(df), 3):
+        columnas = generador.choice(columnas_con_huecos, size=3, replace=False)
+        df.loc[fila, list(columnas)] = np.nan
+    filas_con_huecos = int(df.isna().any(axis=1).sum())
+    print(f"✓ Muestra: {len(df):,} filas ({filas_con_huecos:,} con NaN)")
+
+    X_df = plan.transformar(df)
+    registros = df.to_dict("records")
+    X_lote = plan.vectorizar_lote(registros)
+    X_filas = np.vstack([plan.vectorizar(registro) for registro in registros])
+
+    errores = 0
+    for nombre, X in (("vectorizar_lote", X_lote), ("vectorizar", X_filas)):
+        distintas = np.flatnonzero(~np.all((X == X_df) | (np.isnan(X) & np.isnan(X_df)), axis=1))
+        con_nan = int(np.isnan(X).any(axis=1).sum())
+        if len(distintas) or con_nan:
+            errores += 1
+            print(f"❌ {nombre}: {len(distintas):,} filas distintas de transformar, {con_nan:,} con NaN")
+            if len(distintas):
+                fila = distintas[0]
+                columnas = np.flatnonzero(X[fila] != X_df[fila])
+                print(f"   fila {fila}: " + ", ".join(
+                    f"{plan.columnas[j]}={X[fila, j]} (transformar {X_df[fila, j]})" for j in columnas[:5]
+                ))
+        else:
+            print(f"✓ {nombre}: idéntico a transformar en las {len(df):,} filas")
+
+    print("=" * 80)
+    return 1 if errores else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
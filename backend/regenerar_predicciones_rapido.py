@@ -1,110 +1,78 @@
 """
 Script RÁPIDO para SOLO regenerar las predicciones ML (sin entrenar modelo)
-Usa el modelo YA entrenado
+Usa el modelo YA entrenado. Recorre el dataset particionado por bloques de
+filas (solo las columnas que usa el modelo), los predice en un pool de
+procesos que comparten el modelo mapeado y guarda las predicciones en la
+tabla predicciones_ml.parquet (el dataset no se reescribe).
+
+    python regenerar_predicciones_rapido.py
+    python regenerar_predicciones_rapido.py --filas-por-bloque 20000 --procesos 4
 """
+import argparse
 import os
-import pandas as pd
-import numpy as np
-import joblib
-from datetime import datetime
-import shutil
+
+from scripts.ml.puntuacion_masiva import puntuar_dataset, FILAS_POR_BLOQUE, TOLERANCIA_PORCENTAJE
+from scripts.ml.tabla_predicciones import guardar_predicciones, version_modelo
 
 # Rutas
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-DATA_PATH = os.path.join(BASE_DIR, "..", "datos", "procesados", "fifa_limpio.csv")
+DATA_PATH = os.path.join(BASE_DIR, "..", "datos", "procesados", "fifa_limpio")
 MODEL_DIR = os.path.join(BASE_DIR, "..", "datos", "modelos")
-
-print("\n" + "=" * 80)
-print("REGENERAR PREDICCIONES ML (SIN ENTRENAR)")
-print("=" * 80)
-
-# 1. Cargar modelo, encoder, club_encoding
-print("\n[1/4] CARGANDO MODELOS")
-modelo = joblib.load(os.path.join(MODEL_DIR, 'modelo_fifa.joblib'), mmap_mode='r')
-encoder = joblib.load(os.path.join(MODEL_DIR, 'encoder_fifa.joblib'))
-club_encoding = joblib.load(os.path.join(MODEL_DIR, 'club_encoding_fifa.joblib'))
-print(f"✓ Modelos cargados")
-
-# 2. Cargar dataset
-print("\n[2/4] CARGANDO DATASET")
-df = pd.read_csv(DATA_PATH, low_memory=False)
-print(f"✓ Dataset: {df.shape[0]:,} × {df.shape[1]} columnas")
-
-# 3. Preparar features
-print("\n[3/4] GENERANDO PREDICCIONES")
-
-feature_cols_numeric = [
-    "reputacion_internacional", "valoracion_global", "potencial", "movimiento_reacciones",
-    "calidad_promedio", "pase", "mentalidad_compostura", "regate_gambeta",
-    "mentalidad_vision", "tiro_disparo", "ataque_pase_corto",
-    "ataque_definicion", "ataque_cabezazo", "ataque_centros", "ataque_voleas",
-    "movimiento_velocidad_sprint", "movimiento_aceleracion", "movimiento_agilidad",
-    "movimiento_equilibrio", "fisico",
-    "defensa", "defensa_entrada_pie", "defensa_entrada_deslizante", "defensa_marcaje",
-    "mentalidad_agresividad", "mentalidad_intercepciones", "mentalidad_posicionamiento",
-    "mentalidad_penales", "pie_debil", "habilidades_regate", "habilidad_regate",
-    "habilidad_control_balon", "habilidad_efecto", "habilidad_pase_largo",
-    "habilidad_tiros_libres", "diferencia_potencial", "ratio_valor_salario",
-    "anos_contrato_restantes", "edad"
-]
-
-feature_cols_categorical = [
-    "categoria_posicion", "categoria_edad", "pie_preferido", "categoria_reputacion", "liga"
-]
-
-# Target encoding para club
-df['club_encoded'] = df['club'].map(club_encoding).fillna(0)
-
-# Features numéricas + club_encoded
-X_numeric = df[feature_cols_numeric + ['club_encoded']].values
-
-# Features categóricas (sin club)
-cats_sin_club = [c for c in feature_cols_categorical if c != 'club']
-X_categorical = df[cats_sin_club]
-
-# OneHot encoding
-X_cat_encoded = encoder.transform(X_categorical)
-if hasattr(X_cat_encoded, 'toarray'):
-    X_cat_encoded = X_cat_encoded.toarray()
-
-# Concatenar
-X_final = np.hstack([X_numeric, X_cat_encoded])
-
-# PREDECIR
-predicciones_log = modelo.predict(X_final)
-predicciones_eur = np.expm1(predicciones_log)
-
-# Calcular diferencias y clasificar
-# LÓGICA CORRECTA: diferencia negativa = INFRAVALORADO
-tolerancia = 8.0
-df['valor_predicho_eur'] = predicciones_eur
-df['diferencia_porcentual'] = (
-    (df['valor_mercado_eur'] - df['valor_predicho_eur']) / 
-    df['valor_predicho_eur'] * 100
-)
-df['tolerancia_porcentaje'] = tolerancia
-
-def clasificar(dif):
-    if dif < -tolerancia:
-        return "INFRAVALORADO"
-    elif dif > tolerancia:
-        return "SOBREVALORADO"
-    else:
-        return "JUSTO"
-
-df['clasificacion_ml'] = df['diferencia_porcentual'].apply(clasificar)
-
-print(f"✓ Clasificación ML aplicada")
-print(f"   💎 INFRAVALORADOS: {(df['clasificacion_ml'] == 'INFRAVALORADO').sum():,}")
-print(f"   ⚠️  SOBREVALORADOS: {(df['clasificacion_ml'] == 'SOBREVALORADO').sum():,}")
-print(f"   ✓  JUSTOS:         {(df['clasificacion_ml'] == 'JUSTO').sum():,}")
-
-# 4. Guardar
-print("\n[4/4] GUARDANDO")
-timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-backup_path = DATA_PATH.replace('.csv', f'_backup_{timestamp}.csv')
-shutil.copy2(DATA_PATH, backup_path)
-df.to_csv(DATA_PATH, index=False)
-print(f"💾 Backup: {os.path.basename(backup_path)}")
-print(f"✅ CSV actualizado: {DATA_PATH}")
-print("=" * 80 + "\n")
+MODEL_PATH = os.path.join(MODEL_DIR, 'modelo_fifa.joblib')
+ENCODER_PATH = os.path.join(MODEL_DIR, 'encoder_fifa.joblib')
+CLUB_ENCODING_PATH = os.path.join(MODEL_DIR, 'club_encoding_fifa.joblib')
+PLAN_PATH = os.path.join(MODEL_DIR, 'plan_caracteristicas_fifa.joblib')
+PREDICCIONES_PATH = os.path.join(BASE_DIR, "..", "datos", "procesados", "predicciones_ml.parquet")
+
+
+def main(filas_por_bloque=FILAS_POR_BLOQUE, procesos=None, tolerancia=TOLERANCIA_PORCENTAJE):
+    print("\n" + "=" * 80)
+    print("REGENERAR PREDICCIONES ML (SIN ENTRENAR)")
+    print("=" * 80)
+
+    # 1. Versión de los artefactos con los que se va a predecir
+    print("\n[1/3] VERSIÓN DEL MODELO")
+    if not os.path.exists(PLAN_PATH):
+        print(f"❌ No existe {PLAN_PATH}")
+        print("💡 Modelo entrenado antes del plan: python scripts/ml/plan_caracteristicas.py")
+        return
+    version = version_modelo(MODEL_PATH, ENCODER_PATH, CLUB_ENCODING_PATH, PLAN_PATH)
+    print(f"✓ Modelo {version}")
+
+    # 2. Predecir por bloques (cada proceso carga el modelo con mmap y el plan)
+    print("\n[2/3] GENERANDO PREDICCIONES POR BLOQUES")
+    predicciones = puntuar_dataset(
+        DATA_PATH, MODEL_PATH, PLAN_PATH,
+        filas_por_bloque=filas_por_bloque, procesos=procesos, tolerancia=tolerancia
+    )
+
+    clasificacion = predicciones['clasificacion_ml']
+    print(f"✓ Clasificación ML aplicada")
+    print(f"   💎 INFRAVALORADOS: {(clasificacion == 'INFRAVALORADO').sum():,}")
+    print(f"   ⚠️  SOBREVALORADOS: {(clasificacion == 'SOBREVALORADO').sum():,}")
+    print(f"   ✓  JUSTOS:         {(clasificacion == 'JUSTO').sum():,}")
+
+    # 3. Guardar
+    print("\n[3/3] GUARDANDO")
+    tamaño_mb = guardar_predicciones(predicciones, PREDICCIONES_PATH, version)
+    print(f"💾 Versión del modelo: {version}")
+    print(f"✅ Predicciones guardadas: {PREDICCIONES_PATH} ({tamaño_mb:.2f} MB)")
+    print("=" * 80 + "\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Regenerar la tabla de predicciones ML sin entrenar")
+    parser.add_argument(
+        "--filas-por-bloque", type=int, default=FILAS_POR_BLOQUE,
+        help=f"Filas de cada bloque a predecir (default: {FILAS_POR_BLOQUE:,})"
+    )
+    parser.add_argument(
+        "--procesos", type=int, default=None,
+        help="Procesos del pool (default: núcleos de la máquina; 1 = sin pool)"
+    )
+    parser.add_argument(
+        "--tolerancia", type=float, default=TOLERANCIA_PORCENTAJE,
+        help=f"Porcentaje de tolerancia para clasificar (default: {TOLERANCIA_PORCENTAJE})"
+    )
+    args = parser.parse_args()
+    main(filas_por_bloque=args.filas_por_bloque, procesos=args.procesos, tolerancia=args.tolerancia)
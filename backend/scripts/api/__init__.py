@@ -0,0 +1 @@
+# Paquete de scripts de soporte para la API REST
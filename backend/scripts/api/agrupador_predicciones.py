@@ -0,0 +1,174 @@
+"""
+Módulo de Agrupador de Predicciones (micro-batching)
+Sistema de Scouting FIFA
+
+Las peticiones concurrentes de /ml/predecir_valor y /jugadores/{id}/perfil
+predicen una sola fila cada una y pagan por separado el costo fijo de
+recorrer el bosque completo. El agrupador junta las filas que llegan dentro
+de una ventana de pocos milisegundos (o hasta completar un lote máximo),
+ejecuta UNA predicción por lote en un hilo de trabajo y reparte cada
+resultado a la petición que lo pidió.
+
+El rendimiento bajo carga concurrente escala con el tamaño de lote en lugar
+de con el número de peticiones.
+
+Cada fila puede traer su propia función de predicción (la del snapshot de
+servicio con que empezó la petición): las filas de funciones distintas
+nunca se mezclan en un mismo lote.
+"""
+
+import asyncio
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+
+class AgrupadorPredicciones:
+    """
+    Acumula filas de features y las predice en lote.
+
+    Args:
+        funcion_prediccion: callable por defecto que recibe una matriz
+            (n × features) y devuelve un array de n predicciones
+        ventana_ms: tiempo máximo que una fila espera a que se forme el lote
+        max_lote: tamaño de lote que dispara la predicción sin esperar la ventana
+        historial_metricas: cantidad de lotes recientes usados para las métricas
+    """
+
+    def __init__(self, funcion_prediccion, ventana_ms=2.0, max_lote=64, historial_metricas=1000):
+        self.funcion_prediccion = funcion_prediccion
+        self.ventana_ms = float(ventana_ms)
+        self.max_lote = max(1, int(max_lote))
+
+        # Un solo hilo: los lotes se ejecutan en serie y mientras uno corre
+        # el siguiente se va llenando
+        self._ejecutor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="agrupador")
+        self._pendientes = []
+        self._temporizador = None
+        # Lotes en curso: el event loop solo guarda referencias débiles a
+        # las tareas, sin esta referencia un lote podría recolectarse
+        self._tareas = set()
+
+        # Métricas
+        self.lotes_ejecutados = 0
+        self.filas_procesadas = 0
+        self.tamaño_lote_max = 0
+        self._tamaños_recientes = deque(maxlen=historial_metricas)
+        self._esperas_recientes_ms = deque(maxlen=historial_metricas)
+
+    async def predecir(self, fila, funcion_prediccion=None):
+        """
+        Encola una fila (vector 1D de features) y espera su predicción.
+
+        Args:
+            fila: vector de features
+            funcion_prediccion: función a usar para esta fila (por defecto
+                la del agrupador)
+
+        Returns:
+            float con la predicción de esa fila
+        """
+        loop = asyncio.get_running_loop()
+        futuro = loop.create_future()
+        funcion = funcion_prediccion or self.funcion_prediccion
+        self._pendientes.append((np.asarray(fila).ravel(), futuro, time.perf_counter(), funcion))
+
+        if len(self._pendientes) >= self.max_lote:
+            self._despachar()
+        elif self._temporizador is None:
+            self._temporizador = loop.call_later(self.ventana_ms / 1000, self._despachar)
+
+        return await futuro
+
+    def _despachar(self):
+        """Saca las filas pendientes y lanza su predicción en el hilo de trabajo."""
+        if self._temporizador is not None:
+            self._temporizador.cancel()
+            self._temporizador = None
+        if not self._pendientes:
+            return
+
+        pendientes, self._pendientes = self._pendientes, []
+
+        # Un lote por función de predicción (normalmente una sola; dos durante
+        # una recarga de snapshot)
+        lotes = {}
+        for pendiente in pendientes:
+            lotes.setdefault(pendiente[3], []).append(pendiente)
+        loop = asyncio.get_running_loop()
+        for funcion, lote in lotes.items():
+            tarea = loop.create_task(self._ejecutar_lote(funcion, lote))
+            self._tareas.add(tarea)
+            tarea.add_done_callback(self._tareas.discard)
+
+    async def _ejecutar_lote(self, funcion_prediccion, lote):
+        filas, futuros, encolados, _ = zip(*lote)
+
+        def ejecutar(X):
+            # El lote empieza cuando el hilo de trabajo lo toma: el tiempo
+            # detrás del lote anterior cuenta como espera en cola
+            return time.perf_counter(), funcion_prediccion(X)
+
+        try:
+            X = np.vstack(filas)
+            inicio, predicciones = await asyncio.get_running_loop().run_in_executor(
+                self._ejecutor, ejecutar, X
+            )
+        except Exception as e:
+            for futuro in futuros:
+                if not futuro.done():
+                    futuro.set_exception(e)
+            return
+
+        self.lotes_ejecutados += 1
+        self.filas_procesadas += len(lote)
+        self.tamaño_lote_max = max(self.tamaño_lote_max, len(lote))
+        self._tamaños_recientes.append(len(lote))
+        self._esperas_recientes_ms.extend((inicio - encolado) * 1000 for encolado in encolados)
+
+        for futuro, prediccion in zip(futuros, predicciones):
+            # La petición pudo cancelarse (cliente desconectado) mientras esperaba
+            if not futuro.done():
+                futuro.set_result(float(prediccion))
+
+    def metricas(self):
+        """
+        Resumen de tamaños de lote y espera en cola (sobre los lotes recientes).
+        Llamar desde el hilo del event loop: es el que actualiza las métricas.
+        """
+        tamaños = np.array(self._tamaños_recientes, dtype=np.float64)
+        esperas = np.array(self._esperas_recientes_ms, dtype=np.float64)
+
+        # Histograma de tamaños de lote en potencias de 2: "1", "2-3", "4-7", ...
+        conteos = {}
+        for tamaño in self._tamaños_recientes:
+            inferior = 1 << (int(tamaño).bit_length() - 1)
+            conteos[inferior] = conteos.get(inferior, 0) + 1
+        histograma = {
+            (str(inferior) if inferior == 1 else f"{inferior}-{inferior * 2 - 1}"): conteos[inferior]
+            for inferior in sorted(conteos)
+        }
+
+        return {
+            "configuracion": {
+                "ventana_ms": self.ventana_ms,
+                "max_lote": self.max_lote
+            },
+            "lotes_ejecutados": self.lotes_ejecutados,
+            "filas_procesadas": self.filas_procesadas,
+            "filas_pendientes": len(self._pendientes),
+            "tamaño_lote": {
+                "promedio": float(tamaños.mean()) if len(tamaños) else 0.0,
+                "p50": float(np.percentile(tamaños, 50)) if len(tamaños) else 0.0,
+                "max": self.tamaño_lote_max,
+                "histograma": histograma
+            },
+            "espera_cola_ms": {
+                "promedio": float(esperas.mean()) if len(esperas) else 0.0,
+                "p50": float(np.percentile(esperas, 50)) if len(esperas) else 0.0,
+                "p99": float(np.percentile(esperas, 99)) if len(esperas) else 0.0,
+                "max": float(esperas.max()) if len(esperas) else 0.0
+            }
+        }
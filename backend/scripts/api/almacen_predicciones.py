@@ -0,0 +1,64 @@
+"""
+Módulo de Almacén de Predicciones
+Sistema de Scouting FIFA
+
+Mantiene en memoria el valor predicho de TODOS los jugadores (columna
+valor_predicho_eur precalculada por regenerar_predicciones_rapido.py /
+generar_predicciones_ml.py) junto con un orden precalculado por diferencia
+porcentual, de modo que los endpoints de infravalorados y sobrevalorados
+sean un corte sobre un array ya ordenado en lugar de re-ejecutar el modelo.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+class AlmacenPredicciones:
+    """
+    Predicciones y diferencias porcentuales por fila, con orden ascendente
+    por diferencia. Convención de los endpoints:
+
+        diferencia_porcentual = (valor_predicho - valor_real) / valor_real * 100
+
+    Positiva → infravalorado, negativa → sobrevalorado. Solo se ordenan los
+    jugadores con valor de mercado > 0 (evita división por cero).
+    """
+
+    def __init__(self, valor_mercado, valor_predicho):
+        valor_real = pd.to_numeric(pd.Series(valor_mercado), errors="coerce").to_numpy(dtype="float64")
+        self.valor_predicho = pd.to_numeric(pd.Series(valor_predicho), errors="coerce").to_numpy(dtype="float64")
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            diferencia = (self.valor_predicho - valor_real) / valor_real * 100
+        # Reemplazar valores infinitos o NaN con 0
+        diferencia[~np.isfinite(diferencia)] = 0.0
+        self.diferencia_porcentual = diferencia
+
+        filas_validas = np.flatnonzero(valor_real > 0)
+        orden = np.argsort(diferencia[filas_validas], kind="stable")
+        self.orden = filas_validas[orden]
+        self.diferencia_ordenada = diferencia[self.orden]
+
+    def infravalorados(self, diferencia_minima, mascara=None):
+        """
+        Filas con diferencia >= diferencia_minima, de mayor a menor diferencia.
+
+        Args:
+            diferencia_minima: umbral porcentual
+            mascara: array booleano por fila con filtros adicionales (opcional)
+        """
+        inicio = np.searchsorted(self.diferencia_ordenada, diferencia_minima, side="left")
+        filas = self.orden[inicio:][::-1]
+        return filas if mascara is None else filas[mascara[filas]]
+
+    def sobrevalorados(self, diferencia_minima, mascara=None):
+        """
+        Filas con diferencia <= -diferencia_minima, de más negativa a menos.
+
+        Args:
+            diferencia_minima: umbral porcentual (positivo)
+            mascara: array booleano por fila con filtros adicionales (opcional)
+        """
+        fin = np.searchsorted(self.diferencia_ordenada, -diferencia_minima, side="right")
+        filas = self.orden[:fin]
+        return filas if mascara is None else filas[mascara[filas]]
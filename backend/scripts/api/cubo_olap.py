@@ -0,0 +1,228 @@
+"""
+Módulo de Cubo OLAP
+Sistema de Scouting FIFA
+
+Agregados materializados UNA vez al cargar el dataset para los endpoints
+de EDA. Cada celda del cubo es una combinación de dimensiones (por defecto
+año_datos × liga × club × categoria_posicion × categoria_edad) y guarda,
+por cada medida: conteo, suma, mínimo, máximo, mediana y la fila del
+máximo. Cualquier consulta (total, por club, por liga, con filtros de año,
+liga o posición) es un roll-up de esas celdas en lugar de un groupby
+sobre todo el DataFrame.
+
+Las medianas no se pueden combinar a partir de medianas de celdas: para
+ellas se guardan los valores agrupados por celda (estilo CSR) y la mediana
+de un roll-up se calcula exacta sobre los valores de sus celdas.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+# Dimensiones y medidas del cubo principal de EDA
+DIMENSIONES_CUBO = ["año_datos", "liga", "club", "categoria_posicion", "categoria_edad"]
+MEDIDAS_CUBO = ["valor_mercado_eur", "valoracion_global", "edad"]
+
+# Cubo auxiliar por nacionalidad (como dimensión del cubo principal lo haría
+# casi tan grande como el dataset)
+DIMENSIONES_CUBO_NACIONALIDAD = ["año_datos", "liga", "categoria_posicion", "nacionalidad"]
+MEDIDAS_CUBO_NACIONALIDAD = ["valor_mercado_eur"]
+
+
+class CuboOLAP:
+    """
+    Cubo de agregados por combinación de dimensiones.
+
+    Columnas de `celdas` (una fila por celda no vacía):
+        <dimensiones>, filas,
+        <medida>_conteo, <medida>_suma, <medida>_min, <medida>_max,
+        <medida>_mediana, <medida>_fila_max
+
+    Args:
+        df: DataFrame de jugadores
+        dimensiones: columnas que definen las celdas (las ausentes se omiten)
+        medidas: columnas numéricas a agregar (las ausentes se omiten)
+    """
+
+    def __init__(self, df, dimensiones=DIMENSIONES_CUBO, medidas=MEDIDAS_CUBO):
+        self.dimensiones = [dim for dim in dimensiones if dim in df.columns]
+        self.medidas = [medida for medida in medidas if medida in df.columns]
+
+        # Celda de cada fila (los nulos de las dimensiones forman su propia celda)
+        celda_fila = df.groupby(self.dimensiones, dropna=False, observed=True, sort=False).ngroup().to_numpy()
+        total_celdas = int(celda_fila.max()) + 1 if len(celda_fila) else 0
+        primera_fila = np.full(total_celdas, len(df), dtype=np.int64)
+        np.minimum.at(primera_fila, celda_fila, np.arange(len(df)))
+
+        celdas = df.iloc[primera_fila][self.dimensiones].reset_index(drop=True)
+        celdas["filas"] = np.bincount(celda_fila, minlength=total_celdas)
+
+        self._valores = {}
+        for medida in self.medidas:
+            valores = pd.to_numeric(df[medida], errors="coerce").to_numpy(dtype="float64")
+            validos = ~np.isnan(valores)
+            celdas_validas = celda_fila[validos]
+            valores_validos = valores[validos]
+            filas_validas = np.flatnonzero(validos)
+
+            # Valores ordenados por (celda, valor): cada celda es un rango contiguo
+            orden = np.lexsort((valores_validos, celdas_validas))
+            valores_ordenados = valores_validos[orden]
+            conteo = np.bincount(celdas_validas, minlength=total_celdas)
+            desplazamientos = np.concatenate([[0], np.cumsum(conteo)])
+            self._valores[medida] = (valores_ordenados, desplazamientos)
+
+            suma = np.bincount(celdas_validas, weights=valores_validos, minlength=total_celdas)
+            con_datos = conteo > 0
+            minimo = np.full(total_celdas, np.nan)
+            maximo = np.full(total_celdas, np.nan)
+            minimo[con_datos] = valores_ordenados[desplazamientos[:-1][con_datos]]
+            maximo[con_datos] = valores_ordenados[desplazamientos[1:][con_datos] - 1]
+
+            # Fila del máximo: la primera en el dataset entre las que empatan
+            fila_max = np.full(total_celdas, -1, dtype=np.int64)
+            es_max = valores_validos == maximo[celdas_validas]
+            candidatas = np.full(total_celdas, len(df), dtype=np.int64)
+            np.minimum.at(candidatas, celdas_validas[es_max], filas_validas[es_max])
+            fila_max[con_datos] = candidatas[con_datos]
+
+            # Mediana de cada celda: sus valores ya están ordenados
+            mediana = np.full(total_celdas, np.nan)
+            inicio = desplazamientos[:-1][con_datos]
+            n = conteo[con_datos]
+            mediana[con_datos] = (
+                valores_ordenados[inicio + (n - 1) // 2] + valores_ordenados[inicio + n // 2]
+            ) / 2
+
+            celdas[f"{medida}_conteo"] = conteo
+            celdas[f"{medida}_suma"] = suma
+            celdas[f"{medida}_min"] = minimo
+            celdas[f"{medida}_max"] = maximo
+            celdas[f"{medida}_mediana"] = mediana
+            celdas[f"{medida}_fila_max"] = fila_max
+
+        self.celdas = celdas
+
+        # Códigos enteros por dimensión (valores ordenados; nulo = -1) para roll-ups con bincount
+        self._codigos = {}
+        for dim in self.dimensiones:
+            codigos, categorias = pd.factorize(celdas[dim], sort=True)
+            self._codigos[dim] = (codigos, categorias)
+
+    def _seleccionar(self, filtros):
+        """Máscara booleana de las celdas que cumplen los filtros {dimensión: valor o lista}."""
+        mascara = np.ones(len(self.celdas), dtype=bool)
+        for dim, valor in (filtros or {}).items():
+            if valor is None:
+                continue
+            if dim not in self.dimensiones:
+                raise ValueError(f"Dimensión no disponible en el cubo: {dim}")
+            valores = valor if isinstance(valor, (list, tuple, set)) else [valor]
+            mascara &= self.celdas[dim].isin(valores).to_numpy()
+        return mascara
+
+    def _medianas(self, medida, grupo_celda, total_grupos):
+        """
+        Mediana exacta por grupo a partir de los valores de sus celdas.
+        grupo_celda: grupo de cada celda (-1 = celda no seleccionada).
+        """
+        valores_ordenados, desplazamientos = self._valores[medida]
+        grupo_valor = np.repeat(grupo_celda, np.diff(desplazamientos))
+        seleccionados = grupo_valor >= 0
+        valores = valores_ordenados[seleccionados]
+        grupos = grupo_valor[seleccionados]
+
+        if total_grupos == 1:
+            resultado = np.full(1, np.nan)
+            if len(valores):
+                resultado[0] = np.median(valores)
+            return resultado
+
+        orden = np.lexsort((valores, grupos))
+        valores = valores[orden]
+        conteo = np.bincount(grupos, minlength=total_grupos)
+        inicio = np.concatenate([[0], np.cumsum(conteo)[:-1]])
+        resultado = np.full(total_grupos, np.nan)
+        con_datos = conteo > 0
+        n = conteo[con_datos]
+        resultado[con_datos] = (
+            valores[inicio[con_datos] + (n - 1) // 2] + valores[inicio[con_datos] + n // 2]
+        ) / 2
+        return resultado
+
+    def agregar(self, por=None, filtros=None, medianas=False):
+        """
+        Roll-up del cubo.
+
+        Args:
+            por: dimensión de agrupación (None = un solo total)
+            filtros: dict {dimensión: valor o lista de valores}
+            medianas: si True calcula las medianas exactas (más costoso)
+
+        Returns:
+            DataFrame con filas, <medida>_conteo, _suma, _promedio, _min, _max
+            (y _mediana). Indexado por los valores de `por` ordenados, o de una
+            fila si por es None. Igual que groupby: se excluyen los valores
+            nulos de `por` y los grupos sin filas en la selección.
+        """
+        seleccion = self._seleccionar(filtros)
+
+        if por is None:
+            grupo_celda = np.where(seleccion, 0, -1)
+            total_grupos = 1
+            indice = None
+        else:
+            codigos, categorias = self._codigos[por]
+            grupo_celda = np.where(seleccion, codigos, -1)
+            total_grupos = len(categorias)
+            indice = pd.Index(categorias, name=por)
+
+        celdas_sel = grupo_celda >= 0
+        grupos = grupo_celda[celdas_sel]
+
+        resultado = {"filas": np.bincount(grupos, weights=self.celdas["filas"].to_numpy()[celdas_sel],
+                                          minlength=total_grupos).astype(np.int64)}
+        for medida in self.medidas:
+            conteo = np.bincount(grupos, weights=self.celdas[f"{medida}_conteo"].to_numpy()[celdas_sel],
+                                 minlength=total_grupos).astype(np.int64)
+            suma = np.bincount(grupos, weights=self.celdas[f"{medida}_suma"].to_numpy()[celdas_sel],
+                               minlength=total_grupos)
+            minimo = np.full(total_grupos, np.inf)
+            maximo = np.full(total_grupos, -np.inf)
+            np.fmin.at(minimo, grupos, self.celdas[f"{medida}_min"].to_numpy()[celdas_sel])
+            np.fmax.at(maximo, grupos, self.celdas[f"{medida}_max"].to_numpy()[celdas_sel])
+            sin_datos = conteo == 0
+            minimo[sin_datos] = np.nan
+            maximo[sin_datos] = np.nan
+
+            resultado[f"{medida}_conteo"] = conteo
+            resultado[f"{medida}_suma"] = suma
+            with np.errstate(invalid="ignore", divide="ignore"):
+                resultado[f"{medida}_promedio"] = np.where(sin_datos, np.nan, suma / np.maximum(conteo, 1))
+            resultado[f"{medida}_min"] = minimo
+            resultado[f"{medida}_max"] = maximo
+            if medianas:
+                resultado[f"{medida}_mediana"] = self._medianas(medida, grupo_celda, total_grupos)
+
+        resultado = pd.DataFrame(resultado, index=indice)
+        if por is not None:
+            resultado = resultado[resultado["filas"] > 0]
+        return resultado
+
+    def valores_distintos(self, dimension, filtros=None):
+        """Cantidad de valores no nulos distintos de una dimensión en la selección."""
+        codigos, _ = self._codigos[dimension]
+        codigos = codigos[self._seleccionar(filtros)]
+        return int(len(np.unique(codigos[codigos >= 0])))
+
+    def fila_maximo(self, medida, filtros=None):
+        """
+        Posición de fila (para iloc) con el máximo de la medida en la selección;
+        la primera del dataset si hay empates. None si no hay datos.
+        """
+        seleccion = self._seleccionar(filtros) & (self.celdas[f"{medida}_conteo"].to_numpy() > 0)
+        if not seleccion.any():
+            return None
+        maximos = self.celdas[f"{medida}_max"].to_numpy()[seleccion]
+        filas = self.celdas[f"{medida}_fila_max"].to_numpy()[seleccion]
+        return int(filas[maximos == maximos.max()].min())
@@ -0,0 +1,89 @@
+"""
+Módulo de Índice de Distribución
+Sistema de Scouting FIFA
+
+Arrays ordenados de valor_mercado_eur, construidos UNA vez al cargar el
+dataset, para responder percentiles con una búsqueda binaria (searchsorted)
+en lugar de comparar contra todos los jugadores en cada petición.
+
+Además del global se guarda un array por cohorte: por año_datos, por
+categoria_posicion y por la combinación (año_datos, categoria_posicion),
+de modo que el percentil dentro de la cohorte del jugador cuesta lo mismo.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+COLUMNA_AÑO = "año_datos"
+COLUMNA_POSICION = "categoria_posicion"
+
+
+def _ordenar_valores(valores):
+    valores = pd.to_numeric(pd.Series(valores), errors="coerce").to_numpy(dtype="float64")
+    return np.sort(valores[~np.isnan(valores)])
+
+
+def _ordenar_por_grupo(df, columna_valor, columnas_grupo):
+    if not all(col in df.columns for col in columnas_grupo):
+        return {}
+    grupos = df.groupby(columnas_grupo if len(columnas_grupo) > 1 else columnas_grupo[0],
+                        observed=True, sort=False)[columna_valor]
+    return {clave: _ordenar_valores(serie) for clave, serie in grupos}
+
+
+class IndiceDistribucion:
+    """
+    Distribución ordenada de una columna de valor, global y por cohortes.
+
+    percentil(v) = % de jugadores de la cohorte con valor estrictamente menor
+    que v (mismo criterio que (valores < v).sum() / len(valores) * 100).
+    Los valores nulos no forman parte de la distribución.
+
+    Args:
+        df: DataFrame de jugadores
+        columna_valor: columna numérica a indexar (por defecto valor_mercado_eur)
+    """
+
+    def __init__(self, df, columna_valor="valor_mercado_eur"):
+        self.columna_valor = columna_valor
+        self.global_ordenado = _ordenar_valores(df[columna_valor])
+        self.por_año = _ordenar_por_grupo(df, columna_valor, [COLUMNA_AÑO])
+        self.por_posicion = _ordenar_por_grupo(df, columna_valor, [COLUMNA_POSICION])
+        self.por_año_posicion = _ordenar_por_grupo(df, columna_valor, [COLUMNA_AÑO, COLUMNA_POSICION])
+
+    @staticmethod
+    def _percentiles(valores_ordenados, valores):
+        if valores_ordenados is None or len(valores_ordenados) == 0:
+            return None
+        posiciones = np.searchsorted(valores_ordenados, valores, side="left")
+        return (posiciones / len(valores_ordenados) * 100).astype(int)
+
+    def distribucion_cohorte(self, año=None, categoria_posicion=None):
+        """
+        Array ordenado de la cohorte más específica disponible:
+        (año, posición), solo año, solo posición. None si no hay cohorte.
+        """
+        if año is not None and categoria_posicion is not None:
+            return self.por_año_posicion.get((año, categoria_posicion))
+        if año is not None:
+            return self.por_año.get(año)
+        if categoria_posicion is not None:
+            return self.por_posicion.get(categoria_posicion)
+        return None
+
+    def percentil(self, valor):
+        """Percentil global (0-100) de un valor."""
+        return int(self._percentiles(self.global_ordenado, valor))
+
+    def percentiles(self, valores):
+        """Percentiles globales de un array de valores (vectorizado)."""
+        return self._percentiles(self.global_ordenado, np.asarray(valores, dtype="float64"))
+
+    def percentil_cohorte(self, valor, año=None, categoria_posicion=None):
+        """
+        Percentil (0-100) dentro de la cohorte de año y/o posición.
+        Retorna None si no se indica cohorte o no existe en el dataset.
+        """
+        resultado = self._percentiles(self.distribucion_cohorte(año, categoria_posicion), valor)
+        return None if resultado is None else int(resultado)
@@ -0,0 +1,325 @@
+"""
+Módulo de Índices de Búsqueda
+Sistema de Scouting FIFA
+
+Índices invertidos que se construyen UNA sola vez al cargar el dataset y
+permiten resolver los filtros de /jugadores/buscar sin copiar ni recorrer
+el DataFrame completo en cada petición:
+
+- Columnas categóricas: un bitset empaquetado (np.packbits) por cada valor
+  distinto. Un filtro con varios valores se resuelve con OR de sus bitsets
+  y varios filtros se combinan con AND.
+- Columnas numéricas de rango: permutación ordenada de la columna, de modo
+  que un rango [min, max] se resuelve con dos búsquedas binarias.
+- Nombres: índice de trigramas sobre los nombres ya normalizados (sin tildes,
+  minúsculas) que reduce la búsqueda parcial a unos pocos candidatos.
+"""
+
+import unicodedata
+import numpy as np
+import pandas as pd
+
+
+# Columnas filtrables por igualdad / pertenencia (isin)
+COLUMNAS_CATEGORICAS_INDICE = [
+    "posiciones_jugador",
+    "nacionalidad",
+    "club",
+    "liga",
+    "categoria_edad",
+    "categoria_posicion",
+    "categoria_reputacion",
+    "pie_preferido",
+    "clasificacion_ml",
+    "año_datos"
+]
+
+# Columnas filtrables por rango (mínimo / máximo)
+COLUMNAS_RANGO_INDICE = [
+    "edad",
+    "valoracion_global",
+    "potencial",
+    "valor_mercado_eur"
+]
+
+
+def normalizar_texto(texto):
+    """
+    Normaliza texto para búsqueda flexible:
+    - Convierte a minúsculas
+    - Elimina tildes y acentos
+    - Útil para búsqueda insensible a mayúsculas y acentos
+    """
+    if pd.isna(texto) or texto is None:
+        return ""
+    texto = str(texto).lower()
+    # Eliminar tildes usando unicodedata
+    texto = ''.join(
+        c for c in unicodedata.normalize('NFD', texto)
+        if unicodedata.category(c) != 'Mn'
+    )
+    return texto
+
+
+def normalizar_columna(serie):
+    """
+    Aplica normalizar_texto una sola vez por valor distinto de la columna
+    (los nombres se repiten entre años FIFA) y devuelve un array por fila.
+    """
+    codigos, valores_unicos = pd.factorize(serie)
+    # El código -1 (nulo) apunta al último elemento: cadena vacía
+    normalizados = np.array([normalizar_texto(v) for v in valores_unicos] + [""], dtype=object)
+    return normalizados[codigos]
+
+
+def construir_bitsets_columna(serie):
+    """
+    Construye un bitset empaquetado por cada valor distinto de una columna.
+    Los nulos no se indexan (igual que isin, nunca coinciden con un filtro).
+
+    Args:
+        serie: Serie de pandas (object, category o numérica)
+
+    Returns:
+        dict {valor: np.ndarray uint8 de ceil(n/8) bytes}
+    """
+    total_filas = len(serie)
+    codigos, valores_unicos = pd.factorize(serie)
+
+    # Agrupar filas por código con un único argsort (evita un escaneo por valor)
+    orden = np.argsort(codigos, kind="stable")
+    limites = np.searchsorted(codigos[orden], np.arange(len(valores_unicos) + 1))
+
+    mascara = np.zeros(total_filas, dtype=bool)
+    bitsets = {}
+    for codigo, valor in enumerate(valores_unicos.tolist()):
+        filas = orden[limites[codigo]:limites[codigo + 1]]
+        mascara[filas] = True
+        bitsets[valor] = np.packbits(mascara)
+        mascara[filas] = False
+
+    return bitsets
+
+
+class IndiceBusqueda:
+    """
+    Índice de bitsets y rangos ordenados sobre el DataFrame de jugadores.
+    Las posiciones devueltas son posiciones de fila (para usar con iloc).
+    """
+
+    def __init__(self, df):
+        self.total_filas = len(df)
+        self.bitsets = {}
+        self.rangos = {}
+
+        for col in COLUMNAS_CATEGORICAS_INDICE:
+            if col in df.columns:
+                self.bitsets[col] = construir_bitsets_columna(df[col])
+
+        for col in COLUMNAS_RANGO_INDICE:
+            if col in df.columns:
+                valores = pd.to_numeric(df[col], errors="coerce").to_numpy(dtype="float64")
+                orden = np.argsort(valores, kind="stable")
+                # argsort deja los NaN al final: solo se busca en la parte válida
+                total_validos = int(np.count_nonzero(~np.isnan(valores)))
+                self.rangos[col] = (valores[orden][:total_validos], orden[:total_validos])
+
+    def _bitset_desde_filas(self, filas):
+        mascara = np.zeros(self.total_filas, dtype=bool)
+        mascara[filas] = True
+        return np.packbits(mascara)
+
+    def bitset_filas(self, filas):
+        """
+        Bitset a partir de posiciones de fila (p. ej. el resultado de IndiceNombres).
+        Retorna None si filas es None (el filtro se ignora).
+        """
+        if filas is None:
+            return None
+        return self._bitset_desde_filas(filas)
+
+    def bitset_valores(self, columna, valores):
+        """
+        OR de los bitsets de los valores pedidos (equivalente a isin).
+        Retorna None si la columna no está indexada (el filtro se ignora).
+        """
+        bitsets_columna = self.bitsets.get(columna)
+        if bitsets_columna is None:
+            return None
+
+        resultado = np.zeros((self.total_filas + 7) // 8, dtype=np.uint8)
+        for valor in valores:
+            bitset = bitsets_columna.get(valor)
+            if bitset is not None:
+                np.bitwise_or(resultado, bitset, out=resultado)
+        return resultado
+
+    def bitset_rango(self, columna, minimo=None, maximo=None):
+        """
+        Bitset de las filas con minimo <= columna <= maximo (extremos opcionales).
+        Retorna None si la columna no está indexada (el filtro se ignora).
+        """
+        rango = self.rangos.get(columna)
+        if rango is None:
+            return None
+
+        valores_ordenados, orden = rango
+        inicio = 0 if minimo is None else np.searchsorted(valores_ordenados, minimo, side="left")
+        fin = len(valores_ordenados) if maximo is None else np.searchsorted(valores_ordenados, maximo, side="right")
+        return self._bitset_desde_filas(orden[inicio:fin])
+
+    def resolver(self, bitsets):
+        """
+        Combina con AND los bitsets de cada filtro y devuelve las posiciones
+        de fila que cumplen todos (orden ascendente).
+        Retorna None si no hay ningún filtro activo (todas las filas).
+        """
+        bitsets = [b for b in bitsets if b is not None]
+        if not bitsets:
+            return None
+
+        resultado = bitsets[0].copy()
+        for bitset in bitsets[1:]:
+            np.bitwise_and(resultado, bitset, out=resultado)
+
+        return np.flatnonzero(np.unpackbits(resultado, count=self.total_filas))
+
+    def mascara(self, bitsets):
+        """
+        Igual que resolver pero devuelve un array booleano por fila.
+        Retorna None si no hay ningún filtro activo.
+        """
+        filas = self.resolver(bitsets)
+        if filas is None:
+            return None
+        mascara = np.zeros(self.total_filas, dtype=bool)
+        mascara[filas] = True
+        return mascara
+
+
+class IndiceNombres:
+    """
+    Índice de trigramas sobre nombre_completo y nombre_corto normalizados.
+
+    Los nombres se normalizan una vez al cargar. Cada combinación distinta
+    (nombre completo, nombre corto) es un "documento"; los trigramas de la
+    consulta se intersectan para obtener documentos candidatos y luego se
+    verifica la subcadena de forma vectorizada solo sobre esos candidatos.
+    """
+
+    SEPARADOR = "\n"
+
+    def __init__(self, df):
+        completos = normalizar_columna(df["nombre_completo"])
+        cortos = normalizar_columna(df["nombre_corto"])
+        combinados = pd.Series(completos, dtype=object) + self.SEPARADOR + pd.Series(cortos, dtype=object)
+
+        # Documento de cada fila y texto de cada documento distinto
+        self.documento_fila, documentos = pd.factorize(combinados)
+        self.documentos = pd.Series(documentos, dtype=object)
+
+        postings = {}
+        for id_documento, texto in enumerate(self.documentos.tolist()):
+            for trigrama in {texto[i:i + 3] for i in range(len(texto) - 2)}:
+                postings.setdefault(trigrama, []).append(id_documento)
+
+        self.postings = {
+            trigrama: np.array(ids, dtype=np.int32)
+            for trigrama, ids in postings.items()
+        }
+
+    def _documentos_candidatos(self, consulta):
+        if len(consulta) < 3:
+            return np.arange(len(self.documentos))
+
+        listas = []
+        for trigrama in {consulta[i:i + 3] for i in range(len(consulta) - 2)}:
+            lista = self.postings.get(trigrama)
+            if lista is None:
+                return np.empty(0, dtype=np.int32)
+            listas.append(lista)
+
+        # Intersectar empezando por la lista más corta
+        listas.sort(key=len)
+        candidatos = listas[0]
+        for lista in listas[1:]:
+            candidatos = np.intersect1d(candidatos, lista, assume_unique=True)
+            if len(candidatos) == 0:
+                break
+        return candidatos
+
+    def filas(self, nombre):
+        """
+        Posiciones de fila cuyo nombre completo o corto contiene `nombre`
+        (parcial, sin tildes, sin distinguir mayúsculas). Orden ascendente.
+        """
+        consulta = normalizar_texto(nombre)
+        if self.SEPARADOR in consulta:
+            return np.empty(0, dtype=np.int64)
+
+        candidatos = self._documentos_candidatos(consulta)
+        coincide = self.documentos.iloc[candidatos].str.contains(consulta, regex=False).to_numpy(dtype=bool)
+
+        documentos_coincidentes = np.zeros(len(self.documentos), dtype=bool)
+        documentos_coincidentes[candidatos[coincide]] = True
+        return np.flatnonzero(documentos_coincidentes[self.documento_fila])
+
+
+class IndiceJugadores:
+    """
+    Índice id_sofifa -> rango contiguo de filas (estilo CSR).
+
+    Las posiciones de fila se ordenan por (id_sofifa, año_datos) y para cada
+    id se guarda el inicio y fin de su rango, de modo que el perfil o los
+    años de un jugador se obtienen sin recorrer el DataFrame.
+    """
+
+    def __init__(self, df):
+        ids = pd.to_numeric(df["id_sofifa"], errors="coerce").to_numpy(dtype="float64")
+        años = pd.to_numeric(df["año_datos"], errors="coerce").to_numpy(dtype="float64")
+
+        # lexsort es estable: a igual (id, año) se conserva el orden original
+        validas = np.flatnonzero(~np.isnan(ids))
+        orden = validas[np.lexsort((años[validas], ids[validas]))]
+        ids_ordenados = ids[orden]
+
+        ids_unicos, inicios = np.unique(ids_ordenados, return_index=True)
+        self.orden = orden
+        self.años_ordenados = años[orden]
+        self.desplazamientos = np.append(inicios, len(orden))
+        self.grupo_por_id = {int(id_jugador): grupo for grupo, id_jugador in enumerate(ids_unicos.tolist())}
+
+    def filas(self, id_sofifa):
+        """Posiciones de fila del jugador ordenadas por año (vacío si no existe)."""
+        grupo = self.grupo_por_id.get(id_sofifa)
+        if grupo is None:
+            return np.empty(0, dtype=np.int64)
+        return self.orden[self.desplazamientos[grupo]:self.desplazamientos[grupo + 1]]
+
+    def años(self, id_sofifa):
+        """Años FIFA (ordenados ascendentemente, sin repetir) del jugador."""
+        grupo = self.grupo_por_id.get(id_sofifa)
+        if grupo is None:
+            return []
+        años = self.años_ordenados[self.desplazamientos[grupo]:self.desplazamientos[grupo + 1]]
+        return [int(año) for año in np.unique(años[~np.isnan(años)])]
+
+    def fila(self, id_sofifa, año=None):
+        """
+        Posición de fila del jugador: la del año indicado o, sin año, la
+        primera que aparece en el dataset. Retorna None si no existe.
+        """
+        grupo = self.grupo_por_id.get(id_sofifa)
+        if grupo is None:
+            return None
+        inicio, fin = self.desplazamientos[grupo], self.desplazamientos[grupo + 1]
+
+        if año is None:
+            return int(self.orden[inicio:fin].min())
+
+        años = self.años_ordenados[inicio:fin]
+        desde = np.searchsorted(años, año, side="left")
+        hasta = np.searchsorted(años, año, side="right")
+        if desde == hasta:
+            return None
+        return int(self.orden[inicio + desde:inicio + hasta].min())
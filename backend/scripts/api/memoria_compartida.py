@@ -0,0 +1,284 @@
+"""
+Módulo de Memoria Compartida
+Sistema de Scouting FIFA
+
+Los arrays grandes del servicio (nodos del bosque compilado, columnas
+numéricas del dataset y predicciones del dataset completo) se guardan como
+archivos .npy y se mapean de solo lectura con np.load(mmap_mode='r'). Todos
+los procesos que los mapean comparten las mismas páginas del page cache del
+sistema operativo: con N workers esa memoria se paga una sola vez.
+
+Cada grupo de arrays vive en un subdirectorio cuyo nombre incluye la huella
+de los archivos de origen: un artefacto nuevo genera un directorio nuevo y
+los procesos que tienen mapeado el anterior no se ven afectados. La
+escritura es atómica (directorio temporal + rename); si varios procesos
+construyen el mismo grupo a la vez gana el primero y el resto usa el suyo.
+
+Los grupos viejos se borran con limpiar_grupos después de publicar un
+snapshot: se conservan los que usa el snapshot vigente y los más recientes
+de cada prefijo (mapear un grupo actualiza su mtime, así que los que siguen
+usando otros workers cuentan como recientes). En Linux borrar archivos
+mapeados no afecta a los procesos que ya los tienen mapeados.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import uuid
+
+import numpy as np
+import pandas as pd
+
+from scripts.ml.bosque_compilado import BosqueCompilado
+
+
+# Grupos que se conservan por prefijo (bosque, dataset, predicciones) al
+# limpiar: el del snapshot nuevo y el anterior, que otros workers pueden
+# seguir usando mientras recargan
+GRUPOS_POR_PREFIJO = 2
+
+
+def clave_huellas(*huellas):
+    """Clave corta y estable para un conjunto de huellas de archivos."""
+    return hashlib.sha1(repr(huellas).encode("utf-8")).hexdigest()[:12]
+
+
+def directorio_grupo(directorio_base, prefijo, clave):
+    """Ruta del grupo de arrays <prefijo>-<clave> dentro del directorio base."""
+    return os.path.join(directorio_base, f"{prefijo}-{clave}")
+
+
+def guardar_grupo(directorio, arrays, metadatos=None):
+    """
+    Escribe un grupo de arrays (.npy) y sus metadatos (JSON) de forma atómica.
+    Si el directorio ya existe no se vuelve a escribir.
+
+    Args:
+        directorio: ruta final del grupo
+        arrays: dict {nombre: array NumPy}
+        metadatos: dict serializable a JSON
+
+    Returns:
+        str con la ruta del grupo
+    """
+    if os.path.isdir(directorio):
+        return directorio
+
+    directorio_base = os.path.dirname(directorio)
+    os.makedirs(directorio_base, exist_ok=True)
+    ruta_gitignore = os.path.join(directorio_base, ".gitignore")
+    if not os.path.exists(ruta_gitignore):
+        with open(ruta_gitignore, "w", encoding="utf-8") as archivo:
+            archivo.write("# Caché de arrays mapeados por la API (se regenera sola)\n*\n")
+
+    temporal = f"{directorio}.tmp-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+    os.makedirs(temporal)
+    try:
+        for nombre, array in arrays.items():
+            np.save(os.path.join(temporal, f"{nombre}.npy"), np.ascontiguousarray(array), allow_pickle=False)
+        with open(os.path.join(temporal, "metadatos.json"), "w", encoding="utf-8") as archivo:
+            json.dump(metadatos or {}, archivo, ensure_ascii=False)
+        try:
+            os.rename(temporal, directorio)
+        except OSError:
+            # Otro proceso terminó de escribir el mismo grupo antes
+            if not os.path.isdir(directorio):
+                raise
+    finally:
+        if os.path.isdir(temporal):
+            shutil.rmtree(temporal, ignore_errors=True)
+    return directorio
+
+
+def mapear_grupo(directorio):
+    """
+    Mapea de solo lectura los arrays de un grupo.
+
+    Returns:
+        (dict {nombre: np.memmap}, metadatos), o None si el grupo no existe
+    """
+    if not os.path.isdir(directorio):
+        return None
+    with open(os.path.join(directorio, "metadatos.json"), encoding="utf-8") as archivo:
+        metadatos = json.load(archivo)
+    # El mtime del grupo marca su último uso (ver limpiar_grupos)
+    try:
+        os.utime(directorio)
+    except OSError:
+        pass
+    arrays = {
+        nombre[:-len(".npy")]: np.load(os.path.join(directorio, nombre), mmap_mode="r", allow_pickle=False)
+        for nombre in os.listdir(directorio)
+        if nombre.endswith(".npy")
+    }
+    return arrays, metadatos
+
+
+def limpiar_grupos(directorio_base, en_uso=(), grupos_por_prefijo=GRUPOS_POR_PREFIJO):
+    """
+    Borra los grupos que ya no se usan: de cada prefijo se conservan los
+    grupos en_uso y los grupos_por_prefijo usados más recientemente (mtime).
+    Los directorios temporales de escrituras a medias se ignoran.
+
+    Args:
+        directorio_base: directorio compartido con los grupos <prefijo>-<clave>
+        en_uso: rutas de grupos que no se borran nunca (snapshot vigente)
+        grupos_por_prefijo: grupos recientes que se conservan por prefijo
+
+    Returns:
+        list con las rutas de los grupos borrados
+    """
+    if not os.path.isdir(directorio_base):
+        return []
+    en_uso = {os.path.abspath(ruta) for ruta in en_uso if ruta is not None}
+
+    por_prefijo = {}
+    for nombre in os.listdir(directorio_base):
+        ruta = os.path.join(directorio_base, nombre)
+        if ".tmp-" in nombre or "-" not in nombre or not os.path.isdir(ruta):
+            continue
+        try:
+            modificado = os.stat(ruta).st_mtime
+        except FileNotFoundError:
+            continue
+        prefijo = nombre.rsplit("-", 1)[0]
+        por_prefijo.setdefault(prefijo, []).append((modificado, ruta))
+
+    borrados = []
+    for grupos in por_prefijo.values():
+        grupos.sort(reverse=True)
+        for _, ruta in grupos[grupos_por_prefijo:]:
+            if os.path.abspath(ruta) in en_uso:
+                continue
+            shutil.rmtree(ruta, ignore_errors=True)
+            borrados.append(ruta)
+    return borrados
+
+
+# ============================================================================
+# BOSQUE COMPILADO
+# ============================================================================
+
+def cargar_bosque_mapeado(directorio):
+    """BosqueCompilado con sus nodos mapeados desde directorio, o None si no existe."""
+    grupo = mapear_grupo(directorio)
+    if grupo is None:
+        return None
+    arrays, metadatos = grupo
+    return BosqueCompilado.desde_arrays(arrays, metadatos)
+
+
+def mapear_bosque(bosque, directorio):
+    """Guarda los nodos del bosque (si no estaban) y retorna la versión mapeada."""
+    guardar_grupo(directorio, bosque.arrays(), bosque.metadatos())
+    return cargar_bosque_mapeado(directorio)
+
+
+# ============================================================================
+# DATASET
+# ============================================================================
+
+def columnas_mapeables(df):
+    """Columnas numéricas o booleanas con dtype NumPy (las que caben en un .npy)."""
+    return [
+        columna for columna in df.columns
+        if isinstance(df[columna].dtype, np.dtype) and df[columna].dtype.kind in "biuf"
+    ]
+
+
+def mapear_dataframe(df, directorio):
+    """
+    Reemplaza las columnas numéricas del DataFrame por arrays mapeados desde
+    directorio (los escribe la primera vez). Las columnas de texto siguen en
+    la memoria del proceso.
+
+    Returns:
+        DataFrame con las mismas columnas, orden e índice
+    """
+    columnas = columnas_mapeables(df)
+    if not columnas:
+        return df
+
+    guardar_grupo(
+        directorio,
+        {f"columna_{i}": df[columna].to_numpy() for i, columna in enumerate(columnas)},
+        {"columnas": columnas}
+    )
+    arrays, metadatos = mapear_grupo(directorio)
+    if metadatos["columnas"] != columnas:
+        return df
+
+    mapeadas = {columna: arrays[f"columna_{i}"] for i, columna in enumerate(columnas)}
+    return pd.DataFrame({
+        columna: (pd.Series(mapeadas[columna], index=df.index, name=columna, copy=False)
+                  if columna in mapeadas else df[columna])
+        for columna in df.columns
+    }, copy=False)
+
+
+def mapear_array(array, directorio):
+    """Guarda un array suelto (si no estaba) y retorna la versión mapeada."""
+    guardar_grupo(directorio, {"valores": array})
+    return mapear_grupo(directorio)[0]["valores"]
+
+
+def cargar_array_mapeado(directorio):
+    """Array suelto mapeado desde directorio, o None si no existe."""
+    grupo = mapear_grupo(directorio)
+    return None if grupo is None else grupo[0]["valores"]
+
+
+# ============================================================================
+# REPORTE DE MEMORIA
+# ============================================================================
+
+def memoria_proceso(pid=None):
+    """
+    Memoria de un proceso en MB, leída de /proc/<pid>/smaps_rollup (Linux).
+    rss: residente total (cuenta las páginas compartidas en cada proceso)
+    uss: páginas exclusivas del proceso (lo que se liberaría al terminarlo)
+    pss: rss con las páginas compartidas repartidas entre quienes las usan
+    """
+    pid = pid or os.getpid()
+    campos = {}
+    with open(f"/proc/{pid}/smaps_rollup", encoding="ascii") as archivo:
+        for linea in archivo:
+            partes = linea.split()
+            if len(partes) == 3 and partes[2] == "kB":
+                campos[partes[0].rstrip(":")] = int(partes[1]) / 1024
+    return {
+        "pid": pid,
+        "rss_mb": campos.get("Rss", 0.0),
+        "uss_mb": campos.get("Private_Clean", 0.0) + campos.get("Private_Dirty", 0.0),
+        "pss_mb": campos.get("Pss", 0.0)
+    }
+
+
+def reporte_memoria(pids):
+    """
+    Memoria de varios procesos y totales. La suma de PSS es la memoria real
+    que ocupa el grupo; la suma de RSS es lo que costaría sin compartir nada.
+
+    Returns:
+        dict con "procesos" (lista) y "total" (sumas en MB)
+    """
+    procesos = [memoria_proceso(pid) for pid in pids]
+    total = {
+        clave: sum(proceso[clave] for proceso in procesos)
+        for clave in ("rss_mb", "uss_mb", "pss_mb")
+    }
+    return {"procesos": procesos, "total": total}
+
+
+def imprimir_reporte_memoria(reporte, titulo="MEMORIA POR PROCESO"):
+    """Imprime el reporte de memoria como tabla."""
+    print(f"\n{titulo}")
+    print(f"{'PID':>8} {'RSS MB':>10} {'USS MB':>10} {'PSS MB':>10}")
+    for proceso in reporte["procesos"]:
+        print(f"{proceso['pid']:>8} {proceso['rss_mb']:>10.1f} {proceso['uss_mb']:>10.1f} {proceso['pss_mb']:>10.1f}")
+    total = reporte["total"]
+    print(f"{'TOTAL':>8} {total['rss_mb']:>10.1f} {total['uss_mb']:>10.1f} {total['pss_mb']:>10.1f}")
+    if total["rss_mb"] > 0:
+        print(f"  Compartido: {total['rss_mb'] - total['pss_mb']:,.1f} MB "
+              f"({(1 - total['pss_mb'] / total['rss_mb']) * 100:.0f}% del RSS sumado)")
@@ -0,0 +1,322 @@
+"""
+Módulo de Orden y Paginación de Resultados
+Sistema de Scouting FIFA
+
+Orden total y determinista de los resultados de /jugadores/buscar:
+(columna de orden, id_sofifa, año_datos), con los nulos al final. Sobre
+ese orden se construyen:
+
+- Posición global de cada fila en el orden de las columnas habituales,
+  precalculada al cargar: ordenar un subconjunto filtrado es juntar esas
+  posiciones y seleccionar las k primeras (argpartition), sin ordenar todo.
+  Las demás columnas se calculan al pedirlas y se guardan en una caché LRU
+  acotada (max_columnas_recientes).
+- Cursores de paginación keyset: la última fila de una página codificada
+  como (valor de orden, id_sofifa, año_datos); la siguiente página empieza
+  en la primera fila estrictamente posterior a esa clave.
+- Caché LRU de consultas: las filas de cada combinación de filtros con su
+  prefijo ya ordenado, para que la página N+1 sea un corte y no un nuevo
+  filtrado y ordenamiento.
+"""
+
+import base64
+import json
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+
+def _a_python(valor):
+    """Convierte escalares NumPy/pandas a tipos JSON (None para nulos)."""
+    if valor is None or (not isinstance(valor, str) and pd.isna(valor)):
+        return None
+    return valor.item() if hasattr(valor, "item") else valor
+
+
+def codificar_cursor(ordenar_por, descendente, valor, id_sofifa, año):
+    """Codifica la clave de la última fila de una página como cadena opaca."""
+    clave = {
+        "c": ordenar_por,
+        "d": bool(descendente),
+        "v": _a_python(valor),
+        "id": _a_python(id_sofifa),
+        "a": _a_python(año)
+    }
+    texto = json.dumps(clave, ensure_ascii=False, separators=(",", ":"))
+    return base64.urlsafe_b64encode(texto.encode("utf-8")).decode("ascii")
+
+
+def decodificar_cursor(cursor):
+    """
+    Decodifica un cursor generado por codificar_cursor.
+
+    Raises:
+        ValueError: si el cursor no es válido
+    """
+    try:
+        clave = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8"))
+        return clave["c"], clave["d"], clave["v"], clave["id"], clave["a"]
+    except Exception:
+        raise ValueError("Cursor de paginación inválido")
+
+
+# Columnas de orden habituales: su orden global se precalcula al cargar
+COLUMNAS_ORDEN_PRECALCULADAS = [
+    "valor_mercado_eur",
+    "valoracion_global",
+    "potencial",
+    "edad",
+    "salario_eur"
+]
+
+# Órdenes (columna, dirección) de otras columnas que se conservan en memoria
+MAX_COLUMNAS_RECIENTES = 8
+
+
+class OrdenResultados:
+    """
+    Ordena subconjuntos de filas del DataFrame de jugadores por cualquier
+    columna con desempate determinista por id_sofifa y año_datos.
+
+    Para cada (columna, dirección) se calcula una vez la posición de cada
+    fila en el orden total del dataset completo. Ordenar un subconjunto
+    filtrado es entonces juntar esas posiciones (todas distintas) y hacer
+    una selección parcial (argpartition) de las k primeras.
+
+    Las columnas precalculadas se conservan siempre; las demás (cualquier
+    columna del dataset sirve para ordenar) van a una caché LRU acotada,
+    para que ordenar por muchas columnas distintas no haga crecer la
+    memoria sin límite.
+
+    Args:
+        df: DataFrame de jugadores
+        columnas_precalculadas: columnas cuyo orden se calcula al construir
+        max_columnas_recientes: órdenes de otras columnas guardados a la vez
+    """
+
+    def __init__(self, df, columnas_precalculadas=COLUMNAS_ORDEN_PRECALCULADAS,
+                 max_columnas_recientes=MAX_COLUMNAS_RECIENTES):
+        self.df = df
+        self.ids = pd.to_numeric(df["id_sofifa"], errors="coerce").to_numpy(dtype="float64")
+        if "año_datos" in df.columns:
+            self.años = pd.to_numeric(df["año_datos"], errors="coerce").to_numpy(dtype="float64")
+        else:
+            self.años = np.zeros(len(df))
+        self.max_columnas_recientes = max_columnas_recientes
+        self._rangos = {}
+        self._ordenes = {}
+        self._rangos_recientes = OrderedDict()
+        self._ordenes_recientes = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.columnas_precalculadas = [col for col in columnas_precalculadas if col in df.columns]
+        for columna in self.columnas_precalculadas:
+            self.posiciones(columna, True)
+            self.posiciones(columna, False)
+
+    def _memorizado(self, columna, clave, fijos, recientes, calcular):
+        """
+        Valor guardado de clave, calculándolo si falta. Las columnas
+        precalculadas van a fijos; las demás a recientes (LRU acotada).
+        """
+        fija = columna in self.columnas_precalculadas
+        with self._lock:
+            if fija:
+                valor = fijos.get(clave)
+            else:
+                valor = recientes.get(clave)
+                if valor is not None:
+                    recientes.move_to_end(clave)
+        if valor is not None:
+            return valor
+
+        valor = calcular()
+        with self._lock:
+            if fija:
+                fijos[clave] = valor
+            elif self.max_columnas_recientes > 0:
+                recientes[clave] = valor
+                recientes.move_to_end(clave)
+                while len(recientes) > self.max_columnas_recientes:
+                    recientes.popitem(last=False)
+        return valor
+
+    def rangos(self, columna):
+        """
+        Rango denso ascendente de cada fila en la columna (nulos = último
+        rango) y los valores distintos ordenados.
+
+        Returns:
+            (rangos int64 por fila, valores_unicos ordenados), o None si la
+            columna no existe
+        """
+        if columna not in self.df.columns:
+            return None
+        return self._memorizado(columna, columna, self._rangos, self._rangos_recientes,
+                                lambda: self._calcular_rangos(columna))
+
+    def _calcular_rangos(self, columna):
+        serie = self.df[columna]
+        if pd.api.types.is_numeric_dtype(serie) or pd.api.types.is_bool_dtype(serie):
+            valores = pd.to_numeric(serie, errors="coerce").to_numpy(dtype="float64")
+            nulos = np.isnan(valores)
+        else:
+            nulos = serie.isna().to_numpy()
+            valores = serie.astype(object).where(~nulos, "").astype(str).to_numpy(dtype=object)
+        unicos = np.unique(valores[~nulos])
+        rangos = np.searchsorted(unicos, valores).astype(np.int64)
+        rangos[nulos] = len(unicos)
+        return rangos, unicos
+
+    def claves(self, columna, descendente):
+        """
+        Clave entera por fila tal que el orden ascendente de la clave es el
+        orden pedido (descendente invierte los rangos; los nulos siguen al final).
+        """
+        rangos, unicos = self.rangos(columna)
+        if not descendente:
+            return rangos
+        total = len(unicos)
+        return np.where(rangos < total, total - 1 - rangos, total)
+
+    def _orden_global(self, columna, descendente):
+        return self._memorizado(columna, (columna, bool(descendente)), self._ordenes, self._ordenes_recientes,
+                                lambda: self._calcular_orden_global(columna, descendente))
+
+    def _calcular_orden_global(self, columna, descendente):
+        claves = self.claves(columna, descendente)
+        orden = np.lexsort((self.años, self.ids, claves))
+        posiciones = np.empty(len(orden), dtype=np.int64)
+        posiciones[orden] = np.arange(len(orden))
+        # Claves en orden global, para ubicar cursores con búsqueda binaria
+        return posiciones, claves[orden], self.ids[orden], self.años[orden]
+
+    def posiciones(self, columna, descendente):
+        """
+        Posición de cada fila en el orden total (columna, id_sofifa, año_datos)
+        del dataset completo. Todas distintas: no hay empates.
+        """
+        return self._orden_global(columna, descendente)[0]
+
+    def posicion_cursor(self, columna, descendente, valor, id_sofifa, año):
+        """
+        Posición global de la primera fila estrictamente posterior a la clave
+        del cursor (valor, id_sofifa, año). La clave no necesita existir.
+        """
+        _, claves_globales, ids_globales, años_globales = self._orden_global(columna, descendente)
+        _, unicos = self.rangos(columna)
+        total = len(unicos)
+
+        if valor is None:
+            rango, exacto = total, True
+        else:
+            if unicos.dtype == object:
+                valor = str(valor)
+            rango = int(np.searchsorted(unicos, valor, side="left"))
+            exacto = rango < total and unicos[rango] == valor
+
+        if not exacto:
+            # El valor ya no existe: la siguiente página empieza en el
+            # primer valor que lo sigue en el orden pedido
+            umbral = total - rango if descendente else rango
+            return int(np.searchsorted(claves_globales, umbral, side="left"))
+
+        clave = total - 1 - rango if (descendente and rango < total) else rango
+        inicio = int(np.searchsorted(claves_globales, clave, side="left"))
+        fin = int(np.searchsorted(claves_globales, clave, side="right"))
+
+        # Dentro del empate (ordenado por id, año) contar las filas <= cursor
+        ids = ids_globales[inicio:fin]
+        años = años_globales[inicio:fin]
+        id_sofifa = np.nan if id_sofifa is None else id_sofifa
+        año = np.nan if año is None else año
+        anteriores = (ids < id_sofifa) | ((ids == id_sofifa) & (años <= año))
+        return inicio + int(np.count_nonzero(anteriores))
+
+    def resultado(self, filas, columna, descendente):
+        """
+        Prepara el resultado de una consulta sin ordenarlo todavía.
+        Sin columna (None) se conserva el orden del dataset.
+        """
+        claves = filas if columna is None else self.posiciones(columna, descendente)[filas]
+        return ResultadoOrdenado(filas, claves)
+
+
+class ResultadoOrdenado:
+    """
+    Filas de una consulta con su clave de orden (entera y sin empates).
+    Solo se ordena el prefijo que se va pidiendo, con selección parcial.
+    """
+
+    def __init__(self, filas, claves):
+        self.filas = filas
+        self.claves = claves
+        self._prefijo = filas[:0]
+
+    def __len__(self):
+        return len(self.filas)
+
+    def top_k(self, k):
+        """Las k primeras filas en orden (argpartition + orden de los k ganadores)."""
+        k = min(k, len(self.filas))
+        prefijo = self._prefijo
+        if k > len(prefijo):
+            # Pedir al menos el doble del prefijo actual amortiza páginas sucesivas
+            k_calculo = min(max(k, 2 * len(prefijo)), len(self.filas))
+            if k_calculo < len(self.filas):
+                ganadores = np.argpartition(self.claves, k_calculo - 1)[:k_calculo]
+            else:
+                ganadores = np.arange(len(self.filas))
+            ganadores = ganadores[np.argsort(self.claves[ganadores])]
+            prefijo = self.filas[ganadores]
+            self._prefijo = prefijo
+        return prefijo[:k]
+
+    def pagina(self, inicio, tamaño):
+        """Filas de la página [inicio, inicio + tamaño) del orden completo."""
+        return self.top_k(inicio + tamaño)[inicio:]
+
+    def inicio_desde_posicion(self, posicion_global):
+        """Índice en este resultado de la primera fila con clave >= posicion_global."""
+        return int(np.count_nonzero(self.claves < posicion_global))
+
+
+class CacheConsultas:
+    """
+    Caché LRU (thread-safe) de resultados ordenados por consulta.
+
+    Args:
+        max_entradas: cantidad máxima de consultas guardadas
+    """
+
+    def __init__(self, max_entradas=64):
+        self.max_entradas = max_entradas
+        self._entradas = OrderedDict()
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+
+    def obtener(self, clave):
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is None:
+                self.fallos += 1
+                return None
+            self._entradas.move_to_end(clave)
+            self.aciertos += 1
+            return entrada
+
+    def guardar(self, clave, entrada):
+        if self.max_entradas <= 0:
+            return
+        with self._lock:
+            self._entradas[clave] = entrada
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+
+    def limpiar(self):
+        with self._lock:
+            self._entradas.clear()
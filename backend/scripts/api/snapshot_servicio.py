@@ -0,0 +1,626 @@
+"""
+Módulo de Snapshot de Servicio
+Sistema de Scouting FIFA
+
+Todo lo que la API necesita para responder (dataset, índices, cubo, plan de
+características, modelo, encoders y bosque compilado) vive en un único
+objeto: el "snapshot de servicio". Cada petición toma el snapshot vigente
+al empezar y trabaja con él hasta terminar.
+
+Para recargar datos o modelo sin reiniciar la API se construye un snapshot
+nuevo en segundo plano y se reemplaza la referencia de forma atómica: las
+peticiones en curso terminan con el anterior, las nuevas usan el nuevo.
+La recarga la dispara el endpoint de administración o el vigilante de
+archivos de datos/.
+
+Carga: dataset, modelo y plan de características (el que se guardó al
+entrenar; si no existe, encoder y club encoding para compilarlo desde el
+dataset) se leen en paralelo en un pool de hilos (el modelo con mmap_mode='r' si está guardado sin
+compresión, el dataset mapeado desde Arrow IPC si existe). En el arranque el snapshot se publica en cuanto el dataset y
+sus índices están listos, y la parte del modelo se completa una sola vez
+cuando termina de cargarse; las recargas solo se publican completas.
+
+Con un directorio compartido (modo multiproceso) los nodos del bosque
+compilado, las columnas numéricas del dataset y las predicciones del
+dataset completo se mapean desde archivos .npy (ver memoria_compartida):
+si el bosque ya está en disco, el modelo sklearn ni siquiera se carga.
+Después de publicar un snapshot se borran los grupos de arrays que ya no
+usa nadie (limpiar_grupos).
+
+Las predicciones del dataset completo se toman de la tabla de predicciones
+(predicciones_ml.parquet, ver scripts/ml/tabla_predicciones.py) si su versión
+coincide con la del modelo que se está cargando; si no, se predicen al cargar.
+"""
+
+import hashlib
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import joblib
+import numpy as np
+import pandas as pd
+# Deserializar modelo y encoder en hilos distintos importaría sklearn desde
+# varios hilos a la vez (importaciones circulares a medio inicializar):
+# se importa antes, en el hilo que crea el pool
+import sklearn.ensemble  # noqa: F401
+import sklearn.preprocessing  # noqa: F401
+
+from scripts.api.indices_busqueda import IndiceBusqueda, IndiceNombres, IndiceJugadores
+from scripts.api.orden_resultados import OrdenResultados, CacheConsultas
+from scripts.api.almacen_predicciones import AlmacenPredicciones
+from scripts.api.indice_distribucion import IndiceDistribucion
+from scripts.api.cubo_olap import CuboOLAP, DIMENSIONES_CUBO_NACIONALIDAD, MEDIDAS_CUBO_NACIONALIDAD
+from scripts.api.memoria_compartida import (
+    clave_huellas, directorio_grupo, cargar_bosque_mapeado, mapear_bosque,
+    mapear_dataframe, mapear_array, cargar_array_mapeado, limpiar_grupos
+)
+from scripts.ml.plan_caracteristicas import construir_plan_caracteristicas, cargar_plan_caracteristicas
+from scripts.ml.bosque_compilado import compilar_bosque
+from scripts.ml.formato_arrow import cargar_arrow
+from scripts.ml.tabla_predicciones import leer_predicciones, version_modelo, unir_predicciones
+from scripts.limpieza.dataset_particionado import leer_dataset_particionado
+
+
+# Artefactos del modelo: si no cambian, una recarga reutiliza el modelo cargado
+ARTEFACTOS_MODELO = ("modelo", "encoder", "club_encoding", "plan_caracteristicas")
+
+# Firmas de los compresores que admite joblib (zlib, gzip, bz2, xz, lzma, lz4).
+# Un pickle sin comprimir empieza con 0x80 y se puede mapear con mmap.
+FIRMAS_COMPRESION = (b"\x78", b"\x1f\x8b", b"BZh", b"\xfd7zXZ", b"\x5d\x00\x00", b"\x04\x22\x4d\x18")
+
+
+def huella_archivo(ruta):
+    """
+    (mtime en ns, tamaño) del archivo, o None si no existe. En una carpeta
+    (dataset particionado) el mtime cambia al reemplazarla por otra versión.
+    """
+    try:
+        estado = os.stat(ruta)
+    except FileNotFoundError:
+        return None
+    return (estado.st_mtime_ns, estado.st_size)
+
+
+def huellas_artefactos(rutas):
+    """Huella de cada artefacto: {nombre: (mtime_ns, tamaño) o None}."""
+    return {nombre: huella_archivo(ruta) for nombre, ruta in rutas.items()}
+
+
+def es_joblib_comprimido(ruta):
+    """True si el archivo joblib está comprimido (no admite mmap_mode)."""
+    with open(ruta, "rb") as archivo:
+        return archivo.read(6).startswith(FIRMAS_COMPRESION)
+
+
+def cargar_artefacto(ruta, descripcion, mmap=False):
+    """
+    Carga un artefacto joblib. Con mmap=True y archivo sin comprimir, los
+    arrays NumPy se mapean de solo lectura en lugar de copiarse a memoria.
+    """
+    mmap_mode = "r" if mmap and not es_joblib_comprimido(ruta) else None
+    print(f"  - Cargando {descripcion} desde: {ruta}{' (mmap)' if mmap_mode else ''}")
+    objeto = joblib.load(ruta, mmap_mode=mmap_mode)
+    print(f"  ✓ {descripcion} cargado")
+    return objeto
+
+
+def cargar_dataset(ruta_csv, ruta_parquet, ruta_arrow=None):
+    """
+    Carga el dataset desde Arrow IPC (mapeado sin copiar), o desde el
+    Parquet particionado por año (carpeta), o desde CSV, según cuál exista.
+
+    Returns:
+        (DataFrame, formato) con formato "arrow", "parquet" o "csv"
+    """
+    if ruta_arrow is not None:
+        print(f"  - Mapeando dataset Arrow IPC (mmap, sin copiar columnas)...")
+        try:
+            df = cargar_arrow(ruta_arrow)
+            print(f"  ✓ Dataset Arrow mapeado: {len(df):,} jugadores")
+            return df, "arrow"
+        except FileNotFoundError:
+            print(f"  ⚠️  Arrow no encontrado (ejecuta scripts/ml/optimizar_dataset.py)")
+
+    print(f"  - Cargando dataset desde Parquet particionado (tipos ya optimizados)...")
+    try:
+        df = leer_dataset_particionado(ruta_parquet)
+        print(f"  ✓ Dataset Parquet cargado: {len(df):,} jugadores")
+        return df, "parquet"
+    except FileNotFoundError:
+        print(f"  ⚠️  Parquet no encontrado, cargando CSV...")
+        df = pd.read_csv(ruta_csv, low_memory=False)
+        print(f"  ✓ Dataset CSV cargado: {len(df):,} jugadores")
+        return df, "csv"
+
+
+class SnapshotServicio:
+    """
+    Estado de la API para una versión de datos y modelo.
+
+    Los componentes de datos se fijan al construirlo. Los del modelo
+    (modelo, encoders, bosque compilado, plan de características y, si el
+    dataset no trae valor_predicho_eur, el almacén de predicciones) se fijan
+    una sola vez con completar_modelo; hasta entonces modelo_listo es False.
+    """
+
+    def __init__(self, version, huellas, df_jugadores, indice_busqueda, indice_nombres,
+                 indice_jugadores, orden_resultados, cache_consultas, indice_distribucion,
+                 cubo_eda, cubo_nacionalidades, almacen_predicciones=None):
+        self.version = version
+        self.creado_en = datetime.now().isoformat(timespec="seconds")
+        self.huellas = huellas
+        self.df_jugadores = df_jugadores
+        self.indice_busqueda = indice_busqueda
+        self.indice_nombres = indice_nombres
+        self.indice_jugadores = indice_jugadores
+        self.orden_resultados = orden_resultados
+        self.cache_consultas = cache_consultas
+        self.indice_distribucion = indice_distribucion
+        self.cubo_eda = cubo_eda
+        self.cubo_nacionalidades = cubo_nacionalidades
+        self.almacen_predicciones = almacen_predicciones
+        # Modo compartido: directorio base y grupos de arrays de este snapshot
+        self.directorio_compartido = None
+        self.grupos_compartidos = ()
+        # Hilos del bosque compilado para lotes grandes (sin modelo sklearn)
+        self.hilos_bosque = 1
+
+        self.modelo = None
+        self.encoder = None
+        self.club_encoding = None
+        self.bosque_compilado = None
+        self.plan_caracteristicas = None
+        self.error_modelo = None
+        self.carga_modelo_terminada = threading.Event()
+
+    @property
+    def modelo_listo(self):
+        return self.carga_modelo_terminada.is_set() and self.error_modelo is None
+
+    def completar_modelo(self, modelo, encoder, club_encoding, bosque_compilado,
+                         plan_caracteristicas, almacen_predicciones):
+        """Fija los componentes del modelo y marca el snapshot como listo para predecir."""
+        self.modelo = modelo
+        self.encoder = encoder
+        self.club_encoding = club_encoding
+        self.bosque_compilado = bosque_compilado
+        self.plan_caracteristicas = plan_caracteristicas
+        self.almacen_predicciones = almacen_predicciones
+        self.carga_modelo_terminada.set()
+
+    def fallar_modelo(self, error):
+        """Registra que la carga del modelo falló (los datos siguen sirviéndose)."""
+        self.error_modelo = f"{type(error).__name__}: {error}"
+        self.carga_modelo_terminada.set()
+
+    def predecir_log(self, X):
+        """
+        Predicción en escala log1p. Para pocas filas usa el bosque compilado
+        (sin despacho joblib por árbol); para lotes grandes, modelo.predict.
+        En modo compartido no hay modelo sklearn y el bosque predice todo,
+        con los bloques de los lotes grandes repartidos en hilos_bosque hilos.
+        """
+        if self.bosque_compilado is not None:
+            if self.modelo is None:
+                return self.bosque_compilado.predict(X, hilos=self.hilos_bosque)
+            if X.shape[0] <= self.bosque_compilado.filas_por_bloque:
+                return self.bosque_compilado.predict(X)
+        return self.modelo.predict(X)
+
+
+def construir_snapshot(rutas, anterior=None, usar_bosque_compilado=True, max_cache_consultas=64,
+                       esperar_modelo=True, directorio_compartido=None, hilos_bosque=1):
+    """
+    Carga artefactos en paralelo y construye todos los componentes de un snapshot.
+
+    Args:
+        rutas: dict con las rutas de "modelo", "encoder", "club_encoding",
+            "dataset_csv", "dataset_parquet" y opcionalmente "dataset_arrow",
+            "plan_caracteristicas" (plan guardado al entrenar) y "predicciones"
+            (tabla de predicciones del dataset)
+        anterior: snapshot vigente; si los artefactos del modelo no cambiaron
+            se reutilizan su modelo, encoders y bosque compilado
+        usar_bosque_compilado: compilar el bosque para predicciones de pocas filas
+        max_cache_consultas: entradas de la caché de búsquedas paginadas
+        esperar_modelo: si False, retorna en cuanto los componentes de datos
+            están listos y la parte del modelo se completa en segundo plano
+        directorio_compartido: si se indica, bosque, columnas numéricas y
+            predicciones se mapean desde archivos .npy compartidos entre procesos
+        hilos_bosque: hilos del bosque compilado para lotes grandes cuando no
+            hay modelo sklearn (modo compartido)
+
+    Returns:
+        SnapshotServicio
+
+    Raises:
+        RuntimeError: si esperar_modelo y la carga del modelo falla
+    """
+    huellas = huellas_artefactos(rutas)
+    reutilizar_modelo = anterior is not None and anterior.modelo_listo and all(
+        huellas.get(nombre) == anterior.huellas.get(nombre) for nombre in ARTEFACTOS_MODELO
+    )
+
+    # Grupos de arrays compartidos, identificados por la huella de sus fuentes
+    huella_dataset = (huellas.get("dataset_arrow"), huellas["dataset_parquet"], huellas["dataset_csv"])
+    directorio_bosque = directorio_dataset = directorio_predicciones = None
+    if directorio_compartido is not None:
+        directorio_bosque = directorio_grupo(directorio_compartido, "bosque", clave_huellas(huellas["modelo"]))
+        directorio_dataset = directorio_grupo(directorio_compartido, "dataset", clave_huellas(*huella_dataset))
+        directorio_predicciones = directorio_grupo(directorio_compartido, "predicciones", clave_huellas(
+            *huella_dataset, *(huellas.get(nombre) for nombre in ARTEFACTOS_MODELO)
+        ))
+
+    # Bosque ya mapeable desde disco: no hace falta cargar el modelo sklearn
+    bosque_mapeado = None
+    if directorio_bosque is not None and usar_bosque_compilado and not reutilizar_modelo:
+        bosque_mapeado = cargar_bosque_mapeado(directorio_bosque)
+
+    print("Cargando modelo y datos (en paralelo)...")
+    # Lecturas de disco y deserialización liberan el GIL en buena parte:
+    # dataset y artefactos del modelo se cargan a la vez
+    ejecutor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="carga-artefactos")
+    futuro_dataset = ejecutor.submit(
+        cargar_dataset, rutas["dataset_csv"], rutas["dataset_parquet"], rutas.get("dataset_arrow")
+    )
+    # Tabla de predicciones y versión del modelo con la que se valida
+    futuro_predicciones = futuro_version = None
+    if huellas.get("predicciones") is not None:
+        futuro_predicciones = ejecutor.submit(leer_predicciones, rutas["predicciones"])
+        futuro_version = ejecutor.submit(
+            version_modelo, *(rutas[nombre] for nombre in ARTEFACTOS_MODELO if nombre in rutas)
+        )
+    futuros_modelo = None
+    if reutilizar_modelo:
+        print(f"  ✓ Artefactos del modelo sin cambios: se reutiliza el modelo cargado")
+    else:
+        if bosque_mapeado is not None:
+            print(f"  ✓ Bosque compilado mapeado desde {directorio_bosque} (sin cargar el modelo sklearn)")
+        # Con el plan guardado, encoder y club encoding no hacen falta
+        hay_plan = huellas.get("plan_caracteristicas") is not None
+        futuros_modelo = {
+            "modelo": (ejecutor.submit(cargar_artefacto, rutas["modelo"], "Modelo", True)
+                       if bosque_mapeado is None else None),
+            "plan_caracteristicas": (ejecutor.submit(cargar_plan_caracteristicas, rutas["plan_caracteristicas"])
+                                     if hay_plan else None),
+            "encoder": (ejecutor.submit(cargar_artefacto, rutas["encoder"], "Encoder")
+                        if not hay_plan else None),
+            "club_encoding": (ejecutor.submit(cargar_artefacto, rutas["club_encoding"], "Club encoding")
+                              if not hay_plan else None)
+        }
+    ejecutor.shutdown(wait=False)
+
+    df_jugadores, formato_dataset = futuro_dataset.result()
+    # Desde Arrow las columnas numéricas ya están mapeadas del archivo (y compartidas)
+    if directorio_dataset is not None and formato_dataset != "arrow":
+        print(f"  - Mapeando columnas numéricas del dataset (memoria compartida)...")
+        df_jugadores = mapear_dataframe(df_jugadores, directorio_dataset)
+        print(f"  ✓ Columnas numéricas mapeadas desde {directorio_dataset}")
+
+    # Después de mapear: las columnas de la tabla son pequeñas y quedan en el proceso
+    if futuro_predicciones is not None:
+        print(f"  - Uniendo tabla de predicciones (id_sofifa, año_datos)...")
+        try:
+            predicciones, metadatos = futuro_predicciones.result()
+            df_jugadores, motivo = unir_predicciones(df_jugadores, predicciones, metadatos, futuro_version.result())
+        except Exception as e:
+            motivo = f"{type(e).__name__}: {e}"
+        if motivo is None:
+            print(f"  ✓ Predicciones del modelo {metadatos['version_modelo']} ({metadatos.get('creado_en')}) unidas")
+        else:
+            print(f"  ⚠️  Tabla de predicciones ignorada: {motivo}")
+
+    print(f"  - Construyendo índices de búsqueda (bitsets por valor)...")
+    indice_busqueda = IndiceBusqueda(df_jugadores)
+    print(f"  ✓ Índices construidos: {len(indice_busqueda.bitsets)} categóricos, {len(indice_busqueda.rangos)} de rango")
+
+    print(f"  - Construyendo índice de nombres (trigramas sin tildes)...")
+    indice_nombres = IndiceNombres(df_jugadores)
+    print(f"  ✓ Índice de nombres: {len(indice_nombres.documentos):,} nombres, {len(indice_nombres.postings):,} trigramas")
+
+    print(f"  - Construyendo índice de jugadores (id_sofifa -> filas por año)...")
+    indice_jugadores = IndiceJugadores(df_jugadores)
+    print(f"  ✓ Índice de jugadores: {len(indice_jugadores.grupo_por_id):,} ids")
+
+    # Orden determinista (columna, id_sofifa, año_datos) y caché de consultas paginadas
+    print(f"  - Precalculando orden de columnas habituales (top-k en búsquedas)...")
+    orden_resultados = OrdenResultados(df_jugadores)
+    print(f"  ✓ Orden precalculado: {', '.join(orden_resultados.columnas_precalculadas)}")
+    cache_consultas = CacheConsultas(max_entradas=max_cache_consultas)
+
+    print(f"  - Construyendo índice de distribución de valores (percentiles)...")
+    indice_distribucion = IndiceDistribucion(df_jugadores)
+    print(f"  ✓ Distribución: {len(indice_distribucion.global_ordenado):,} valores, "
+          f"{len(indice_distribucion.por_año_posicion)} cohortes año/posición")
+
+    print(f"  - Materializando cubo OLAP para EDA (año × liga × club × posición × edad)...")
+    cubo_eda = CuboOLAP(df_jugadores)
+    cubo_nacionalidades = CuboOLAP(df_jugadores, DIMENSIONES_CUBO_NACIONALIDAD, MEDIDAS_CUBO_NACIONALIDAD)
+    print(f"  ✓ Cubo OLAP: {len(cubo_eda.celdas):,} celdas ({len(cubo_nacionalidades.celdas):,} por nacionalidad)")
+
+    # Con la columna precalculada, infravalorados/sobrevalorados no esperan al modelo
+    almacen_predicciones = None
+    if "valor_predicho_eur" in df_jugadores.columns:
+        print(f"  - Preparando almacén de predicciones (infravalorados/sobrevalorados)...")
+        almacen_predicciones = AlmacenPredicciones(df_jugadores["valor_mercado_eur"], df_jugadores["valor_predicho_eur"])
+        print(f"  ✓ Almacén de predicciones (columna valor_predicho_eur): "
+              f"{len(almacen_predicciones.orden):,} jugadores ordenados por diferencia")
+
+    # Versión: fecha de construcción + hash de las huellas de los artefactos
+    resumen = hashlib.sha1(repr(sorted(huellas.items())).encode("utf-8")).hexdigest()[:8]
+    version = f"{datetime.now():%Y%m%d-%H%M%S}-{resumen}"
+
+    snapshot = SnapshotServicio(
+        version=version,
+        huellas=huellas,
+        df_jugadores=df_jugadores,
+        indice_busqueda=indice_busqueda,
+        indice_nombres=indice_nombres,
+        indice_jugadores=indice_jugadores,
+        orden_resultados=orden_resultados,
+        cache_consultas=cache_consultas,
+        indice_distribucion=indice_distribucion,
+        cubo_eda=cubo_eda,
+        cubo_nacionalidades=cubo_nacionalidades,
+        almacen_predicciones=almacen_predicciones
+    )
+    snapshot.hilos_bosque = hilos_bosque
+    if directorio_compartido is not None:
+        snapshot.directorio_compartido = directorio_compartido
+        snapshot.grupos_compartidos = (directorio_bosque, directorio_dataset, directorio_predicciones)
+    print(f"  ✓ Datos listos para servir (snapshot {version})")
+
+    def completar_modelo():
+        try:
+            if reutilizar_modelo:
+                modelo = anterior.modelo
+                encoder = anterior.encoder
+                club_encoding = anterior.club_encoding
+                bosque_compilado = anterior.bosque_compilado
+                # Un plan compilado desde el dataset anterior se vuelve a compilar
+                plan_caracteristicas = anterior.plan_caracteristicas if encoder is None else None
+            else:
+                plan_caracteristicas = encoder = club_encoding = None
+                if futuros_modelo["plan_caracteristicas"] is not None:
+                    plan_caracteristicas = futuros_modelo["plan_caracteristicas"].result()
+                    print(f"  ✓ Plan de características cargado: {plan_caracteristicas.total_features} features "
+                          f"(versión {plan_caracteristicas.version})")
+                else:
+                    encoder = futuros_modelo["encoder"].result()
+                    club_encoding = futuros_modelo["club_encoding"].result()
+                modelo = None
+                bosque_compilado = bosque_mapeado
+                if bosque_compilado is None:
+                    modelo = futuros_modelo["modelo"].result()
+
+                    # Bosque compilado para predicciones de 1 fila / lotes pequeños
+                    if usar_bosque_compilado:
+                        print(f"  - Compilando bosque a arrays NumPy (predicción de baja latencia)...")
+                        bosque_compilado = compilar_bosque(modelo)
+                        if bosque_compilado is not None:
+                            print(f"  ✓ Bosque compilado: {bosque_compilado.total_arboles} árboles, "
+                                  f"{bosque_compilado.total_nodos:,} nodos ({bosque_compilado.memoria_mb():.0f} MB)")
+
+            if plan_caracteristicas is None:
+                print(f"  ⚠️  Sin plan de características guardado: compilándolo desde el dataset...")
+                print(f"     (ejecuta scripts/ml/plan_caracteristicas.py para guardarlo junto al modelo)")
+                plan_caracteristicas = construir_plan_caracteristicas(df_jugadores, encoder, club_encoding)
+                print(f"  ✓ Plan de características: {plan_caracteristicas.total_features} features")
+
+            almacen = snapshot.almacen_predicciones
+            if almacen is None:
+                valores_predichos = None
+                if directorio_predicciones is not None:
+                    valores_predichos = cargar_array_mapeado(directorio_predicciones)
+                if valores_predichos is None:
+                    print(f"  ⚠️  Dataset sin valor_predicho_eur: prediciendo el dataset completo una sola vez...")
+                    print(f"     (ejecuta regenerar_predicciones_rapido.py para guardar la tabla de predicciones)")
+                    X_dataset = plan_caracteristicas.transformar(df_jugadores)
+                    valores_log = (modelo.predict(X_dataset) if modelo is not None
+                                   else bosque_compilado.predict(X_dataset, hilos=hilos_bosque))
+                    valores_predichos = np.expm1(valores_log)
+                    if directorio_predicciones is not None:
+                        valores_predichos = mapear_array(valores_predichos, directorio_predicciones)
+                almacen = AlmacenPredicciones(df_jugadores["valor_mercado_eur"], valores_predichos)
+                print(f"  ✓ Almacén de predicciones: {len(almacen.orden):,} jugadores ordenados por diferencia")
+
+            # Modo compartido: el bosque se mapea desde disco y reemplaza al
+            # modelo sklearn en memoria (que cada proceso tendría copiado)
+            if directorio_bosque is not None and bosque_compilado is not None and modelo is not None:
+                bosque_compilado = mapear_bosque(bosque_compilado, directorio_bosque)
+                modelo = None
+                print(f"  ✓ Bosque compilado mapeado en {directorio_bosque}")
+
+            snapshot.completar_modelo(modelo, encoder, club_encoding, bosque_compilado,
+                                      plan_caracteristicas, almacen)
+            print(f"  ✓ Modelo listo para predecir (snapshot {version})")
+        except Exception as e:
+            snapshot.fallar_modelo(e)
+            print(f"❌ Error al cargar el modelo del snapshot {version}: {snapshot.error_modelo}")
+
+    if esperar_modelo:
+        completar_modelo()
+        # Sin hilos de carga vivos (el servidor multiproceso hace fork después)
+        ejecutor.shutdown(wait=True)
+        if snapshot.error_modelo is not None:
+            raise RuntimeError(snapshot.error_modelo)
+    else:
+        threading.Thread(target=completar_modelo, daemon=True, name="carga-modelo").start()
+
+    return snapshot
+
+
+class GestorSnapshots:
+    """
+    Mantiene el snapshot vigente y lo reemplaza atómicamente al recargar.
+
+    Args:
+        constructor: función constructor(anterior, esperar_modelo) -> SnapshotServicio
+        rutas: rutas de los artefactos (para el vigilante de archivos)
+    """
+
+    def __init__(self, constructor, rutas):
+        self.constructor = constructor
+        self.rutas = rutas
+        self.actual = None
+
+        self._lock = threading.Lock()
+        self.recargando = False
+        self.recargas_exitosas = 0
+        self.ultima_recarga = None
+        self.ultimo_error = None
+        # Huellas de los artefactos con los que falló la última recarga: el
+        # vigilante no reintenta hasta que los archivos vuelvan a cambiar
+        self.huellas_fallidas = None
+        self._vigilante = None
+
+    def _reservar(self):
+        """Marca una carga en curso; False si ya había una."""
+        with self._lock:
+            if self.recargando:
+                return False
+            self.recargando = True
+            return True
+
+    def _liberar(self):
+        with self._lock:
+            self.recargando = False
+
+    def iniciar_carga(self):
+        """
+        Primera carga en segundo plano, para que el servidor acepte conexiones
+        de inmediato. El snapshot se publica en cuanto sus datos están listos
+        (búsquedas y EDA responden) y el modelo termina de cargarse después.
+        """
+        if not self._reservar():
+            return False
+        threading.Thread(target=self._cargar_inicial, daemon=True, name="carga-inicial").start()
+        return True
+
+    def _cargar_inicial(self):
+        try:
+            snapshot = self.constructor(None, esperar_modelo=False)
+            self.actual = snapshot
+            snapshot.carga_modelo_terminada.wait()
+            if snapshot.modelo_listo:
+                print("\n✓ TODOS LOS COMPONENTES CARGADOS EXITOSAMENTE")
+                self._limpiar_memoria_compartida(snapshot)
+            else:
+                self.ultimo_error = snapshot.error_modelo
+        except Exception as e:
+            self.ultimo_error = f"{type(e).__name__}: {e}"
+            print(f"❌ Error en la carga inicial: {self.ultimo_error}")
+        finally:
+            self._liberar()
+
+    def cargar(self):
+        """Primera carga bloqueante (datos y modelo) para uso fuera del servidor."""
+        self.actual = self.constructor(None, esperar_modelo=True)
+        self._limpiar_memoria_compartida(self.actual)
+        return self.actual
+
+    def recargar_en_segundo_plano(self, motivo="manual"):
+        """
+        Inicia la construcción de un snapshot nuevo en un hilo aparte.
+
+        Returns:
+            True si se inició, False si ya había una carga o recarga en curso
+        """
+        if not self._reservar():
+            return False
+        threading.Thread(target=self._recargar, args=(motivo,), daemon=True, name="recarga-snapshot").start()
+        return True
+
+    def _recargar(self, motivo):
+        inicio = time.perf_counter()
+        print(f"\n🔄 Recargando snapshot de servicio (motivo: {motivo})...")
+        huellas = huellas_artefactos(self.rutas)
+        try:
+            # Se publica solo cuando está completo (datos y modelo)
+            nuevo = self.constructor(self.actual, esperar_modelo=True)
+            anterior, self.actual = self.actual, nuevo
+            self.recargas_exitosas += 1
+            self.ultimo_error = None
+            self.huellas_fallidas = None
+            self.ultima_recarga = {
+                "motivo": motivo,
+                "version_anterior": anterior.version if anterior is not None else None,
+                "version_nueva": nuevo.version,
+                "duracion_segundos": round(time.perf_counter() - inicio, 2),
+                "fecha": datetime.now().isoformat(timespec="seconds")
+            }
+            print(f"✓ Snapshot {nuevo.version} activo"
+                  f"{f' (reemplaza a {anterior.version})' if anterior is not None else ''}")
+            self._limpiar_memoria_compartida(nuevo)
+        except Exception as e:
+            self.ultimo_error = f"{type(e).__name__}: {e}"
+            self.huellas_fallidas = huellas
+            version = self.actual.version if self.actual is not None else None
+            print(f"❌ Error al recargar snapshot, se mantiene {version}: {self.ultimo_error}")
+        finally:
+            self._liberar()
+
+    def _limpiar_memoria_compartida(self, snapshot):
+        """
+        Borra los grupos de arrays compartidos que ya no se usan: se conservan
+        los del snapshot publicado y los más recientes de cada prefijo (los
+        que otros workers pueden seguir usando).
+        """
+        if snapshot.directorio_compartido is None:
+            return
+        try:
+            borrados = limpiar_grupos(snapshot.directorio_compartido, en_uso=snapshot.grupos_compartidos)
+        except OSError as e:
+            print(f"⚠️  No se pudo limpiar la caché compartida: {e}")
+            return
+        if borrados:
+            print(f"✓ Caché compartida: {len(borrados)} grupos sin uso borrados "
+                  f"({', '.join(os.path.basename(ruta) for ruta in borrados)})")
+
+    def iniciar_vigilancia(self, intervalo_segundos=30):
+        """
+        Vigila (por sondeo de mtime/tamaño) los artefactos y recarga cuando
+        cambian. Espera a que la huella se mantenga estable entre dos sondeos
+        para no recargar archivos a medio escribir. Si la recarga falla no la
+        repite con los mismos archivos: espera a que vuelvan a cambiar.
+        """
+        if self._vigilante is not None:
+            return
+
+        def vigilar():
+            pendiente = None
+            while True:
+                time.sleep(intervalo_segundos)
+                if self.actual is None:
+                    continue
+                huellas = huellas_artefactos(self.rutas)
+                if huellas == self.actual.huellas or huellas == self.huellas_fallidas:
+                    pendiente = None
+                elif huellas == pendiente:
+                    if self.recargar_en_segundo_plano(motivo="cambio en archivos de datos"):
+                        pendiente = None
+                else:
+                    pendiente = huellas
+
+        self._vigilante = threading.Thread(target=vigilar, daemon=True, name="vigilante-datos")
+        self._vigilante.start()
+        print(f"👀 Vigilando cambios en artefactos cada {intervalo_segundos} s")
+
+    def estado(self):
+        """Versión vigente, componentes listos y estado de las recargas."""
+        actual = self.actual
+        return {
+            "version_snapshot": actual.version if actual is not None else None,
+            "creado_en": actual.creado_en if actual is not None else None,
+            "total_jugadores": len(actual.df_jugadores) if actual is not None else 0,
+            "datos_listos": actual is not None,
+            "modelo_listo": actual is not None and actual.modelo_listo,
+            "error_modelo": actual.error_modelo if actual is not None else None,
+            "recargando": self.recargando,
+            "recargas_exitosas": self.recargas_exitosas,
+            "ultima_recarga": self.ultima_recarga,
+            "ultimo_error": self.ultimo_error,
+            "vigilancia_activa": self._vigilante is not None
+        }
@@ -1,18 +1,149 @@
 """
 Módulo de Carga de Datos
 Sistema de Scouting FIFA
+
+Parsear el Excel con openpyxl es el paso más lento del pipeline. Cada hoja
+se convierte una sola vez a Parquet, en paralelo (un proceso por hoja), en
+una caché identificada por el hash del libro: mientras fifa.xlsx no cambie,
+las siguientes ejecuciones leen los Parquet sin abrir el Excel.
 """
 
+import hashlib
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
 import pandas as pd
 
 
-def cargar_datos_fifa(ruta_archivo):
+# Caché de hojas convertidas: <carpeta del libro>/cache_hojas/<hash del libro>/
+DIRECTORIO_CACHE_HOJAS = "cache_hojas"
+MANIFIESTO_CACHE = "hojas.json"
+
+
+def hash_archivo(ruta, tamaño_bloque=1 << 20):
+    """SHA-256 del contenido del archivo."""
+    resumen = hashlib.sha256()
+    with open(ruta, "rb") as archivo:
+        for bloque in iter(lambda: archivo.read(tamaño_bloque), b""):
+            resumen.update(bloque)
+    return resumen.hexdigest()
+
+
+def normalizar_columnas_mixtas(df):
+    """
+    Convierte a texto las columnas object que mezclan tipos (p. ej. '68+2'
+    junto a 68 en las columnas de valoración por posición): Parquet necesita
+    un tipo por columna. Los nulos se conservan.
+
+    Returns:
+        lista de columnas convertidas
+    """
+    convertidas = []
+    for columna in df.columns:
+        if df[columna].dtype == object:
+            tipo = pd.api.types.infer_dtype(df[columna], skipna=True)
+            if tipo.startswith("mixed") and tipo != "mixed-integer-float":
+                df[columna] = df[columna].map(lambda valor: valor if pd.isna(valor) else str(valor))
+                convertidas.append(columna)
+    return convertidas
+
+
+def convertir_hoja(ruta_archivo, nombre_hoja, ruta_parquet):
+    """
+    Parsea una hoja del Excel y la guarda como Parquet (se ejecuta en un
+    proceso del pool).
+
+    Returns:
+        dict con hoja, segundos de parseo, filas y columnas normalizadas
+    """
+    inicio = time.perf_counter()
+    df = pd.read_excel(ruta_archivo, sheet_name=nombre_hoja)
+    segundos = time.perf_counter() - inicio
+
+    columnas_mixtas = normalizar_columnas_mixtas(df)
+    ruta_temporal = f"{ruta_parquet}.tmp-{os.getpid()}"
+    df.to_parquet(ruta_temporal, engine="pyarrow", index=False)
+    os.replace(ruta_temporal, ruta_parquet)
+
+    return {
+        "hoja": nombre_hoja,
+        "segundos": round(segundos, 3),
+        "filas": len(df),
+        "columnas_mixtas": columnas_mixtas
+    }
+
+
+def convertir_hojas_excel(ruta_archivo, directorio, max_procesos=None):
+    """
+    Convierte todas las hojas del Excel a Parquet en paralelo y escribe el
+    manifiesto de la caché (orden de hojas, archivos y tiempos de parseo).
+
+    Args:
+        ruta_archivo: Ruta al archivo Excel
+        directorio: carpeta de la caché para este libro (se crea)
+        max_procesos: procesos del pool (por defecto, uno por hoja hasta os.cpu_count())
+
+    Returns:
+        dict manifiesto
+    """
+    os.makedirs(directorio, exist_ok=True)
+    directorio_base = os.path.dirname(directorio)
+    ruta_gitignore = os.path.join(directorio_base, ".gitignore")
+    if not os.path.exists(ruta_gitignore):
+        with open(ruta_gitignore, "w", encoding="utf-8") as archivo:
+            archivo.write("# Caché de hojas del Excel convertidas a Parquet (se regenera sola)\n*\n")
+
+    with pd.ExcelFile(ruta_archivo) as xl:
+        nombres_hojas = xl.sheet_names
+
+    archivos = {
+        hoja: f"{i:02d}_{re.sub(r'[^0-9A-Za-z_-]+', '_', hoja)}.parquet"
+        for i, hoja in enumerate(nombres_hojas)
+    }
+    total_procesos = max_procesos or min(len(nombres_hojas), os.cpu_count() or 1)
+    print(f"Parseando {len(nombres_hojas)} hojas en {total_procesos} procesos...")
+
+    inicio = time.perf_counter()
+    resultados = {}
+    with ProcessPoolExecutor(max_workers=total_procesos) as pool:
+        futuros = [
+            pool.submit(convertir_hoja, ruta_archivo, hoja, os.path.join(directorio, archivos[hoja]))
+            for hoja in nombres_hojas
+        ]
+        for futuro in as_completed(futuros):
+            resultado = futuro.result()
+            resultados[resultado["hoja"]] = resultado
+            print(f"   {resultado['hoja']}: {resultado['filas']:,} filas parseadas en {resultado['segundos']:.2f} s")
+            if resultado["columnas_mixtas"]:
+                print(f"      (columnas con tipos mezclados guardadas como texto: {', '.join(resultado['columnas_mixtas'])})")
+
+    manifiesto = {
+        "archivo": os.path.basename(ruta_archivo),
+        "segundos_totales": round(time.perf_counter() - inicio, 3),
+        "hojas": [dict(resultados[hoja], archivo=archivos[hoja]) for hoja in nombres_hojas]
+    }
+    # El manifiesto se escribe al final: sin él la caché se considera incompleta
+    ruta_manifiesto = os.path.join(directorio, MANIFIESTO_CACHE)
+    with open(f"{ruta_manifiesto}.tmp", "w", encoding="utf-8") as archivo:
+        json.dump(manifiesto, archivo, ensure_ascii=False, indent=2)
+    os.replace(f"{ruta_manifiesto}.tmp", ruta_manifiesto)
+    return manifiesto
+
+
+def cargar_datos_fifa(ruta_archivo, directorio_cache=None, max_procesos=None):
    """
    Carga TODAS las hojas del archivo Excel FIFA y las une en un solo DataFrame.
    Agrega columna 'año_datos' para identificar de qué versión FIFA viene cada registro.
+   Las hojas se leen de la caché Parquet del libro; si el libro cambió (o es la
+   primera vez) se parsean en paralelo y se guardan en la caché.
    
    Args:
    ruta_archivo: Ruta al archivo Excel con datos FIFA
+   directorio_cache: Carpeta de la caché (por defecto cache_hojas/ junto al libro)
+   max_procesos: Procesos para parsear hojas (por defecto uno por hoja)
    
    Returns:
    DataFrame unificado con todas las hojas
@@ -22,22 +153,39 @@ def cargar_datos_fifa(ruta_archivo):
    print("="*60)
    print(f"Archivo: {ruta_archivo}\n")
    
-   # Leer archivo Excel
-   xl = pd.ExcelFile(ruta_archivo)
+   # Caché identificada por el contenido del libro
+   hash_libro = hash_archivo(ruta_archivo)
+   if directorio_cache is None:
+       directorio_cache = os.path.join(os.path.dirname(os.path.abspath(ruta_archivo)), DIRECTORIO_CACHE_HOJAS)
+   directorio = os.path.join(directorio_cache, hash_libro[:16])
+   ruta_manifiesto = os.path.join(directorio, MANIFIESTO_CACHE)
+   
+   if os.path.exists(ruta_manifiesto):
+       with open(ruta_manifiesto, encoding="utf-8") as archivo:
+           manifiesto = json.load(archivo)
+       print(f"Caché de hojas vigente ({hash_libro[:16]}): no se parsea el Excel")
+       print(f"   (parseo original: {manifiesto['segundos_totales']:.2f} s)")
+   else:
+       print(f"Libro nuevo o modificado ({hash_libro[:16]}): convirtiendo hojas a Parquet...")
+       manifiesto = convertir_hojas_excel(ruta_archivo, directorio, max_procesos)
+       print(f"   Conversión completa en {manifiesto['segundos_totales']:.2f} s")
    
-   print(f"Hojas encontradas: {len(xl.sheet_names)}")
-   for sheet in xl.sheet_names:
-       print(f"   - {sheet}")
+   print(f"\nHojas encontradas: {len(manifiesto['hojas'])}")
+   for hoja in manifiesto['hojas']:
+       print(f"   - {hoja['hoja']}")
    
    print("\nProcesando hojas...")
    
    dataframes = []
    
-   for sheet_name in xl.sheet_names:
+   for hoja in manifiesto['hojas']:
+       sheet_name = hoja['hoja']
        print(f"\n   Cargando {sheet_name}...", end=" ")
        
-       # Leer hoja
-       df_temp = pd.read_excel(xl, sheet_name=sheet_name)
+       # Leer hoja convertida (parseo del Excel: hoja['segundos'])
+       inicio = time.perf_counter()
+       df_temp = pd.read_parquet(os.path.join(directorio, hoja['archivo']))
+       segundos_lectura = time.perf_counter() - inicio
        
        # Extraer año del nombre de la hoja (ej: "FIFA 21" -> 2021)
        try:
@@ -51,7 +199,7 @@ def cargar_datos_fifa(ruta_archivo):
        
        dataframes.append(df_temp)
        
-       print(f"OK - {len(df_temp):,} jugadores")
+       print(f"OK - {len(df_temp):,} jugadores (Excel {hoja['segundos']:.2f} s, Parquet {segundos_lectura:.2f} s)")
    
    # Unir todos los DataFrames
    print("\nUniendo todas las hojas...")
@@ -0,0 +1,295 @@
+"""
+Módulo de DAG del Pipeline
+Sistema de Scouting FIFA
+
+El pipeline de limpieza se declara como una lista de pasos con entradas y
+salida explícitas. La salida de cada paso se guarda como checkpoint Parquet
+identificado por una clave que combina:
+
+- el código del paso (la función y las funciones/constantes del proyecto
+  que usa, ver huella_codigo),
+- sus parámetros,
+- las claves de sus entradas (que a su vez dependen de todo lo anterior),
+- el contenido de los archivos que lee (p. ej. fifa.xlsx).
+
+Al volver a ejecutar, los pasos cuya clave ya tiene checkpoint no se
+ejecutan, y sus checkpoints solo se leen si un paso posterior los necesita:
+cambiar una feature de nuevas_caracteristicas.py re-ejecuta ese paso y los
+siguientes a partir del checkpoint del paso anterior, sin abrir el Excel.
+"""
+
+import hashlib
+import inspect
+import json
+import os
+import re
+import time
+
+import pandas as pd
+
+from scripts.limpieza.cargador_datos import hash_archivo
+
+
+MANIFIESTO_PIPELINE = "manifiesto.json"
+
+# Constantes de módulo que forman parte de la huella del código de un paso
+TIPOS_CONSTANTES = (str, int, float, bool, tuple, list, dict, set, frozenset, re.Pattern)
+
+
+class Paso:
+    """
+    Paso del pipeline: salida = funcion(*entradas, **parametros).
+
+    Args:
+        id: identificador corto y ordenable ("2.1")
+        nombre: descripción para los mensajes
+        funcion: función del paso
+        entradas: nombres de las salidas de pasos anteriores que recibe
+        salida: nombre del DataFrame que produce
+        parametros: argumentos adicionales por nombre
+        archivos: archivos que lee el paso (su contenido entra en la clave)
+        fase: título de la fase (se imprime al cambiar de fase)
+    """
+
+    def __init__(self, id, nombre, funcion, salida, entradas=(), parametros=None, archivos=(), fase=None):
+        self.id = id
+        self.nombre = nombre
+        self.funcion = funcion
+        self.salida = salida
+        self.entradas = tuple(entradas)
+        self.parametros = parametros or {}
+        self.archivos = tuple(archivos)
+        self.fase = fase
+
+    def __repr__(self):
+        return f"Paso({self.id} {self.nombre}: {', '.join(self.entradas) or '-'} -> {self.salida})"
+
+
+# ============================================================================
+# CLAVES DE CACHÉ
+# ============================================================================
+
+def nombres_referenciados(codigo):
+    """Nombres globales que usa un code object (incluidas funciones anidadas)."""
+    nombres = set(codigo.co_names)
+    for constante in codigo.co_consts:
+        if inspect.iscode(constante):
+            nombres |= nombres_referenciados(constante)
+    return nombres
+
+
+def huella_codigo(funcion, _vistas=None):
+    """
+    Hash del código fuente de la función, de las funciones del proyecto
+    (módulos scripts.*) que llama y de las constantes de módulo que usa.
+    Cambiar cualquiera de ellas cambia la huella.
+    """
+    vistas = set() if _vistas is None else _vistas
+    if funcion in vistas:
+        return ""
+    vistas.add(funcion)
+
+    partes = [inspect.getsource(funcion)]
+    for nombre in sorted(nombres_referenciados(funcion.__code__)):
+        valor = funcion.__globals__.get(nombre)
+        if inspect.isfunction(valor) and valor.__module__.startswith("scripts."):
+            partes.append(huella_codigo(valor, vistas))
+        elif isinstance(valor, TIPOS_CONSTANTES):
+            # Los sets no tienen orden estable entre ejecuciones
+            texto = repr(sorted(valor, key=repr)) if isinstance(valor, (set, frozenset)) else repr(valor)
+            partes.append(f"{nombre}={texto}")
+    return hashlib.sha256("\n".join(partes).encode("utf-8")).hexdigest()
+
+
+def calcular_claves(pasos):
+    """
+    Clave de cada paso, en orden. Valida que cada entrada la produzca un
+    paso anterior (el orden declarado debe ser un orden topológico).
+
+    Returns:
+        dict {id del paso: clave}
+    """
+    claves = {}
+    clave_por_salida = {}
+    for paso in pasos:
+        faltantes = [entrada for entrada in paso.entradas if entrada not in clave_por_salida]
+        if faltantes:
+            raise ValueError(f"{paso}: entradas sin un paso anterior que las produzca: {faltantes}")
+        partes = [
+            paso.id,
+            huella_codigo(paso.funcion),
+            repr(sorted(paso.parametros.items())),
+            *(clave_por_salida[entrada] for entrada in paso.entradas),
+            *(hash_archivo(ruta) for ruta in paso.archivos)
+        ]
+        claves[paso.id] = hashlib.sha256("\n".join(partes).encode("utf-8")).hexdigest()[:16]
+        clave_por_salida[paso.salida] = claves[paso.id]
+    return claves
+
+
+# ============================================================================
+# CHECKPOINTS
+# ============================================================================
+
+def nombre_checkpoint(paso, clave):
+    return f"{paso.id}-{paso.salida}-{clave}.parquet"
+
+
+def leer_manifiesto(directorio):
+    ruta = os.path.join(directorio, MANIFIESTO_PIPELINE)
+    if not os.path.exists(ruta):
+        return {}
+    with open(ruta, encoding="utf-8") as archivo:
+        return json.load(archivo)
+
+
+def escribir_manifiesto(directorio, manifiesto):
+    ruta = os.path.join(directorio, MANIFIESTO_PIPELINE)
+    with open(f"{ruta}.tmp", "w", encoding="utf-8") as archivo:
+        json.dump(manifiesto, archivo, ensure_ascii=False, indent=2)
+    os.replace(f"{ruta}.tmp", ruta)
+
+
+def guardar_checkpoint(df, directorio, paso, clave):
+    """
+    Guarda la salida del paso como Parquet (con índice) y borra los
+    checkpoints anteriores del mismo paso.
+
+    Returns:
+        nombre del archivo, o None si la salida no se puede guardar en Parquet
+    """
+    nombre = nombre_checkpoint(paso, clave)
+    ruta = os.path.join(directorio, nombre)
+    try:
+        df.to_parquet(f"{ruta}.tmp", engine="pyarrow")
+    except (ValueError, TypeError, NotImplementedError) as e:
+        print(f"   ⚠️  Salida de {paso.id} no se puede guardar en Parquet ({e}): sin checkpoint")
+        if os.path.exists(f"{ruta}.tmp"):
+            os.remove(f"{ruta}.tmp")
+        return None
+    os.replace(f"{ruta}.tmp", ruta)
+
+    prefijo = f"{paso.id}-{paso.salida}-"
+    for anterior in os.listdir(directorio):
+        if anterior.startswith(prefijo) and anterior != nombre:
+            os.remove(os.path.join(directorio, anterior))
+    return nombre
+
+
+def preparar_directorio(directorio):
+    os.makedirs(directorio, exist_ok=True)
+    ruta_gitignore = os.path.join(directorio, ".gitignore")
+    if not os.path.exists(ruta_gitignore):
+        with open(ruta_gitignore, "w", encoding="utf-8") as archivo:
+            archivo.write("# Checkpoints del pipeline de limpieza (se regeneran solos)\n*\n")
+
+
+def buscar_paso(pasos, referencia):
+    """Paso por id ("4.7") o por nombre de su salida."""
+    for paso in pasos:
+        if referencia in (paso.id, paso.salida):
+            return paso
+    disponibles = ", ".join(f"{paso.id} ({paso.salida})" for paso in pasos)
+    raise ValueError(f"Paso '{referencia}' no existe. Pasos: {disponibles}")
+
+
+# ============================================================================
+# EJECUCIÓN
+# ============================================================================
+
+def ejecutar_pipeline(pasos, directorio_cache, desde=None, medidor=None):
+    """
+    Ejecuta los pasos que no tienen checkpoint vigente.
+
+    Args:
+        pasos: lista de Paso en orden topológico
+        directorio_cache: carpeta de checkpoints
+        desde: id o salida de un paso: ese paso y los siguientes se ejecutan
+            siempre; los anteriores se toman de su último checkpoint aunque
+            su clave no coincida
+        medidor: MedidorPasos opcional (tiempo y memoria de cada paso)
+
+    Returns:
+        dict {salida: DataFrame} con las salidas de los pasos finales
+        (las que ningún paso consume)
+    """
+    preparar_directorio(directorio_cache)
+    manifiesto = leer_manifiesto(directorio_cache)
+    claves = calcular_claves(pasos)
+    indice_desde = pasos.index(buscar_paso(pasos, desde)) if desde is not None else None
+
+    consumidas = {entrada for paso in pasos for entrada in paso.entradas}
+    en_memoria = {}
+    checkpoints = {}
+    fase_actual = None
+
+    def obtener(salida):
+        if salida not in en_memoria:
+            if checkpoints.get(salida) is None:
+                raise RuntimeError(
+                    f"No hay checkpoint de '{salida}' para reanudar desde {desde}: ejecuta el pipeline sin --desde"
+                )
+            en_memoria[salida] = pd.read_parquet(os.path.join(directorio_cache, checkpoints[salida]))
+        return en_memoria[salida]
+
+    for i, paso in enumerate(pasos):
+        if paso.fase and paso.fase != fase_actual:
+            fase_actual = paso.fase
+            print("\n" + "="*70)
+            print(paso.fase)
+            print("="*70)
+
+        clave = claves[paso.id]
+        archivo = nombre_checkpoint(paso, clave)
+        reanudando = indice_desde is not None and i < indice_desde
+
+        if indice_desde is not None and i >= indice_desde:
+            archivo = None
+        elif not os.path.exists(os.path.join(directorio_cache, archivo)):
+            archivo = None
+            registro = manifiesto.get(paso.id)
+            if reanudando and registro and os.path.exists(os.path.join(directorio_cache, registro["archivo"])):
+                # --desde: se reanuda con el último checkpoint aunque el código o la entrada hayan cambiado
+                print(f"   ⚠️  Paso {paso.id}: se usa el último checkpoint ({registro['clave']}), clave actual {clave}")
+                archivo = registro["archivo"]
+
+        if archivo is not None or reanudando:
+            # Con --desde, un paso anterior sin checkpoint solo falla si alguien lo necesita
+            checkpoints[paso.salida] = archivo
+            registro = manifiesto.get(paso.id, {})
+            estado = "✓ checkpoint vigente" if archivo is not None else "⚠️  sin checkpoint"
+            print(f"\n Paso {paso.id}: {paso.nombre} {estado} "
+                  f"(ejecución original: {registro.get('segundos', 0):.2f} s)")
+            if medidor is not None:
+                with medidor.paso(f"{paso.id} {paso.nombre} (caché)"):
+                    pass
+            continue
+
+        print(f"\n Paso {paso.id}: {paso.nombre}")
+        inicio = time.perf_counter()
+        if medidor is not None:
+            with medidor.paso(f"{paso.id} {paso.nombre}"):
+                df = paso.funcion(*(obtener(entrada) for entrada in paso.entradas), **paso.parametros)
+        else:
+            df = paso.funcion(*(obtener(entrada) for entrada in paso.entradas), **paso.parametros)
+        segundos = time.perf_counter() - inicio
+
+        if df is None:
+            raise RuntimeError(f"El paso {paso.id} ({paso.nombre}) no produjo datos")
+        en_memoria[paso.salida] = df
+
+        nombre = guardar_checkpoint(df, directorio_cache, paso, clave)
+        if nombre is not None:
+            checkpoints[paso.salida] = nombre
+            manifiesto[paso.id] = {
+                "nombre": paso.nombre,
+                "salida": paso.salida,
+                "clave": clave,
+                "archivo": nombre,
+                "segundos": round(segundos, 3),
+                "filas": len(df),
+                "columnas": len(df.columns)
+            }
+            escribir_manifiesto(directorio_cache, manifiesto)
+
+    return {paso.salida: obtener(paso.salida) for paso in pasos if paso.salida not in consumidas}
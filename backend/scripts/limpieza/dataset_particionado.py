@@ -0,0 +1,226 @@
+"""
+Módulo de Dataset Particionado
+Sistema de Scouting FIFA
+
+El dataset limpio se guarda como Parquet particionado por año
+(datos/procesados/fifa_limpio/año_datos=2015/parte-0.parquet, ...), con
+tipos ya optimizados: textos repetitivos como categorías (diccionarios de
+Parquet/Arrow) y enteros reducidos. Quien lo lee pide solo las columnas y
+los años que necesita y recibe los tipos tal como se guardaron, sin volver
+a inferirlos como con el CSV.
+
+Cada escritura se hace en una carpeta temporal que reemplaza a la anterior
+con un rename; la versión reemplazada queda en fifa_limpio.anterior (sin
+copiar archivos, a diferencia de los backups CSV completos).
+"""
+
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from scripts.ml.formato_arrow import reducir_enteros
+
+
+COLUMNA_PARTICION = "año_datos"
+PARTICIONADO = ds.partitioning(pa.schema([(COLUMNA_PARTICION, pa.int16())]), flavor="hive")
+SUFIJO_ANTERIOR = ".anterior"
+
+# Textos repetitivos que se guardan como categorías
+COLUMNAS_CATEGORICAS = [
+    'club', 'liga', 'nacionalidad', 'posiciones_jugador',
+    'pie_preferido', 'categoria_posicion', 'categoria_edad',
+    'categoria_reputacion', 'clasificacion_ml'
+]
+
+# Columnas enteras que pueden llegar como float (p. ej. desde un CSV)
+COLUMNAS_ENTERAS = [
+    'edad', 'valoracion_global', 'potencial', 'altura_cm', 'peso_kg',
+    'reputacion_internacional', 'pie_debil', COLUMNA_PARTICION
+]
+
+
+def tipar_dataset(df):
+    """
+    Optimiza los tipos del dataset sin cambiar sus valores: categorías para
+    COLUMNAS_CATEGORICAS, float -> entero en COLUMNAS_ENTERAS cuando no hay
+    nulos ni decimales, y enteros reducidos al tipo más pequeño.
+
+    Returns:
+        lista de (columna, dtype anterior, dtype nuevo) de las columnas cambiadas
+    """
+    cambios = []
+    for col in COLUMNAS_CATEGORICAS:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            antes = df[col].dtype
+            df[col] = df[col].astype('category')
+            cambios.append((col, antes, df[col].dtype))
+
+    for col in COLUMNAS_ENTERAS:
+        if col in df.columns and df[col].dtype.kind == 'f':
+            valores = df[col].to_numpy()
+            if not np.isnan(valores).any() and np.array_equal(valores, np.trunc(valores)):
+                antes = df[col].dtype
+                df[col] = df[col].astype('int64')
+                cambios.append((col, antes, df[col].dtype))
+
+    cambios.extend(reducir_enteros(df))
+    return cambios
+
+
+def guardar_dataset_particionado(df, directorio):
+    """
+    Guarda el DataFrame como Parquet particionado por año_datos y reemplaza
+    de forma atómica la versión anterior (que queda en <directorio>.anterior).
+
+    Args:
+        df: DataFrame con la columna año_datos (se recomienda tipar_dataset antes)
+        directorio: carpeta del dataset (p. ej. ../datos/procesados/fifa_limpio)
+
+    Returns:
+        lista de (año, filas) de las particiones escritas
+    """
+    if COLUMNA_PARTICION not in df.columns:
+        raise ValueError(f"El dataset no tiene la columna de partición '{COLUMNA_PARTICION}'")
+
+    directorio = os.path.normpath(directorio)
+    temporal = f"{directorio}.tmp-{os.getpid()}"
+    anterior = f"{directorio}{SUFIJO_ANTERIOR}"
+    if os.path.exists(temporal):
+        shutil.rmtree(temporal)
+
+    tabla = pa.Table.from_pandas(df, preserve_index=False)
+    tabla = tabla.set_column(
+        tabla.schema.get_field_index(COLUMNA_PARTICION), COLUMNA_PARTICION,
+        tabla[COLUMNA_PARTICION].cast(pa.int16())
+    )
+    try:
+        ds.write_dataset(
+            tabla, temporal, format="parquet", partitioning=PARTICIONADO,
+            basename_template="parte-{i}.parquet"
+        )
+        if os.path.exists(directorio):
+            if os.path.exists(anterior):
+                shutil.rmtree(anterior)
+            os.replace(directorio, anterior)
+        os.replace(temporal, directorio)
+    finally:
+        if os.path.exists(temporal):
+            shutil.rmtree(temporal)
+
+    conteo = df[COLUMNA_PARTICION].value_counts().sort_index()
+    return [(int(año), int(filas)) for año, filas in conteo.items()]
+
+
+def abrir_dataset(directorio):
+    """
+    Dataset de pyarrow sobre las particiones (solo lee metadatos).
+
+    Raises:
+        FileNotFoundError: si la carpeta no existe
+    """
+    if not os.path.isdir(directorio):
+        raise FileNotFoundError(f"No existe el dataset particionado: {directorio}")
+    return ds.dataset(directorio, format="parquet", partitioning=PARTICIONADO)
+
+
+def columnas_dataset(dataset):
+    """Columnas en el orden original del DataFrame guardado."""
+    metadatos = (dataset.schema.metadata or {}).get(b"pandas")
+    if metadatos is None:
+        return dataset.schema.names
+    return [columna["name"] for columna in json.loads(metadatos)["columns"]]
+
+
+def leer_dataset_particionado(directorio, columnas=None, años=None, categoricas=True):
+    """
+    Lee el dataset particionado. Solo se abren los archivos de los años
+    pedidos y, dentro de ellos, solo las columnas pedidas.
+
+    Args:
+        directorio: carpeta del dataset
+        columnas: columnas a leer (None = todas, en el orden original)
+        años: años a leer (None = todos)
+        categoricas: si es False, las columnas categóricas se devuelven con
+            sus valores planos (como al leer el CSV), p. ej. para ajustar
+            encoders que luego se aplican a valores sueltos
+
+    Returns:
+        DataFrame con índice 0..n-1 y filas ordenadas por año
+
+    Raises:
+        FileNotFoundError: si la carpeta no existe
+        KeyError: si se pide una columna que el dataset no tiene
+    """
+    dataset = abrir_dataset(directorio)
+    disponibles = columnas_dataset(dataset)
+    if columnas is None:
+        columnas = disponibles
+    faltantes = [col for col in columnas if col not in disponibles]
+    if faltantes:
+        raise KeyError(f"Columnas que no están en el dataset: {faltantes}")
+
+    filtro = None
+    if años is not None:
+        filtro = ds.field(COLUMNA_PARTICION).isin([int(año) for año in años])
+
+    tabla = dataset.to_table(columns=list(columnas), filter=filtro)
+    df = tabla.to_pandas()[list(columnas)]
+    return df if categoricas else aplanar_categoricas(df)
+
+
+def recorrer_dataset_particionado(directorio, columnas):
+    """
+    Recorre el dataset archivo por archivo y row group por row group, sin
+    cargarlo completo (el escáner de pyarrow.dataset lee por adelantado
+    mientras el consumidor procesa, y con un consumidor lento acumula casi
+    todo el dataset en memoria).
+
+    Args:
+        directorio: carpeta del dataset
+        columnas: columnas de cada lote (puede incluir año_datos)
+
+    Yields:
+        pyarrow.RecordBatch con las columnas en el orden pedido
+
+    Raises:
+        FileNotFoundError: si la carpeta no existe
+        KeyError: si se pide una columna que el dataset no tiene
+    """
+    dataset = abrir_dataset(directorio)
+    faltantes = [col for col in columnas if col not in columnas_dataset(dataset)]
+    if faltantes:
+        raise KeyError(f"Columnas que no están en el dataset: {faltantes}")
+
+    for fragmento in dataset.get_fragments():
+        particion = ds.get_partition_keys(fragmento.partition_expression)
+        archivo = pq.ParquetFile(fragmento.path)
+        for lote in archivo.iter_batches(columns=[col for col in columnas if col not in particion]):
+            yield pa.RecordBatch.from_arrays(
+                [
+                    pa.array(np.full(lote.num_rows, particion[col]), type=PARTICIONADO.schema.field(col).type)
+                    if col in particion else lote.column(col)
+                    for col in columnas
+                ],
+                names=list(columnas)
+            )
+
+
+def aplanar_categoricas(df):
+    """Convierte en el lugar las columnas categóricas a sus valores planos."""
+    for col in df.columns:
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype(df[col].cat.categories.dtype)
+    return df
+
+
+def tamaño_directorio_mb(directorio):
+    total = 0
+    for raiz, _, archivos in os.walk(directorio):
+        total += sum(os.path.getsize(os.path.join(raiz, archivo)) for archivo in archivos)
+    return total / (1024 * 1024)
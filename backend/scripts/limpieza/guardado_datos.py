@@ -6,14 +6,22 @@ Sistema de Scouting FIFA
 import pandas as pd
 import os
 
+from scripts.limpieza.dataset_particionado import (
+   tipar_dataset,
+   guardar_dataset_particionado,
+   tamaño_directorio_mb
+)
 
-def guardar_datos_limpios(df, ruta_salida):
+
+def guardar_datos_limpios(df, ruta_salida, ruta_csv=None):
    """
-   Guarda el DataFrame procesado en archivo CSV.
+   Guarda el DataFrame procesado como Parquet particionado por año, con los
+   tipos optimizados (categorías y enteros reducidos). El CSV es opcional.
    
    Args:
    df: DataFrame a guardar
-   ruta_salida: Ruta donde guardar el archivo
+   ruta_salida: Carpeta del dataset particionado
+   ruta_csv: Ruta de una exportación CSV adicional (None = sin CSV)
    
    Returns:
    None
@@ -22,22 +30,31 @@ def guardar_datos_limpios(df, ruta_salida):
    print("GUARDANDO DATOS LIMPIOS")
    print("-"*60)
    
-   # Crear directorio si no existe
-   directorio = os.path.dirname(ruta_salida)
+   # Crear directorio padre si no existe
+   directorio = os.path.dirname(os.path.normpath(ruta_salida))
    if directorio and not os.path.exists(directorio):
        os.makedirs(directorio)
        print(f"   Directorio creado: {directorio}")
    
-   # Guardar CSV
-   print(f"   Guardando archivo...")
-   df.to_csv(ruta_salida, index=False, encoding='utf-8')
+   # Tipos optimizados (sobre una copia superficial: no cambia el df del pipeline)
+   df = df.copy(deep=False)
+   for col, antes, despues in tipar_dataset(df):
+       print(f"   • {col}: {antes} → {despues}")
    
-   # Información del archivo guardado
-   tamaño_mb = os.path.getsize(ruta_salida) / (1024 * 1024)
+   # Guardar Parquet particionado por año
+   print(f"   Guardando particiones...")
+   particiones = guardar_dataset_particionado(df, ruta_salida)
+   tamaño_mb = tamaño_directorio_mb(ruta_salida)
    
    print(f"\n   Archivo guardado exitosamente")
    print(f"   📁 Ruta: {ruta_salida}")
    print(f"   Registros: {df.shape[0]:,}")
    print(f"   Columnas: {df.shape[1]}")
+   print(f"   Particiones: {', '.join(f'{año} ({filas:,})' for año, filas in particiones)}")
    print(f"   💾 Tamaño: {tamaño_mb:.2f} MB")
+   
+   # Exportación CSV opcional
+   if ruta_csv is not None:
+       df.to_csv(ruta_csv, index=False, encoding='utf-8')
+       print(f"   📄 CSV exportado: {ruta_csv} ({os.path.getsize(ruta_csv) / (1024 * 1024):.2f} MB)")
    print("-"*60)
@@ -23,7 +23,7 @@ def imputar_valores_nulos(df):
    print(" IMPUTANDO VALORES NULOS")
    print("-"*60)
    
-   df_imputado = df.copy()
+   df_imputado = df.copy(deep=False)
    nulos_antes = df_imputado.isnull().sum().sum()
    
    print(f"  Total de nulos antes: {nulos_antes:,}")
@@ -37,7 +37,9 @@ def imputar_valores_nulos(df):
        nulos_col = df_imputado[col].isnull().sum()
        if nulos_col > 0:
            mediana = df_imputado[col].median()
-           df_imputado[col].fillna(mediana, inplace=True)
+           # Se reemplaza la columna: con copy-on-write, df[col].fillna(inplace=True)
+           # modificaría una copia temporal y df quedaría igual
+           df_imputado[col] = df_imputado[col].fillna(mediana)
            columnas_num_imputadas += 1
            if columnas_num_imputadas <= 5:
                print(f"   {col}: {nulos_col} nulos -> mediana = {mediana:.2f}")
@@ -53,7 +55,7 @@ def imputar_valores_nulos(df):
    for col in columnas_categoricas:
        nulos_col = df_imputado[col].isnull().sum()
        if nulos_col > 0:
-           df_imputado[col].fillna('Desconocido', inplace=True)
+           df_imputado[col] = df_imputado[col].fillna('Desconocido')
            columnas_cat_imputadas += 1
            if columnas_cat_imputadas <= 5:
                print(f"   {col}: {nulos_col} nulos -> 'Desconocido'")
@@ -81,7 +83,7 @@ def imputar_atributos_porteros(df):
    Returns:
    DataFrame con atributos de portero imputados
    """
-   df_imputado = df.copy()
+   df_imputado = df.copy(deep=False)
    
    # Columnas de portero (YA están en español desde el renombrado)
    columnas_portero = [
@@ -93,7 +95,7 @@ def imputar_atributos_porteros(df):
    columnas_imputadas = 0
    for col in columnas_portero:
        if col in df_imputado.columns:
-           df_imputado[col].fillna(0, inplace=True)
+           df_imputado[col] = df_imputado[col].fillna(0)
            columnas_imputadas += 1
    
    print(f"   Atributos de portero imputados: {columnas_imputadas} columnas")
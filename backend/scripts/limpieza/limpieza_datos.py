@@ -3,9 +3,43 @@ Módulo de Limpieza de Datos
 Sistema de Scouting FIFA
 """
 
+import re
+
+import numpy as np
 import pandas as pd
 
 
+# Montos como '€1.5M', '€300K', '$950', '1500000': número y sufijo opcional.
+# Los símbolos de moneda y espacios alrededor se ignoran.
+PATRON_MONETARIO = re.compile(
+    r"^[€$\s]*(?P<numero>[-+]?(?:\d+(?:\.\d*)?|\.\d+)(?:[eE][-+]?\d+)?)\s*(?P<sufijo>[MK]?)[€$\s]*$"
+)
+MULTIPLICADORES_MONETARIOS = {"": 1.0, "K": 1_000.0, "M": 1_000_000.0}
+
+
+def convertir_montos(serie):
+    """
+    Convierte una columna de montos en texto a float con una extracción
+    regex vectorizada y un mapa de multiplicadores por sufijo. Los montos se
+    repiten mucho ('€1.5M', '€500K'...): solo se parsean los valores distintos.
+    Los nulos y los textos que no son un monto quedan como NaN.
+
+    Args:
+        serie: Series con montos (texto o números mezclados)
+
+    Returns:
+        Series float64 con el mismo índice
+    """
+    codigos, unicos = pd.factorize(serie)
+    partes = pd.Series(unicos, dtype=object).astype(str).str.extract(PATRON_MONETARIO)
+    numero = pd.to_numeric(partes["numero"], errors="coerce").to_numpy(dtype="float64")
+    multiplicador = partes["sufijo"].map(MULTIPLICADORES_MONETARIOS).to_numpy(dtype="float64", na_value=np.nan)
+
+    # Los nulos (código -1) toman el NaN agregado al final de la tabla
+    tabla = np.append(numero * multiplicador, np.nan)
+    return pd.Series(tabla[codigos], index=serie.index, name=serie.name)
+
+
 def seleccionar_columnas_relevantes(df):
     """
     Selecciona solo las columnas relevantes para el análisis.
@@ -39,7 +73,7 @@ def seleccionar_columnas_relevantes(df):
         columnas_importantes.append('año_datos')
     
     columnas_existentes = [col for col in columnas_importantes if col in df.columns]
-    df_limpio = df[columnas_existentes].copy()
+    df_limpio = df[columnas_existentes]
     
     print(f"   Columnas seleccionadas: {len(columnas_existentes)}")
     print("-"*60)
@@ -91,26 +125,12 @@ def normalizar_valores_monetarios(df):
     print("NORMALIZANDO VALORES MONETARIOS")
     print("-"*60)
     
-    df_limpio = df.copy()
+    df_limpio = df.copy(deep=False)
     columnas_monetarias = ['valor_mercado_eur', 'salario_eur', 'clausula_rescision_eur']
     
     for col in columnas_monetarias:
         if col in df_limpio.columns and df_limpio[col].dtype not in ['int64', 'float64']:
-            def convertir_monetario(valor):
-                if pd.isna(valor):
-                    return valor
-                valor_str = str(valor).replace('€', '').replace('$', '').strip()
-                if 'M' in valor_str:
-                    return float(valor_str.replace('M', '')) * 1_000_000
-                elif 'K' in valor_str:
-                    return float(valor_str.replace('K', '')) * 1_000
-                else:
-                    try:
-                        return float(valor_str)
-                    except:
-                        return None
-            
-            df_limpio[col] = df_limpio[col].apply(convertir_monetario)
+            df_limpio[col] = convertir_montos(df_limpio[col])
     
     print("   Columnas procesadas")
     print("-"*60)
@@ -126,7 +146,7 @@ def normalizar_fechas(df):
     print("NORMALIZANDO FECHAS")
     print("-"*60)
     
-    df_limpio = df.copy()
+    df_limpio = df.copy(deep=False)
     if 'fecha_nacimiento' in df_limpio.columns:
         df_limpio['fecha_nacimiento'] = pd.to_datetime(df_limpio['fecha_nacimiento'], errors='coerce')
     
@@ -0,0 +1,104 @@
+"""
+Módulo de Medición de Pasos
+Sistema de Scouting FIFA
+
+Tiempo y memoria (RSS y pico de RSS) de cada paso del pipeline. En Linux
+el pico se reinicia antes de cada paso (/proc/self/clear_refs), así que es
+el pico de ese paso; en otros sistemas es el pico acumulado del proceso.
+"""
+
+import os
+import time
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def leer_memoria_mb():
+    """
+    (RSS actual, pico de RSS) del proceso en MB. Sin /proc usa getrusage
+    (solo el pico); en Windows retorna (None, None).
+    """
+    try:
+        campos = {}
+        with open("/proc/self/status", encoding="ascii") as archivo:
+            for linea in archivo:
+                if linea.startswith(("VmRSS:", "VmHWM:")):
+                    nombre, valor = linea.split()[:2]
+                    campos[nombre.rstrip(":")] = int(valor) / 1024
+        return campos.get("VmRSS"), campos.get("VmHWM")
+    except OSError:
+        pass
+
+    if resource is None:
+        return None, None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss: KB en Linux, bytes en macOS
+    return None, pico / (1024 * 1024) if os.uname().sysname == "Darwin" else pico / 1024
+
+
+def reiniciar_pico_memoria():
+    """Reinicia el pico de RSS del proceso (solo Linux). Retorna True si se pudo."""
+    try:
+        with open("/proc/self/clear_refs", "w", encoding="ascii") as archivo:
+            archivo.write("5")
+        return True
+    except OSError:
+        return False
+
+
+class MedidorPasos:
+    """
+    Registra tiempo y memoria de cada paso:
+
+        medidor = MedidorPasos()
+        with medidor.paso("2.1 Selección de columnas"):
+            df = seleccionar_columnas_relevantes(df)
+        medidor.imprimir_resumen()
+    """
+
+    def __init__(self):
+        self.pasos = []
+
+    @contextmanager
+    def paso(self, nombre):
+        pico_reiniciado = reiniciar_pico_memoria()
+        rss_inicio, _ = leer_memoria_mb()
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            segundos = time.perf_counter() - inicio
+            rss_fin, pico = leer_memoria_mb()
+            self.pasos.append({
+                "paso": nombre,
+                "segundos": segundos,
+                "rss_inicio_mb": rss_inicio,
+                "rss_fin_mb": rss_fin,
+                "pico_rss_mb": pico,
+                "pico_del_paso": pico_reiniciado
+            })
+
+    def imprimir_resumen(self):
+        """Tabla con tiempo, RSS y pico de RSS de cada paso."""
+        def mb(valor):
+            return f"{valor:,.1f}" if valor is not None else "n/d"
+
+        print(f"\n {'PASO':<48} {'TIEMPO s':>9} {'RSS MB':>9} {'PICO MB':>9} {'+PICO MB':>9}")
+        print("-" * 89)
+        for paso in self.pasos:
+            extra = None
+            if paso["pico_rss_mb"] is not None and paso["rss_inicio_mb"] is not None:
+                extra = paso["pico_rss_mb"] - paso["rss_inicio_mb"]
+            print(f" {paso['paso'][:48]:<48} {paso['segundos']:>9.2f} {mb(paso['rss_fin_mb']):>9} "
+                  f"{mb(paso['pico_rss_mb']):>9} {mb(extra):>9}")
+        print("-" * 89)
+
+        total = sum(paso["segundos"] for paso in self.pasos)
+        picos = [paso["pico_rss_mb"] for paso in self.pasos if paso["pico_rss_mb"] is not None]
+        print(f" {'TOTAL':<48} {total:>9.2f} {'':>9} {mb(max(picos) if picos else None):>9}")
+        if self.pasos and not self.pasos[0]["pico_del_paso"]:
+            print("  (pico acumulado del proceso: este sistema no permite reiniciarlo por paso)")
@@ -7,6 +7,56 @@ import pandas as pd
 import numpy as np
 
 
+# Posición FIFA (token de posiciones_jugador) -> categoría. Con varias
+# posiciones gana la categoría de mayor prioridad: Portero > Defensa >
+# Mediocampista > Delantero. Tokens que no están en la tabla: 'Otro'.
+PRIORIDAD_CATEGORIAS_POSICION = ['Portero', 'Defensa', 'Mediocampista', 'Delantero']
+CATEGORIA_POR_POSICION = {
+   'GK': 'Portero',
+   'CB': 'Defensa', 'LCB': 'Defensa', 'RCB': 'Defensa', 'LB': 'Defensa', 'RB': 'Defensa',
+   'LWB': 'Defensa', 'RWB': 'Defensa', 'SW': 'Defensa',
+   'CDM': 'Mediocampista', 'LDM': 'Mediocampista', 'RDM': 'Mediocampista',
+   'CM': 'Mediocampista', 'LCM': 'Mediocampista', 'RCM': 'Mediocampista',
+   'CAM': 'Mediocampista', 'LAM': 'Mediocampista', 'RAM': 'Mediocampista',
+   'LM': 'Mediocampista', 'RM': 'Mediocampista',
+   'ST': 'Delantero', 'LS': 'Delantero', 'RS': 'Delantero',
+   'CF': 'Delantero', 'LF': 'Delantero', 'RF': 'Delantero',
+   'LW': 'Delantero', 'RW': 'Delantero'
+}
+# Prioridad numérica de cada token (menor = gana)
+PRIORIDAD_POR_POSICION = {
+   token: PRIORIDAD_CATEGORIAS_POSICION.index(categoria)
+   for token, categoria in CATEGORIA_POR_POSICION.items()
+}
+
+
+def categorizar_posiciones(posiciones):
+   """
+   Categoría de cada valor de posiciones_jugador ('ST, LW', 'CB', ...).
+   Compara tokens completos (sin falsos positivos como 'CB' dentro de 'LCB')
+   y solo categoriza los valores distintos, que son unos cientos.
+   
+   Args:
+   posiciones: Series con posiciones separadas por coma
+   
+   Returns:
+   Series de texto con el mismo índice
+   """
+   codigos, unicos = pd.factorize(posiciones)
+   unicos = pd.Series(unicos, dtype=object)
+   
+   # Un token por fila (posición de la combinación única) y su prioridad
+   tokens = unicos.astype(str).str.upper().str.split(',').explode().str.strip()
+   prioridad = tokens.map(PRIORIDAD_POR_POSICION).groupby(level=0).min()
+   categorias_unicas = prioridad.map(dict(enumerate(PRIORIDAD_CATEGORIAS_POSICION))).fillna('Otro')
+   categorias_unicas = categorias_unicas.reindex(range(len(unicos)), fill_value='Otro')
+   categorias_unicas[unicos.eq('Desconocido')] = 'Desconocido'
+   
+   # Los nulos (código -1) quedan al final de la tabla como 'Desconocido'
+   tabla = np.append(categorias_unicas.to_numpy(dtype=object), 'Desconocido')
+   return pd.Series(tabla[codigos], index=posiciones.index, name='categoria_posicion')
+
+
 def crear_calidad_promedio(df):
    """
    Crea feature 'calidad_promedio' basada en atributos principales.
@@ -21,7 +71,7 @@ def crear_calidad_promedio(df):
    print("-"*60)
    print("   Creando 'calidad_promedio'...")
    
-   df_nuevo = df.copy()
+   df_nuevo = df.copy(deep=False)
    
    # Atributos principales (YA están en español desde el renombrado)
    atributos = ['ritmo_velocidad', 'tiro_disparo', 'pase', 'regate_gambeta', 'defensa', 'fisico']
@@ -48,7 +98,7 @@ def crear_diferencia_potencial(df):
    print("-"*60)
    print("   Creando 'diferencia_potencial'...")
    
-   df_nuevo = df.copy()
+   df_nuevo = df.copy(deep=False)
    
    # Columnas (YA están en español desde el renombrado)
    df_nuevo['diferencia_potencial'] = df_nuevo['potencial'] - df_nuevo['valoracion_global']
@@ -76,7 +126,7 @@ def crear_categoria_edad(df):
    print("-"*60)
    print("   Creando 'categoria_edad'...")
    
-   df_nuevo = df.copy()
+   df_nuevo = df.copy(deep=False)
    
    # Columna edad (YA está en español desde el renombrado)
    df_nuevo['categoria_edad'] = pd.cut(
@@ -97,7 +147,7 @@ def crear_categoria_edad(df):
 
 def crear_categoria_posicion(df):
    """
-   Crea feature 'categoria_posicion' simplificada.
+   Crea feature 'categoria_posicion' simplificada (ver CATEGORIA_POR_POSICION).
    
    Args:
    df: DataFrame
@@ -105,27 +155,10 @@ def crear_categoria_posicion(df):
    Returns:
    DataFrame con nueva columna
    """
-   df_nuevo = df.copy()
+   df_nuevo = df.copy(deep=False)
    
    # Columna posiciones (YA está en español desde el renombrado)
-   def categorizar_posicion(posiciones):
-       if pd.isna(posiciones) or posiciones == 'Desconocido':
-           return 'Desconocido'
-       
-       posiciones_str = str(posiciones).upper()
-       
-       if 'GK' in posiciones_str:
-           return 'Portero'
-       elif any(x in posiciones_str for x in ['CB', 'LB', 'RB', 'LWB', 'RWB']):
-           return 'Defensa'
-       elif any(x in posiciones_str for x in ['CM', 'CDM', 'CAM', 'LM', 'RM']):
-           return 'Mediocampista'
-       elif any(x in posiciones_str for x in ['ST', 'CF', 'LW', 'RW']):
-           return 'Delantero'
-       else:
-           return 'Otro'
-   
-   df_nuevo['categoria_posicion'] = df_nuevo['posiciones_jugador'].apply(categorizar_posicion)
+   df_nuevo['categoria_posicion'] = categorizar_posiciones(df_nuevo['posiciones_jugador'])
    
    print(f"   Feature 'categoria_posicion' creada")
    
@@ -143,7 +176,7 @@ def crear_ratio_valor_salario(df):
    Returns:
    DataFrame con nueva columna
    """
-   df_nuevo = df.copy()
+   df_nuevo = df.copy(deep=False)
    
    # Columnas monetarias (YA están en español desde el renombrado)
    # Convertir salario semanal a anual (52 semanas) y calcular ratio
@@ -172,7 +205,7 @@ def crear_anos_contrato_restantes(df):
    print("-"*60)
    print("   Creando 'anos_contrato_restantes'...")
    
-   df_nuevo = df.copy()
+   df_nuevo = df.copy(deep=False)
    
    # Obtener el año actual del dataset (máximo año presente)
    if 'ano_datos' in df_nuevo.columns:
@@ -206,7 +239,7 @@ def crear_categoria_reputacion(df):
    print("-"*60)
    print("   Creando 'categoria_reputacion'...")
    
-   df_nuevo = df.copy()
+   df_nuevo = df.copy(deep=False)
    
    def categorizar_reputacion(rep):
        if pd.isna(rep):
@@ -164,7 +164,7 @@ def convertir_columnas_minusculas(df):
    print(" CONVIRTIENDO COLUMNAS A MINÚSCULAS")
    print("-"*60)
    
-   df_lower = df.copy()
+   df_lower = df.copy(deep=False)
    df_lower.columns = df_lower.columns.str.lower()
    
    print(f"   Todas las columnas convertidas a minúsculas")
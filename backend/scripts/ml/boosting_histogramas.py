@@ -0,0 +1,70 @@
+"""
+Modelo de Boosting por Histogramas
+Sistema de Scouting FIFA
+
+HistGradientBoostingRegressor de scikit-learn entrenado sobre la misma
+matriz del plan de características que los demás modelos, con manejo nativo
+de categóricas: antes de entrenar y de predecir, cada bloque OneHot del plan
+(categoria_posicion, categoria_edad, pie_preferido, categoria_reputacion,
+liga) se compacta en una columna con el código de la categoría. El boosting
+parte cada categórica por grupos de categorías en lugar de una columna
+binaria por categoría.
+
+Como recibe la matriz del plan, la API, la puntuación masiva y los scripts
+de predicciones lo usan igual que al Random Forest (modelo.predict).
+"""
+
+import numpy as np
+from sklearn.ensemble import HistGradientBoostingRegressor
+
+
+class BoostingHistogramas:
+    """
+    HistGradientBoostingRegressor sobre la matriz del plan de características.
+
+    Args:
+        plan: PlanCaracteristicas con el que se arma X (se guardan solo las
+            posiciones de sus bloques OneHot)
+        **parametros: hiperparámetros de HistGradientBoostingRegressor
+    """
+
+    def __init__(self, plan, **parametros):
+        self.bloques_categoricos = [(inicio, fin) for inicio, fin, _ in plan.bloques_onehot.values()]
+        en_bloques = np.zeros(plan.total_features, dtype=bool)
+        for inicio, fin in self.bloques_categoricos:
+            en_bloques[inicio:fin] = True
+        self.columnas_directas = np.flatnonzero(~en_bloques)
+
+        # Numéricas y club tal cual, después un código por categórica
+        categoricas = np.zeros(len(self.columnas_directas) + len(self.bloques_categoricos), dtype=bool)
+        categoricas[len(self.columnas_directas):] = True
+        self.modelo = HistGradientBoostingRegressor(categorical_features=categoricas, **parametros)
+
+    def compactar(self, X):
+        """
+        Matriz del plan -> numéricas + un código por categórica (índice de la
+        categoría en el bloque OneHot; NaN si el bloque está en cero, es
+        decir, categoría desconocida).
+        """
+        X = np.asarray(X)
+        total_directas = len(self.columnas_directas)
+        compacta = np.empty((X.shape[0], total_directas + len(self.bloques_categoricos)), dtype=np.float64)
+        compacta[:, :total_directas] = X[:, self.columnas_directas]
+        for j, (inicio, fin) in enumerate(self.bloques_categoricos):
+            bloque = X[:, inicio:fin]
+            codigos = bloque.argmax(axis=1).astype(np.float64)
+            codigos[bloque.max(axis=1) == 0] = np.nan
+            compacta[:, total_directas + j] = codigos
+        return compacta
+
+    def fit(self, X, y):
+        self.modelo.fit(self.compactar(X), y)
+        return self
+
+    def predict(self, X):
+        return self.modelo.predict(self.compactar(X))
+
+    @property
+    def n_iter_(self):
+        """Iteraciones (árboles) que se entrenaron antes del early stopping."""
+        return self.modelo.n_iter_
@@ -0,0 +1,191 @@
+"""
+Bosque Compilado (evaluador NumPy de Random Forest)
+Sistema de Scouting FIFA
+
+Convierte un RandomForestRegressor entrenado en arrays contiguos de nodos
+(feature, threshold, hijo izquierdo, hijo derecho, valor) y evalúa filas
+sueltas o lotes pequeños recorriendo TODOS los árboles a la vez, nivel por
+nivel, con operaciones vectorizadas. Evita el despacho por árbol/joblib de
+sklearn, que domina la latencia al predecir una sola fila con 4000 árboles.
+
+Produce las mismas predicciones que modelo.predict (tolerancia de punto
+flotante en la media final). Para lotes grandes sigue siendo mejor
+modelo.predict, que paraleliza por árboles; sin el modelo sklearn (memoria
+compartida) los bloques de un lote grande se reparten entre varios hilos
+(NumPy suelta el GIL en la indexación y las comparaciones).
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+
+# Arrays de nodos que definen el bosque (para guardarlo y mapearlo con mmap)
+ARRAYS_BOSQUE = ("raices", "feature", "threshold", "izquierdo", "derecho", "valor", "nan_izquierda")
+
+
+class BosqueCompilado:
+    """
+    Representación aplanada de un ensamble de árboles de regresión que
+    promedia sus árboles (RandomForestRegressor, ExtraTreesRegressor) o de
+    un DecisionTreeRegressor individual.
+
+    Args:
+        modelo: modelo sklearn entrenado
+        precision: "float64" (por defecto) o "float32". En float32 los
+            umbrales se redondean hacia abajo al float32 más cercano, lo que
+            mantiene exactas las decisiones (sklearn compara X en float32);
+            solo los valores de las hojas pierden precisión.
+        filas_por_bloque: tamaño de bloque para lotes (limita la memoria)
+    """
+
+    def __init__(self, modelo, precision="float64", filas_por_bloque=256):
+        if precision not in ("float64", "float32"):
+            raise ValueError(f"Precisión no soportada: {precision}")
+
+        estimadores = modelo.estimators_ if hasattr(modelo, "estimators_") else [modelo]
+        arboles = [estimador.tree_ for estimador in estimadores]
+
+        self.total_arboles = len(arboles)
+        self.total_features = modelo.n_features_in_
+        self.profundidad_maxima = max(arbol.max_depth for arbol in arboles)
+        self.filas_por_bloque = filas_por_bloque
+        self.precision = precision
+
+        tamaños = np.array([arbol.node_count for arbol in arboles], dtype=np.int64)
+        desplazamientos = np.concatenate([[0], np.cumsum(tamaños)[:-1]])
+        self.raices = desplazamientos.astype(np.int32)
+
+        feature = np.concatenate([arbol.feature for arbol in arboles]).astype(np.int32)
+        threshold = np.concatenate([arbol.threshold for arbol in arboles]).astype(np.float64)
+        izquierdo = np.concatenate([
+            arbol.children_left + desplazamiento
+            for arbol, desplazamiento in zip(arboles, desplazamientos)
+        ]).astype(np.int32)
+        derecho = np.concatenate([
+            arbol.children_right + desplazamiento
+            for arbol, desplazamiento in zip(arboles, desplazamientos)
+        ]).astype(np.int32)
+        valor = np.concatenate([arbol.value[:, 0, 0] for arbol in arboles])
+
+        # sklearn >= 1.3 decide por nodo hacia dónde van los NaN
+        if all(hasattr(arbol, "missing_go_to_left") for arbol in arboles):
+            nan_izquierda = np.concatenate([arbol.missing_go_to_left for arbol in arboles]).astype(bool)
+        else:
+            nan_izquierda = np.zeros(len(feature), dtype=bool)
+
+        # Las hojas apuntan a sí mismas: recorrer más niveles no las mueve
+        hojas = np.flatnonzero(feature < 0)
+        feature[hojas] = 0
+        threshold[hojas] = np.inf
+        izquierdo[hojas] = hojas
+        derecho[hojas] = hojas
+        nan_izquierda[hojas] = True
+
+        if precision == "float32":
+            threshold_32 = threshold.astype(np.float32)
+            redondeados_arriba = threshold_32.astype(np.float64) > threshold
+            threshold_32[redondeados_arriba] = np.nextafter(
+                threshold_32[redondeados_arriba], np.float32(-np.inf)
+            )
+            threshold = threshold_32
+            valor = valor.astype(np.float32)
+
+        self.feature = feature
+        self.threshold = threshold
+        self.izquierdo = izquierdo
+        self.derecho = derecho
+        self.valor = valor
+        self.nan_izquierda = nan_izquierda
+        self.total_nodos = len(feature)
+
+    @classmethod
+    def desde_arrays(cls, arrays, metadatos):
+        """
+        Reconstruye un bosque a partir de sus arrays de nodos (p. ej. mapeados
+        de solo lectura desde disco) y de sus metadatos, sin el modelo sklearn.
+        """
+        bosque = cls.__new__(cls)
+        for nombre in ARRAYS_BOSQUE:
+            setattr(bosque, nombre, arrays[nombre])
+        bosque.total_arboles = int(metadatos["total_arboles"])
+        bosque.total_features = int(metadatos["total_features"])
+        bosque.profundidad_maxima = int(metadatos["profundidad_maxima"])
+        bosque.filas_por_bloque = int(metadatos["filas_por_bloque"])
+        bosque.precision = metadatos["precision"]
+        bosque.total_nodos = len(bosque.feature)
+        return bosque
+
+    def arrays(self):
+        """Arrays de nodos por nombre (ver ARRAYS_BOSQUE)."""
+        return {nombre: getattr(self, nombre) for nombre in ARRAYS_BOSQUE}
+
+    def metadatos(self):
+        """Atributos escalares necesarios para reconstruir el bosque."""
+        return {
+            "total_arboles": self.total_arboles,
+            "total_features": self.total_features,
+            "profundidad_maxima": self.profundidad_maxima,
+            "filas_por_bloque": self.filas_por_bloque,
+            "precision": self.precision
+        }
+
+    def memoria_mb(self):
+        """Memoria ocupada por los arrays de nodos en MB."""
+        arrays = [self.feature, self.threshold, self.izquierdo, self.derecho, self.valor, self.nan_izquierda]
+        return sum(a.nbytes for a in arrays) / (1024 * 1024)
+
+    def _predecir_bloque(self, X):
+        total_filas = X.shape[0]
+        X_plano = X.ravel()
+        base_filas = (np.arange(total_filas, dtype=np.int64) * self.total_features)[:, None]
+        nodos = np.broadcast_to(self.raices, (total_filas, self.total_arboles)).copy()
+
+        for _ in range(self.profundidad_maxima):
+            x = X_plano[base_filas + self.feature[nodos]]
+            ir_izquierda = x <= self.threshold[nodos]
+            ir_izquierda |= np.isnan(x) & self.nan_izquierda[nodos]
+            nodos = np.where(ir_izquierda, self.izquierdo[nodos], self.derecho[nodos])
+
+        return self.valor[nodos].mean(axis=1, dtype=np.float64)
+
+    def predict(self, X, hilos=1):
+        """
+        Predice igual que modelo.predict. Acepta una fila (1D) o una matriz.
+
+        Args:
+            X: fila o matriz de features
+            hilos: hilos entre los que se reparten los bloques de filas
+                (solo cuenta si X tiene más de un bloque)
+        """
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[1] != self.total_features:
+            raise ValueError(f"Se esperaban {self.total_features} features, se recibieron {X.shape[1]}")
+        X = np.ascontiguousarray(X)
+
+        if X.shape[0] <= self.filas_por_bloque:
+            return self._predecir_bloque(X)
+
+        bloques = [X[inicio:inicio + self.filas_por_bloque] for inicio in range(0, X.shape[0], self.filas_por_bloque)]
+        if hilos <= 1:
+            return np.concatenate([self._predecir_bloque(bloque) for bloque in bloques])
+        with ThreadPoolExecutor(max_workers=min(hilos, len(bloques)), thread_name_prefix="bosque") as ejecutor:
+            return np.concatenate(list(ejecutor.map(self._predecir_bloque, bloques)))
+
+
+def compilar_bosque(modelo, precision="float64"):
+    """
+    Compila el modelo si es un ensamble de árboles compatible.
+
+    Returns:
+        BosqueCompilado, o None si el modelo no es un bosque/árbol de regresión
+        (p. ej. LinearRegression), en cuyo caso se usa modelo.predict.
+    """
+    estimadores = modelo.estimators_ if hasattr(modelo, "estimators_") else [modelo]
+    if type(modelo).__name__ not in ("RandomForestRegressor", "ExtraTreesRegressor", "DecisionTreeRegressor"):
+        return None
+    if not all(hasattr(estimador, "tree_") for estimador in estimadores):
+        return None
+    return BosqueCompilado(modelo, precision=precision)
@@ -1,8 +1,28 @@
+import os
+import tempfile
+import time
+
+import joblib
 import numpy as np
+import pandas as pd
 from sklearn.linear_model import LinearRegression
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.metrics import root_mean_squared_error, mean_absolute_error, r2_score
 
+from scripts.ml.boosting_histogramas import BoostingHistogramas
+from scripts.ml.bosque_compilado import compilar_bosque
+
+
+# Modelos que entrena entrenar_y_evaluar_modelos (clave -> nombre en el reporte)
+MODELOS_DISPONIBLES = {
+    "regresion_lineal": "Regresion_Lineal",
+    "random_forest": "Random_Forest",
+    "boosting_histogramas": "Boosting_Histogramas"
+}
+
+# Filas del test set con las que se mide la latencia de predicción de 1 fila
+FILAS_LATENCIA = 200
+
 
 def entrenar_regresion_lineal(X_train, X_test, y_train, y_test):
     """
@@ -108,30 +128,179 @@ def entrenar_random_forest(X_train, X_test, y_train, y_test):
     return modelo_rf
 
 
-def entrenar_y_evaluar_modelos(X_train, X_test, y_train, y_test):
+def entrenar_boosting_histogramas(X_train, X_test, y_train, y_test, plan):
+    """
+    entrena y evalúa HistGradientBoostingRegressor (alternativa rápida al Random Forest)
+    - Categóricas nativas: liga y categoria_* se parten por grupos de categorías
+      (ver boosting_histogramas.py), no por columnas OneHot
+    - Early stopping sobre el 10% del train: se detiene cuando deja de mejorar
+    """
+    RANDOM_STATE = 42
+    
+    print("\n" + "=" * 70)
+    print("ENTRENANDO HISTOGRAM GRADIENT BOOSTING - CATEGÓRICAS NATIVAS")
+    print("=" * 70)
+    print(f"Dataset: {X_train.shape[0]:,} muestras × {X_train.shape[1]} features "
+          f"({len(plan.bloques_onehot)} bloques OneHot -> categóricas nativas)")
+    print("Hiperparámetros: hasta 2000 iteraciones, learning_rate=0.05, 63 hojas por árbol")
+    print("=" * 70)
+    
+    modelo_hgb = BoostingHistogramas(
+        plan,
+        loss='squared_error',
+        learning_rate=0.05,       # Pasos cortos: más iteraciones pero mejor generalización
+        max_iter=2000,            # Tope; el early stopping suele cortar antes
+        max_leaf_nodes=63,        # Árboles poco profundos (interacciones club×liga×reputación)
+        min_samples_leaf=20,
+        l2_regularization=1.0,
+        max_bins=255,             # Bins por feature (y máximo de categorías por categórica)
+        early_stopping=True,
+        validation_fraction=0.1,
+        n_iter_no_change=50,
+        random_state=RANDOM_STATE
+    )
+    
+    print("\nIniciando entrenamiento...")
+    modelo_hgb.fit(X_train, y_train)
+    
+    print(f"\n✓ Entrenamiento completado ({modelo_hgb.n_iter_} iteraciones)")
+    
+    # Predicciones en test set
+    predicciones_hgb = modelo_hgb.predict(X_test)
+    
+    rmse_hgb = root_mean_squared_error(y_test, predicciones_hgb)
+    mae_hgb = mean_absolute_error(y_test, predicciones_hgb)
+    r2_hgb = r2_score(y_test, predicciones_hgb)
+    
+    print("\n" + "=" * 70)
+    print("RESULTADOS HISTOGRAM GRADIENT BOOSTING:")
+    print("=" * 70)
+    print(f"RMSE (escala log): {rmse_hgb:.4f}")
+    print(f"MAE (escala log):  {mae_hgb:.4f}")
+    print(f"R² (Test):         {r2_hgb:.4f} ({r2_hgb*100:.2f}%)")
+    print("=" * 70)
+    
+    return modelo_hgb
+
+
+def medir_tamaño_mb(modelo):
+    """
+    Tamaño del artefacto del modelo: joblib.dump sin compresión, como lo
+    guarda guardado_modelo.guardar_atomico.
+    """
+    with tempfile.TemporaryDirectory(prefix="tamaño_modelo_") as directorio:
+        ruta = os.path.join(directorio, "modelo.joblib")
+        joblib.dump(modelo, ruta)
+        return os.path.getsize(ruta) / (1024 * 1024)
+
+
+def medir_latencia_ms(modelo, X, filas=FILAS_LATENCIA):
+    """
+    Percentiles 50 y 99 (ms) de predecir de a 1 fila, con lo mismo que usa
+    la API: el bosque compilado si el modelo es un bosque, si no modelo.predict.
+    """
+    predictor = compilar_bosque(modelo) or modelo
+    X = np.asarray(X)[:filas]
+    predictor.predict(X[:1])  # calentamiento
+    
+    tiempos = []
+    for i in range(len(X)):
+        inicio = time.perf_counter()
+        predictor.predict(X[i:i + 1])
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return np.percentile(tiempos, 50), np.percentile(tiempos, 99)
+
+
+def comparar_modelos(entrenados, X_test, y_test):
     """
-    entrena los modelos de regresión solicitados y retorna el mejor según R²
-    Modelos: Regresión Lineal (baseline) y Random Forest (principal)
+    Reporte de comparación de los modelos entrenados.
+    
+    Args:
+        entrenados: {nombre: (modelo, segundos de entrenamiento + evaluación)}
+    
+    Returns:
+        DataFrame con una fila por modelo: entrenamiento_s, tamaño_mb,
+        latencia_p50_ms, latencia_p99_ms, r2, mae (escala log) y r2_por_ms
+        (R² dividido por la latencia p50)
     """
+    filas = []
+    for nombre, (modelo, segundos) in entrenados.items():
+        y_pred = modelo.predict(X_test)
+        latencia_p50, latencia_p99 = medir_latencia_ms(modelo, X_test)
+        r2 = r2_score(y_test, y_pred)
+        filas.append({
+            "modelo": nombre,
+            "entrenamiento_s": segundos,
+            "tamaño_mb": medir_tamaño_mb(modelo),
+            "latencia_p50_ms": latencia_p50,
+            "latencia_p99_ms": latencia_p99,
+            "r2": r2,
+            "mae": mean_absolute_error(y_test, y_pred),
+            "r2_por_ms": r2 / latencia_p50
+        })
+    reporte = pd.DataFrame(filas)
+    
+    print("\n" + "=" * 100)
+    print("COMPARACIÓN DE MODELOS (latencia: 1 fila, como /ml/predecir_valor)")
+    print("=" * 100)
+    print(f"{'MODELO':<22} {'ENTRENAR s':>11} {'TAMAÑO MB':>10} {'P50 ms':>8} {'P99 ms':>8} "
+          f"{'R²':>8} {'MAE log':>8} {'R²/ms':>9}")
+    print("-" * 100)
+    for fila in reporte.itertuples(index=False):
+        print(f"{fila.modelo:<22} {fila.entrenamiento_s:>11.1f} {fila.tamaño_mb:>10.1f} "
+              f"{fila.latencia_p50_ms:>8.3f} {fila.latencia_p99_ms:>8.3f} "
+              f"{fila.r2:>8.4f} {fila.mae:>8.4f} {fila.r2_por_ms:>9.2f}")
+    print("=" * 100)
+    
+    return reporte
+
+
+def entrenar_y_evaluar_modelos(X_train, X_test, y_train, y_test, plan=None,
+                               modelos=tuple(MODELOS_DISPONIBLES), ruta_reporte=None):
+    """
+    entrena los modelos de regresión solicitados, los compara y retorna el mejor según R²
+    Modelos: Regresión Lineal (baseline), Random Forest (principal) y
+    Histogram Gradient Boosting (alternativa rápida)
+    
+    Args:
+        plan: PlanCaracteristicas con el que se armó X (lo necesita el boosting)
+        modelos: claves de MODELOS_DISPONIBLES a entrenar, en ese orden
+        ruta_reporte: CSV donde guardar el reporte de comparación (opcional)
+    
+    Raises:
+        ValueError: si una clave no está en MODELOS_DISPONIBLES o si se pide
+            el boosting sin plan
+    """
+    desconocidos = [clave for clave in modelos if clave not in MODELOS_DISPONIBLES]
+    if desconocidos:
+        raise ValueError(f"Modelos desconocidos: {desconocidos} (disponibles: {list(MODELOS_DISPONIBLES)})")
+    if "boosting_histogramas" in modelos and plan is None:
+        raise ValueError("El boosting por histogramas necesita el plan de características")
+    
     print("\n---ENTRENANDO MODELOS DE REGRESIÓN---")
     
-    # Modelo 1: Regresión Lineal (baseline)
-    modelo_lr = entrenar_regresion_lineal(X_train, X_test, y_train, y_test)
-    r2_lr = r2_score(y_test, modelo_lr.predict(X_test))
+    entrenados = {}
+    for clave in modelos:
+        inicio = time.perf_counter()
+        if clave == "regresion_lineal":
+            modelo = entrenar_regresion_lineal(X_train, X_test, y_train, y_test)
+        elif clave == "random_forest":
+            modelo = entrenar_random_forest(X_train, X_test, y_train, y_test)
+        else:
+            modelo = entrenar_boosting_histogramas(X_train, X_test, y_train, y_test, plan)
+        entrenados[MODELOS_DISPONIBLES[clave]] = (modelo, time.perf_counter() - inicio)
     
-    # Modelo 2: Random Forest (principal según requisitos)
-    modelo_rf = entrenar_random_forest(X_train, X_test, y_train, y_test)
-    r2_rf = r2_score(y_test, modelo_rf.predict(X_test))
+    reporte = comparar_modelos(entrenados, X_test, y_test)
+    if ruta_reporte is not None:
+        os.makedirs(os.path.dirname(ruta_reporte) or ".", exist_ok=True)
+        reporte.to_csv(ruta_reporte, index=False)
+        print(f"💾 Reporte de comparación guardado en: {ruta_reporte}")
     
     # Seleccionar mejor modelo
-    if r2_rf >= r2_lr:
-        mejor_modelo = modelo_rf
-        mejor_nombre = "Random_Forest"
-        mejor_r2 = r2_rf
-    else:
-        mejor_modelo = modelo_lr
-        mejor_nombre = "Regresion_Lineal"
-        mejor_r2 = r2_lr
+    mejor = reporte.loc[reporte["r2"].idxmax()]
+    mejor_nombre = mejor["modelo"]
+    mejor_modelo = entrenados[mejor_nombre][0]
+    mejor_r2 = mejor["r2"]
     
     print(f"\n---MEJOR MODELO: {mejor_nombre} (R²={mejor_r2:.4f})---")
     
@@ -0,0 +1,90 @@
+"""
+Formato Arrow IPC (Feather v2) del Dataset
+Sistema de Scouting FIFA
+
+El Parquet comprimido se descomprime entero en cada arranque de la API. El
+archivo Arrow IPC sin comprimir tiene en disco el mismo layout que en
+memoria: se mapea con mmap y las columnas numéricas y categóricas pasan a
+pandas sin copiar (solo se leen las páginas que se tocan, y varios workers
+comparten las del page cache).
+
+Para que la conversión a pandas sea realmente sin copia:
+- Sin compresión (un buffer comprimido hay que descomprimirlo en memoria).
+- Columnas numéricas sin bitmap de nulos: los NaN se guardan como valores
+  NaN y no como nulos de Arrow (un nulo obliga a copiar para rellenarlo).
+- Categóricas como diccionarios de Arrow (códigos enteros + categorías).
+- Una sola tabla contigua (un solo batch por columna).
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+
+
+def reducir_enteros(df):
+    """
+    Reduce cada columna entera al tipo con signo más pequeño que admite sus
+    valores (int8/int16/int32).
+
+    Returns:
+        lista de (columna, dtype anterior, dtype nuevo) de las columnas reducidas
+    """
+    reducidas = []
+    for columna in df.columns:
+        dtype = df[columna].dtype
+        if isinstance(dtype, np.dtype) and dtype.kind in "iu":
+            df[columna] = pd.to_numeric(df[columna], downcast="integer")
+            if df[columna].dtype != dtype:
+                reducidas.append((columna, dtype, df[columna].dtype))
+    return reducidas
+
+
+def tabla_arrow(df):
+    """Tabla Arrow del DataFrame con NaN como valores (sin bitmap de nulos) en columnas numéricas."""
+    arrays = []
+    for columna in df.columns:
+        serie = df[columna]
+        if isinstance(serie.dtype, np.dtype) and serie.dtype.kind in "biuf":
+            arrays.append(pa.array(serie.to_numpy(), from_pandas=False))
+        else:
+            arrays.append(pa.Array.from_pandas(serie))
+    return pa.Table.from_arrays(arrays, names=[str(columna) for columna in df.columns])
+
+
+def guardar_arrow(df, ruta):
+    """
+    Guarda el DataFrame como Arrow IPC sin comprimir, de forma atómica
+    (archivo temporal + os.replace: una API con el archivo anterior mapeado
+    no se ve afectada).
+
+    Args:
+        df: DataFrame (las columnas 'category' se guardan como diccionarios)
+        ruta: ruta del archivo .arrow
+    """
+    tabla = tabla_arrow(df).combine_chunks()
+    ruta_temporal = f"{ruta}.tmp-{os.getpid()}"
+    try:
+        with pa.OSFile(str(ruta_temporal), "wb") as archivo:
+            with ipc.new_file(archivo, tabla.schema, options=ipc.IpcWriteOptions(compression=None)) as escritor:
+                escritor.write_table(tabla)
+        os.replace(ruta_temporal, ruta)
+    finally:
+        if os.path.exists(ruta_temporal):
+            os.remove(ruta_temporal)
+
+
+def cargar_arrow(ruta):
+    """
+    Mapea un archivo Arrow IPC y lo convierte a DataFrame sin copiar las
+    columnas numéricas ni los códigos de las categóricas (quedan de solo
+    lectura, respaldadas por el archivo mapeado).
+
+    Raises:
+        FileNotFoundError: si el archivo no existe
+    """
+    tabla = ipc.open_file(pa.memory_map(str(ruta), "r")).read_all()
+    # split_blocks: un bloque por columna, sin consolidar (consolidar copia)
+    return tabla.to_pandas(split_blocks=True)
@@ -1,24 +1,33 @@
 """
-Script para AGREGAR COLUMNAS ML a fifa_limpio.csv
+Script para GENERAR LA TABLA DE PREDICCIONES ML del dataset fifa_limpio
 Pre-calcula predicciones para todos los jugadores (122,501 registros)
-Columnas agregadas: valor_predicho_eur, diferencia_porcentual, clasificacion_ml, tolerancia_porcentaje
+Columnas: valor_predicho_eur, diferencia_porcentual, clasificacion_ml, tolerancia_porcentaje
+Solo lee las columnas que usa el modelo y guarda únicamente la tabla
+predicciones_ml.parquet (por id_sofifa y año_datos, con la versión del modelo);
+el dataset no se reescribe
 """
 
-import pandas as pd
 import joblib
 import numpy as np
 from pathlib import Path
-from datetime import datetime
 import sys
 import os
 
 # Obtener la ruta base del proyecto (3 niveles arriba desde este archivo)
 BASE_DIR = Path(__file__).parent.parent.parent.parent  # backend/scripts/ml/ -> backend/ -> proyecto/
 sys.path.append(str(BASE_DIR))
+sys.path.append(str(BASE_DIR / 'backend'))
+
+from scripts.limpieza.dataset_particionado import abrir_dataset, columnas_dataset, leer_dataset_particionado
+from scripts.ml.plan_caracteristicas import (
+    COLUMNAS_NUMERICAS, COLUMNAS_CATEGORICAS, NOMBRE_ARCHIVO_PLAN, cargar_plan_caracteristicas
+)
+from scripts.ml.puntuacion_masiva import clasificar_predicciones
+from scripts.ml.tabla_predicciones import CLAVES_PREDICCION, guardar_predicciones, version_modelo
 
 def generar_predicciones_ml(tolerancia_porcentaje=8.0):
     """
-    Genera CSV con predicciones ML para todos los jugadores
+    Genera la tabla de predicciones ML para todos los jugadores
     
     Args:
         tolerancia_porcentaje: Porcentaje de diferencia para clasificar (default 8%)
@@ -35,94 +44,60 @@ def generar_predicciones_ml(tolerancia_porcentaje=8.0):
     data_path = BASE_DIR / 'datos' / 'procesados'
     models_path = BASE_DIR / 'datos' / 'modelos'
     
-    # 1. Cargar dataset limpio
-    print("\n📂 Cargando dataset...")
-    csv_path = data_path / 'fifa_limpio.csv'
-    if not csv_path.exists():
-        print(f"   ❌ Error: No se encontró {csv_path}")
+    # 1. Abrir dataset limpio (las columnas se leen en el paso 3)
+    print("\n📂 Abriendo dataset...")
+    dataset_path = data_path / 'fifa_limpio'
+    if not dataset_path.is_dir():
+        print(f"   ❌ Error: No se encontró {dataset_path}")
+        print("   💡 Ejecuta primero: python backend/pipeline_limpieza_datos.py")
         return None
-        
-    df_jugadores = pd.read_csv(csv_path, low_memory=False)
-    print(f"   ✅ Cargados {len(df_jugadores):,} registros × {len(df_jugadores.columns)} columnas")
     
-    # 2. Cargar modelo, encoder y club_encoding
+    columnas_existentes = columnas_dataset(abrir_dataset(dataset_path))
+    
+    # 2. Cargar modelo y plan de características
     print("\n🤖 Cargando componentes ML...")
     try:
         modelo_path = models_path / 'modelo_fifa.joblib'
         encoder_path = models_path / 'encoder_fifa.joblib'
         club_encoding_path = models_path / 'club_encoding_fifa.joblib'
+        plan_path = models_path / NOMBRE_ARCHIVO_PLAN
         
         if not all([modelo_path.exists(), encoder_path.exists(), club_encoding_path.exists()]):
             print(f"   ❌ Error: Faltan archivos del modelo en {models_path}")
             print("   💡 Ejecuta primero: python backend/entrenamiento.py")
             return None
+        if not plan_path.exists():
+            print(f"   ❌ Error: No existe {plan_path}")
+            print("   💡 Modelo entrenado antes del plan: python backend/scripts/ml/plan_caracteristicas.py")
+            return None
             
         modelo = joblib.load(modelo_path)
-        encoder = joblib.load(encoder_path)
-        club_encoding = joblib.load(club_encoding_path)
-        print("   ✅ Modelo, encoder y club_encoding cargados")
+        plan = cargar_plan_caracteristicas(plan_path)
+        print(f"   ✅ Modelo y plan de características cargados ({plan.total_features} features)")
     except Exception as e:
         print(f"   ❌ Error cargando modelo: {e}")
         return None
     
-    # 3. Preparar columnas necesarias (exactamente como en preprocesamiento_modelo.py)
+    # 3. Leer las columnas que usa el plan (las que falten se toman de su plantilla)
     print("\n🔄 Preparando características ML...")
+    col_numericas_disponibles = [col for col in COLUMNAS_NUMERICAS if col in columnas_existentes]
+    col_categoricas_disponibles = [col for col in COLUMNAS_CATEGORICAS if col in columnas_existentes]
+    
+    print(f"   📊 Numéricas: {len(col_numericas_disponibles)}/{len(COLUMNAS_NUMERICAS)}")
+    print(f"   📊 Categóricas: {len(col_categoricas_disponibles)}/{len(COLUMNAS_CATEGORICAS)}")
     
-    col_numericas = [
-        "reputacion_internacional", "valoracion_global", "potencial", "movimiento_reacciones",
-        "calidad_promedio", "pase", "mentalidad_compostura", "regate_gambeta",
-        "mentalidad_vision", "tiro_disparo", "ataque_pase_corto", "ataque_definicion",
-        "ataque_cabezazo", "ataque_centros", "ataque_voleas", "movimiento_velocidad_sprint",
-        "movimiento_aceleracion", "movimiento_agilidad", "movimiento_equilibrio", "fisico",
-        "defensa", "defensa_entrada_pie", "defensa_entrada_deslizante", "defensa_marcaje",
-        "mentalidad_agresividad", "mentalidad_intercepciones", "mentalidad_posicionamiento",
-        "mentalidad_penales", "pie_debil", "habilidades_regate", "habilidad_regate",
-        "habilidad_control_balon", "habilidad_efecto", "habilidad_pase_largo",
-        "habilidad_tiros_libres", "diferencia_potencial", "ratio_valor_salario",
-        "anos_contrato_restantes", "edad"
-    ]
-    
-    col_categoricas = [
-        "categoria_posicion", "categoria_edad", "pie_preferido", 
-        "categoria_reputacion", "liga"
-    ]
-    
-    # Verificar columnas disponibles
-    col_numericas_disponibles = [col for col in col_numericas if col in df_jugadores.columns]
-    col_categoricas_disponibles = [col for col in col_categoricas if col in df_jugadores.columns]
-    
-    print(f"   📊 Numéricas: {len(col_numericas_disponibles)}/{len(col_numericas)}")
-    print(f"   📊 Categóricas: {len(col_categoricas_disponibles)}/{len(col_categoricas)}")
-    
-    # 4. Aplicar Target Encoding para club
-    print("\n🏟️  Aplicando Target Encoding para club...")
-    # Usar club_encoding cargado desde el archivo
-    df_jugadores['club_valor_promedio'] = df_jugadores['club'].map(club_encoding)
-    df_jugadores['club_valor_promedio'].fillna(club_encoding.mean(), inplace=True)
-    
-    # Agregar club_valor_promedio a las columnas numéricas
-    col_numericas_disponibles.append('club_valor_promedio')
-    
-    # 5. Extraer X numéricas y categóricas
-    print("\n� Extrayendo features...")
-    X_numericas = df_jugadores[col_numericas_disponibles].fillna(0)
-    X_categoricas = df_jugadores[col_categoricas_disponibles].fillna('Desconocido')
-    
-    # 6. Transformar categóricas con encoder
-    print("\n🔄 Aplicando OneHotEncoding...")
-    X_categoricas_encoded = encoder.transform(X_categoricas)
-    
-    # Verificar si es sparse matrix o array
-    if hasattr(X_categoricas_encoded, 'toarray'):
-        X_categoricas_dense = X_categoricas_encoded.toarray()
-    else:
-        X_categoricas_dense = X_categoricas_encoded
-    
-    # 7. Concatenar numéricas + categóricas
-    X_final = np.hstack([X_numericas.values, X_categoricas_dense])
+    df_jugadores = leer_dataset_particionado(
+        dataset_path,
+        columnas=CLAVES_PREDICCION + col_numericas_disponibles + col_categoricas_disponibles + ['club', 'valor_mercado_eur'],
+        categoricas=False
+    )
+    print(f"   ✅ Cargados {len(df_jugadores):,} registros × {len(df_jugadores.columns)} columnas")
+    
+    # 4. Matriz del modelo (numéricas, club_valor_promedio y OneHot)
+    X_final = plan.transformar(df_jugadores)
     print(f"   ✅ Shape final: {X_final.shape}")
     
-    # 8. Hacer predicciones
+    # 5. Hacer predicciones
     print("\n🤖 Generando predicciones ML (esto puede tardar 1-2 minutos)...")
     try:
         predicciones_log = modelo.predict(X_final)
@@ -134,30 +109,14 @@ def generar_predicciones_ml(tolerancia_porcentaje=8.0):
         print(f"   ❌ Error en predicción: {e}")
         return None
     
-    # 9. Calcular diferencia porcentual y clasificar
+    # 6. Calcular diferencia porcentual y clasificar (misma regla que la API)
     print("\n📊 Calculando diferencias y clasificando...")
-    
-    # Evitar división por cero
-    diferencias_porcentuales = np.where(
-        df_jugadores['valor_predicho_eur'] > 0,
-        ((predicciones_eur - df_jugadores['valor_mercado_eur']) 
-         / predicciones_eur * 100),
-        0
+    diferencias_porcentuales, clasificaciones = clasificar_predicciones(
+        df_jugadores['valor_mercado_eur'], predicciones_eur, tolerancia_porcentaje
     )
     
-    # Clasificar según tolerancia
-    def clasificar(diff):
-        if diff > tolerancia_porcentaje:
-            return 'INFRAVALORADO'
-        elif diff < -tolerancia_porcentaje:
-            return 'SOBREVALORADO'
-        else:
-            return 'JUSTO'
-    
-    clasificaciones = [clasificar(d) for d in diferencias_porcentuales]
-    
-    # 10. Agregar columnas al DataFrame original
-    print("\n➕ Agregando columnas ML al dataset...")
+    # 7. Agregar columnas ML
+    print("\n➕ Agregando columnas ML...")
     df_jugadores['valor_predicho_eur'] = predicciones_eur
     df_jugadores['diferencia_porcentual'] = diferencias_porcentuales
     df_jugadores['clasificacion_ml'] = clasificaciones
@@ -172,29 +131,19 @@ def generar_predicciones_ml(tolerancia_porcentaje=8.0):
     print(f"   ⚠️ Sobrevalorados: {total_s:,} ({total_s/len(df_jugadores)*100:.1f}%)")
     print(f"   ✓ Justos: {total_j:,} ({total_j/len(df_jugadores)*100:.1f}%)")
     
-    # 11. Guardar CSV actualizado con backup
-    print("\n� Guardando fifa_limpio.csv actualizado...")
-    
-    # Crear backup del archivo original (sin columnas ML)
-    backup_timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    backup_path = data_path / f'fifa_limpio_backup_{backup_timestamp}.csv'
-    
-    # Leer CSV original para backup (sin las columnas nuevas)
-    df_original = pd.read_csv(csv_path, low_memory=False)
-    df_original.to_csv(backup_path, index=False)
-    print(f"   ✅ Backup creado: {backup_path.name}")
-    
-    # Guardar dataset actualizado con columnas ML
-    output_path = data_path / 'fifa_limpio.csv'
-    df_jugadores.to_csv(output_path, index=False)
+    # 8. Guardar tabla de predicciones (solo claves y columnas ML)
+    print("\n💾 Guardando tabla de predicciones...")
+    predicciones_path = data_path / 'predicciones_ml.parquet'
+    version = version_modelo(modelo_path, encoder_path, club_encoding_path, plan_path)
+    tamaño_mb = guardar_predicciones(df_jugadores, predicciones_path, version)
     
     print("\n" + "="*70)
-    print("✅ COLUMNAS ML AGREGADAS EXITOSAMENTE A fifa_limpio.csv")
+    print("✅ TABLA DE PREDICCIONES ML GENERADA EXITOSAMENTE")
     print("="*70)
-    print(f"📁 Archivo: {output_path}")
+    print(f"📁 Tabla: {predicciones_path} ({tamaño_mb:.2f} MB)")
+    print(f"🔖 Versión del modelo: {version}")
     print(f"📊 Registros: {len(df_jugadores):,}")
-    print(f"📊 Columnas totales: {len(df_jugadores.columns)}")
-    print(f"\n📊 Columnas ML agregadas:")
+    print(f"\n📊 Columnas ML:")
     print(f"   • valor_predicho_eur")
     print(f"   • diferencia_porcentual")
     print(f"   • clasificacion_ml")
@@ -204,7 +153,6 @@ def generar_predicciones_ml(tolerancia_porcentaje=8.0):
     print(f"   ⚠️ Sobrevalorados: {total_s:,} ({total_s/len(df_jugadores)*100:.1f}%)")
     print(f"   ✓ Justos: {total_j:,} ({total_j/len(df_jugadores)*100:.1f}%)")
     print(f"\n🎯 Tolerancia: {tolerancia_porcentaje}%")
-    print(f"💾 Backup: {backup_path.name}")
     print("="*70)
     
     return df_jugadores
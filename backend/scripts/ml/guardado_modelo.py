@@ -2,9 +2,27 @@
 import os
 
 
-def guardar_archivos_modelo(modelo, encoder, model_path, encoder_path, club_encoding=None):
+def guardar_atomico(objeto, ruta):
+    """
+    joblib.dump a un archivo temporal y os.replace sobre la ruta final.
+    La API carga el modelo con mmap_mode='r': sobrescribir el archivo en su
+    lugar corrompería el modelo mapeado del proceso en marcha, reemplazarlo
+    deja intacto el archivo anterior hasta que nadie lo use.
+    """
+    ruta_temporal = f"{ruta}.tmp-{os.getpid()}"
+    try:
+        joblib.dump(objeto, ruta_temporal)
+        os.replace(ruta_temporal, ruta)
+    finally:
+        if os.path.exists(ruta_temporal):
+            os.remove(ruta_temporal)
+
+
+def guardar_archivos_modelo(modelo, encoder, model_path, encoder_path, club_encoding=None,
+                            plan_caracteristicas=None):
     """
     Guarda el modelo entrenado, el encoder y opcionalmente el club_encoding
+    y el plan de características
     
     Args:
         modelo: Modelo entrenado (RandomForestRegressor o LinearRegression)
@@ -12,6 +30,8 @@ def guardar_archivos_modelo(modelo, encoder, model_path, encoder_path, club_enco
         model_path: Ruta donde guardar el modelo
         encoder_path: Ruta donde guardar el encoder
         club_encoding: Diccionario de Target Encoding para club (opcional)
+        plan_caracteristicas: PlanCaracteristicas con el que se armó X (opcional);
+            es lo que cargan la API y la puntuación masiva para predecir
     
     Returns:
         bool: True si se guardó exitosamente, False si hubo error
@@ -21,19 +41,25 @@ def guardar_archivos_modelo(modelo, encoder, model_path, encoder_path, club_enco
         os.makedirs(MODEL_DIR, exist_ok=True)
         
         # Guardar encoder
-        joblib.dump(encoder, encoder_path)
+        guardar_atomico(encoder, encoder_path)
         print(f'✓ Encoder guardado en: {encoder_path}')
         
         # Guardar modelo
-        joblib.dump(modelo, model_path)
+        guardar_atomico(modelo, model_path)
         print(f'✓ Modelo guardado en: {model_path}')
         
         # Guardar club_encoding si existe
         if club_encoding is not None:
             club_encoding_path = os.path.join(MODEL_DIR, "club_encoding_fifa.joblib")
-            joblib.dump(club_encoding, club_encoding_path)
+            guardar_atomico(club_encoding, club_encoding_path)
             print(f'✓ Club Encoding guardado en: {club_encoding_path}')
         
+        # Guardar plan de características si existe
+        if plan_caracteristicas is not None:
+            plan_path = os.path.join(MODEL_DIR, "plan_caracteristicas_fifa.joblib")
+            guardar_atomico(plan_caracteristicas, plan_path)
+            print(f'✓ Plan de características guardado en: {plan_path}')
+        
         return True
     except Exception as e:
         print(f'✗ Error al guardar los archivos: {e}')
@@ -0,0 +1,331 @@
+"""
+Plan de Características Precompilado
+Sistema de Scouting FIFA
+
+Congela todo lo que el preprocesamiento necesita del dataset (medianas,
+modas, valor de club por defecto, orden de columnas y posiciones del OneHot)
+para que armar la matriz del modelo sea solo el llenado de un array float32
+de tamaño fijo.
+
+Es la única definición de las features del modelo: el entrenamiento arma X
+con el plan y lo guarda junto al modelo (plan_caracteristicas_fifa.joblib),
+y la API, la puntuación masiva y los scripts de predicciones cargan ese
+mismo archivo. Para un modelo entrenado antes de que existiera el archivo:
+
+    cd backend
+    python scripts/ml/plan_caracteristicas.py
+"""
+
+import os
+import sys
+import warnings
+
+import joblib
+import numpy as np
+import pandas as pd
+
+# Los modelos entrenados antes del plan se ajustaron con un DataFrame; aquí
+# se les pasan arrays con el mismo orden de columnas
+warnings.filterwarnings("ignore", message="X does not have valid feature names")
+
+
+# Columnas numéricas (ORDEN EXACTO de la matriz del modelo)
+COLUMNAS_NUMERICAS = [
+    # TOP FEATURES - CORRELACIÓN FUERTE (> 0.50) - Confirmado por EDA
+    "reputacion_internacional",  # 0.6423 (Diferencia 52x entre nivel 1 y 5)
+    "valoracion_global",          # 0.6067
+    "potencial",                  # 0.5631
+    "movimiento_reacciones",      # 0.5178
+
+    # FEATURES MODERADAS (0.30 - 0.50)
+    "calidad_promedio",           # 0.4560 - Feature ingenierada
+    "pase",                       # 0.3983
+    "mentalidad_compostura",      # 0.3856
+    "regate_gambeta",             # 0.3849
+    "mentalidad_vision",          # 0.3341
+    "tiro_disparo",               # 0.3129
+    "ataque_pase_corto",          # 0.3086
+
+    # FEATURES ADICIONALES RELEVANTES
+    "ataque_definicion",
+    "ataque_cabezazo",
+    "ataque_centros",
+    "ataque_voleas",
+
+    # Atributos físicos
+    "movimiento_velocidad_sprint",
+    "movimiento_aceleracion",
+    "movimiento_agilidad",
+    "movimiento_equilibrio",
+    "fisico",
+
+    # Atributos defensivos
+    "defensa",
+    "defensa_entrada_pie",
+    "defensa_entrada_deslizante",
+    "defensa_marcaje",
+
+    # Atributos mentales
+    "mentalidad_agresividad",
+    "mentalidad_intercepciones",
+    "mentalidad_posicionamiento",
+    "mentalidad_penales",
+
+    # Habilidades
+    "pie_debil",
+    "habilidades_regate",
+    "habilidad_regate",
+    "habilidad_control_balon",
+    "habilidad_efecto",
+    "habilidad_pase_largo",
+    "habilidad_tiros_libres",
+
+    # FEATURES CALCULADAS
+    "diferencia_potencial",
+    "ratio_valor_salario",        # 0.1199 (Previene data leakage de salario_eur)
+    "anos_contrato_restantes",    # 0.1267 (Contexto contractual)
+
+    # Demografía
+    "edad"                        # 0.0866
+]
+
+# Columnas categóricas (ORDEN EXACTO del OneHot)
+COLUMNAS_CATEGORICAS = [
+    "categoria_posicion",     # 4 categorías
+    "categoria_edad",         # 3 categorías
+    "pie_preferido",          # 2 categorías
+    "categoria_reputacion",   # 5 categorías
+    "liga"                    # 56 categorías (confirmado por EDA)
+]
+
+# Target encoding de club (va justo después de las numéricas)
+COLUMNA_CLUB = "club_valor_promedio"
+
+# Versión del formato del plan: cambia si cambian sus atributos o la forma
+# de armar la matriz, y un plan guardado con otra versión no se usa
+VERSION_PLAN = 1
+
+NOMBRE_ARCHIVO_PLAN = "plan_caracteristicas_fifa.joblib"
+
+# Valores por defecto si el dataset no tiene la columna categórica
+CATEGORICAS_POR_DEFECTO = {
+    "categoria_posicion": "Mediocampista",
+    "categoria_edad": "Prime",
+    "pie_preferido": "Right",
+    "categoria_reputacion": "Regional",
+    "liga": "English Premier League"
+}
+
+
+class PlanCaracteristicas:
+    """
+    Transforma datos de jugadores en la matriz de features del modelo usando
+    estadísticas congeladas. No consulta el dataset en tiempo de petición.
+
+    Args:
+        encoder: OneHotEncoder entrenado sobre COLUMNAS_CATEGORICAS
+        club_encoding: mapeo club -> valor promedio (Series o dict)
+        medianas: dict columna numérica -> mediana
+        modas: dict columna categórica -> moda
+        valor_club_defecto: valor para clubes ausentes o desconocidos
+    """
+
+    def __init__(self, encoder, club_encoding, medianas, modas, valor_club_defecto):
+        self.version = VERSION_PLAN
+        self.medianas = dict(medianas)
+        self.modas = dict(modas)
+        self.valor_club_defecto = float(valor_club_defecto)
+        self.club_encoding = dict(club_encoding)
+
+        nombres_onehot = list(encoder.get_feature_names_out(COLUMNAS_CATEGORICAS))
+        self.columnas = COLUMNAS_NUMERICAS + [COLUMNA_CLUB] + nombres_onehot
+        self.total_features = len(self.columnas)
+
+        self.posicion_numerica = {col: i for i, col in enumerate(COLUMNAS_NUMERICAS)}
+        self.posicion_club = len(COLUMNAS_NUMERICAS)
+
+        # El OneHotEncoder emite un bloque contiguo por columna, en orden
+        self.bloques_onehot = {}
+        inicio = self.posicion_club + 1
+        for col, categorias in zip(COLUMNAS_CATEGORICAS, encoder.categories_):
+            indices = {categoria: inicio + i for i, categoria in enumerate(categorias.tolist())}
+            self.bloques_onehot[col] = (inicio, inicio + len(categorias), indices)
+            inicio += len(categorias)
+
+        # Fila plantilla: medianas, club por defecto y OneHot de las modas
+        self.plantilla = np.zeros(self.total_features, dtype=np.float32)
+        for col, i in self.posicion_numerica.items():
+            self.plantilla[i] = self.medianas.get(col, 0)
+        self.plantilla[self.posicion_club] = self.valor_club_defecto
+        for col, (_, _, indices) in self.bloques_onehot.items():
+            indice = indices.get(self.modas.get(col))
+            if indice is not None:
+                self.plantilla[indice] = 1.0
+
+    def _llenar_fila(self, fila, datos):
+        """
+        Escribe en `fila` (copia de la plantilla) los atributos proporcionados.
+        None y NaN cuentan como faltantes: queda el valor de la plantilla
+        (mediana o moda), igual que en transformar.
+        """
+        for col, valor in datos.items():
+            if valor is None or pd.isna(valor):
+                continue
+            if col in self.posicion_numerica:
+                fila[self.posicion_numerica[col]] = valor
+            elif col in self.bloques_onehot:
+                inicio, fin, indices = self.bloques_onehot[col]
+                fila[inicio:fin] = 0.0
+                # Categoría desconocida -> bloque en cero (handle_unknown="ignore")
+                indice = indices.get(valor)
+                if indice is not None:
+                    fila[indice] = 1.0
+
+        club = datos.get("club")
+        if club is not None and not pd.isna(club):
+            fila[self.posicion_club] = self.club_encoding.get(club, self.valor_club_defecto)
+
+    def vectorizar(self, datos):
+        """
+        Convierte un dict de atributos (parcial o completo) en un vector
+        float32. Lo que falte se toma de la plantilla congelada.
+        """
+        fila = self.plantilla.copy()
+        self._llenar_fila(fila, datos)
+        return fila
+
+    def vectorizar_lote(self, registros):
+        """
+        Convierte una lista de dicts (cada uno parcial o completo) en una
+        matriz float32 (n_registros × total_features), en el mismo orden.
+        """
+        X = np.tile(self.plantilla, (len(registros), 1))
+        for fila, datos in zip(X, registros):
+            self._llenar_fila(fila, datos)
+        return X
+
+    def transformar(self, df):
+        """
+        Convierte un DataFrame de jugadores en una matriz float32 contigua
+        (n_filas × total_features) sin pd.concat ni DataFrames intermedios.
+        Los valores faltantes (columna ausente o NaN) se toman de la
+        plantilla, igual que en vectorizar.
+        """
+        total_filas = len(df)
+        X = np.tile(self.plantilla, (total_filas, 1))
+
+        for col, i in self.posicion_numerica.items():
+            if col in df.columns:
+                valores = pd.to_numeric(df[col], errors="coerce").to_numpy(dtype=np.float32, na_value=np.nan)
+                faltantes = np.isnan(valores)
+                if faltantes.any():
+                    valores[faltantes] = self.plantilla[i]
+                X[:, i] = valores
+
+        if "club" in df.columns:
+            X[:, self.posicion_club] = (
+                df["club"].astype(object).map(self.club_encoding)
+                .fillna(self.valor_club_defecto)
+                .to_numpy(dtype=np.float32)
+            )
+
+        for col, (inicio, fin, indices) in self.bloques_onehot.items():
+            if col in df.columns:
+                valores = df[col].astype(object)
+                X[valores.notna().to_numpy(), inicio:fin] = 0.0
+                posiciones = valores.map(indices).to_numpy(dtype=np.float64)
+                filas_validas = np.flatnonzero(~np.isnan(posiciones))
+                X[filas_validas, posiciones[filas_validas].astype(np.int64)] = 1.0
+
+        return X
+
+
+def construir_plan_caracteristicas(df, encoder, club_encoding):
+    """
+    Calcula una sola vez las estadísticas de imputación sobre el dataset
+    y devuelve el plan de características listo para predecir.
+
+    Los clubes sin encoding toman la mediana de valor_mercado_eur, el mismo
+    relleno con el que se entrenó el modelo.
+
+    Args:
+        df: DataFrame de jugadores (fifa_limpio) con el que se entrena
+        encoder: OneHotEncoder ajustado sobre COLUMNAS_CATEGORICAS
+        club_encoding: mapeo club -> valor promedio
+
+    Returns:
+        PlanCaracteristicas
+    """
+    medianas = {
+        col: float(df[col].median()) if col in df.columns else 0.0
+        for col in COLUMNAS_NUMERICAS
+    }
+    modas = {
+        col: df[col].mode()[0] if col in df.columns else CATEGORICAS_POR_DEFECTO[col]
+        for col in COLUMNAS_CATEGORICAS
+    }
+    valor_club_defecto = df["valor_mercado_eur"].median()
+
+    return PlanCaracteristicas(encoder, club_encoding, medianas, modas, valor_club_defecto)
+
+
+def cargar_plan_caracteristicas(ruta):
+    """
+    Carga el plan guardado junto al modelo.
+
+    Raises:
+        FileNotFoundError: si no existe el archivo
+        ValueError: si el plan se guardó con otra VERSION_PLAN
+    """
+    plan = joblib.load(ruta)
+    version = getattr(plan, "version", None)
+    if version != VERSION_PLAN:
+        raise ValueError(
+            f"Plan de características con versión {version} (se esperaba {VERSION_PLAN}): "
+            f"regenéralo con python scripts/ml/plan_caracteristicas.py"
+        )
+    return plan
+
+
+# ============================================================================
+# GENERAR EL PLAN DE UN MODELO YA ENTRENADO
+# ============================================================================
+
+def main():
+    """
+    Construye el plan con el encoder y el club_encoding guardados y el
+    dataset con el que se entrenó, y lo guarda en datos/modelos.
+    """
+    from scripts.limpieza.dataset_particionado import leer_dataset_particionado
+    from scripts.ml.guardado_modelo import guardar_atomico
+
+    backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+    model_dir = os.path.join(backend_dir, "..", "datos", "modelos")
+    dataset_path = os.path.join(backend_dir, "..", "datos", "procesados", "fifa_limpio")
+    plan_path = os.path.join(model_dir, NOMBRE_ARCHIVO_PLAN)
+
+    print("=" * 80)
+    print("PLAN DE CARACTERÍSTICAS DEL MODELO")
+    print("=" * 80)
+    encoder = joblib.load(os.path.join(model_dir, "encoder_fifa.joblib"))
+    club_encoding = joblib.load(os.path.join(model_dir, "club_encoding_fifa.joblib"))
+    print("✓ Encoder y club_encoding cargados")
+
+    df = leer_dataset_particionado(
+        dataset_path, columnas=COLUMNAS_NUMERICAS + COLUMNAS_CATEGORICAS + ["valor_mercado_eur"],
+        categoricas=False
+    )
+    print(f"✓ Dataset: {len(df):,} registros")
+
+    plan = construir_plan_caracteristicas(df, encoder, club_encoding)
+    guardar_atomico(plan, plan_path)
+    print(f"💾 Plan guardado: {plan_path} ({plan.total_features} features, versión {plan.version})")
+    print("=" * 80)
+
+
+if __name__ == "__main__":
+    # La clase se importa por su módulo (no como __main__) para que el
+    # pickle del plan se pueda cargar desde cualquier script
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+    from scripts.ml.plan_caracteristicas import main as generar_plan
+    generar_plan()
@@ -0,0 +1,223 @@
+"""
+Módulo de Puntuación Masiva
+Sistema de Scouting FIFA
+
+Predice el dataset completo sin armar nunca la matriz de todas las filas:
+el dataset particionado se recorre en bloques de filas (tablas Arrow con
+solo las columnas que usa el modelo) y cada bloque se convierte, con el plan
+de características guardado junto al modelo, en una matriz float32 (el tipo
+con el que el Random Forest compara los umbrales, así que predice lo mismo
+que con float64) que se predice en un pool de procesos.
+
+Cada proceso carga el modelo con mmap_mode='r': el modelo se guarda sin
+compresión (guardado_modelo.guardar_atomico), así que los arrays de los
+árboles se mapean del mismo archivo y las páginas se comparten entre
+procesos en lugar de copiarse. La memoria del proceso principal depende del
+tamaño del bloque y de la cantidad de bloques en vuelo, no del dataset; solo
+se acumulan las columnas de la tabla de predicciones.
+"""
+
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import joblib
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from threadpoolctl import threadpool_limits
+
+from scripts.limpieza.dataset_particionado import abrir_dataset, columnas_dataset, recorrer_dataset_particionado
+from scripts.ml.plan_caracteristicas import COLUMNAS_NUMERICAS, COLUMNAS_CATEGORICAS, cargar_plan_caracteristicas
+from scripts.ml.tabla_predicciones import CLAVES_PREDICCION, COLUMNAS_PREDICCION
+
+
+COLUMNAS_ENTRADA = (
+    CLAVES_PREDICCION + COLUMNAS_NUMERICAS + COLUMNAS_CATEGORICAS
+    + ["club", "valor_mercado_eur"]
+)
+
+FILAS_POR_BLOQUE = 50_000
+TOLERANCIA_PORCENTAJE = 8.0
+
+# Componentes del modelo de cada proceso del pool (los fija iniciar_proceso)
+_componentes = None
+
+
+# ============================================================================
+# CLASIFICACIÓN
+# ============================================================================
+
+def clasificar_predicciones(valor_mercado, valor_predicho, tolerancia=TOLERANCIA_PORCENTAJE):
+    """
+    Diferencia porcentual (real - predicho) / predicho y clasificación:
+    por debajo de -tolerancia INFRAVALORADO, por encima de +tolerancia
+    SOBREVALORADO y JUSTO en el resto (incluidas diferencias NaN).
+
+    Returns:
+        (diferencia_porcentual, clasificacion) como arrays NumPy
+    """
+    valor_mercado = np.asarray(valor_mercado, dtype=np.float64)
+    valor_predicho = np.asarray(valor_predicho, dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        diferencia = (valor_mercado - valor_predicho) / valor_predicho * 100
+    clasificacion = np.select(
+        [diferencia < -tolerancia, diferencia > tolerancia],
+        ["INFRAVALORADO", "SOBREVALORADO"],
+        default="JUSTO"
+    )
+    return diferencia, clasificacion
+
+
+# ============================================================================
+# BLOQUES
+# ============================================================================
+
+def agrupar_lotes(lotes, filas_por_bloque):
+    """
+    Junta los RecordBatch de la lectura (uno por row group, de unos miles
+    de filas) en tablas de filas_por_bloque filas, sin copiar: cada predict
+    tiene un costo fijo por árbol que conviene repartir entre más filas.
+    """
+    partes, filas = [], 0
+    for lote in lotes:
+        while lote.num_rows:
+            parte, lote = lote.slice(0, filas_por_bloque - filas), lote.slice(filas_por_bloque - filas)
+            partes.append(parte)
+            filas += parte.num_rows
+            if filas == filas_por_bloque:
+                yield pa.Table.from_batches(partes)
+                partes, filas = [], 0
+    if filas:
+        yield pa.Table.from_batches(partes)
+
+
+def empaquetar_bloque(bloque):
+    """
+    Bloque como stream Arrow IPC para enviarlo a otro proceso. Pickle de un
+    slice serializaría el buffer completo del row group; IPC solo sus filas.
+    """
+    salida = pa.BufferOutputStream()
+    with pa.ipc.new_stream(salida, bloque.schema) as escritor:
+        escritor.write_table(bloque)
+    return salida.getvalue()
+
+
+# ============================================================================
+# PROCESOS DEL POOL
+# ============================================================================
+
+def iniciar_proceso(ruta_modelo, ruta_plan, hilos_modelo=None):
+    """
+    Carga el modelo (mapeado con mmap) y su plan de características en el proceso.
+
+    Args:
+        hilos_modelo: n_jobs del modelo en este proceso (1 dentro del pool,
+            para no lanzar un hilo por núcleo en cada proceso); también
+            limita los hilos OpenMP del boosting por histogramas
+    """
+    global _componentes
+    modelo = joblib.load(ruta_modelo, mmap_mode="r")
+    if hilos_modelo is not None:
+        if hasattr(modelo, "n_jobs"):
+            modelo.n_jobs = hilos_modelo
+        threadpool_limits(limits=hilos_modelo)
+    _componentes = (modelo, cargar_plan_caracteristicas(ruta_plan))
+
+
+def puntuar_bloque(bloque, tolerancia):
+    """
+    Predice un bloque de COLUMNAS_ENTRADA (tabla Arrow o su stream IPC).
+
+    Returns:
+        DataFrame con CLAVES_PREDICCION y COLUMNAS_PREDICCION
+    """
+    modelo, plan = _componentes
+    if isinstance(bloque, pa.Buffer):
+        bloque = pa.ipc.open_stream(bloque).read_all()
+    df = bloque.to_pandas()
+    valor_predicho = np.expm1(modelo.predict(plan.transformar(df)))
+    diferencia, clasificacion = clasificar_predicciones(df["valor_mercado_eur"], valor_predicho, tolerancia)
+    return pd.DataFrame({
+        **{clave: df[clave].to_numpy() for clave in CLAVES_PREDICCION},
+        "valor_predicho_eur": valor_predicho,
+        "diferencia_porcentual": diferencia,
+        "clasificacion_ml": pd.Categorical(clasificacion, categories=["INFRAVALORADO", "JUSTO", "SOBREVALORADO"]),
+        "tolerancia_porcentaje": tolerancia
+    })
+
+
+# ============================================================================
+# PUNTUACIÓN DEL DATASET
+# ============================================================================
+
+def puntuar_dataset(ruta_dataset, ruta_modelo, ruta_plan, filas_por_bloque=FILAS_POR_BLOQUE,
+                    procesos=None, tolerancia=TOLERANCIA_PORCENTAJE):
+    """
+    Predice todas las filas del dataset particionado por bloques.
+
+    Args:
+        ruta_dataset: carpeta del dataset particionado
+        ruta_modelo: modelo entrenado
+        ruta_plan: plan de características guardado con el modelo
+        filas_por_bloque: filas máximas de cada bloque
+        procesos: procesos del pool (None = núcleos de la máquina); con 1 se
+            predice en este proceso, con el n_jobs con que se entrenó el modelo
+        tolerancia: tolerancia en % para clasificar
+
+    Returns:
+        DataFrame con CLAVES_PREDICCION y COLUMNAS_PREDICCION (listo para
+        tabla_predicciones.guardar_predicciones)
+
+    Raises:
+        FileNotFoundError: si no existe el dataset
+        KeyError: si al dataset le faltan columnas del modelo
+    """
+    dataset = abrir_dataset(ruta_dataset)
+    faltantes = [col for col in COLUMNAS_ENTRADA if col not in columnas_dataset(dataset)]
+    if faltantes:
+        raise KeyError(f"Columnas del modelo que no están en el dataset: {faltantes}")
+
+    procesos = max(1, procesos or os.cpu_count() or 1)
+    total_filas = dataset.count_rows()
+    bloques = agrupar_lotes(recorrer_dataset_particionado(ruta_dataset, COLUMNAS_ENTRADA), filas_por_bloque)
+    print(f"  - {total_filas:,} filas en bloques de {filas_por_bloque:,} "
+          f"({procesos} proceso{'s' if procesos > 1 else ''})")
+
+    resultados = []
+    filas_hechas = 0
+    inicio = time.perf_counter()
+
+    def registrar(resultado):
+        nonlocal filas_hechas
+        resultados.append(resultado)
+        filas_hechas += len(resultado)
+        segundos = time.perf_counter() - inicio
+        print(f"    bloque {len(resultados):>4}: {filas_hechas:>12,} / {total_filas:,} filas "
+              f"({filas_hechas / max(total_filas, 1) * 100:5.1f}%)  {filas_hechas / segundos:>10,.0f} filas/s")
+
+    artefactos = (ruta_modelo, ruta_plan)
+    if procesos == 1:
+        iniciar_proceso(*artefactos)
+        for bloque in bloques:
+            registrar(puntuar_bloque(bloque, tolerancia))
+    else:
+        # Como mucho 2 bloques por proceso en vuelo: la lectura no se adelanta
+        # al pool y la memoria no crece con el tamaño del dataset
+        with ProcessPoolExecutor(max_workers=procesos, initializer=iniciar_proceso,
+                                 initargs=(*artefactos, 1)) as ejecutor:
+            pendientes = deque()
+            for bloque in bloques:
+                pendientes.append(ejecutor.submit(puntuar_bloque, empaquetar_bloque(bloque), tolerancia))
+                if len(pendientes) >= 2 * procesos:
+                    registrar(pendientes.popleft().result())
+            while pendientes:
+                registrar(pendientes.popleft().result())
+
+    segundos = time.perf_counter() - inicio
+    print(f"  ✓ {filas_hechas:,} filas en {segundos:.2f} s ({filas_hechas / max(segundos, 1e-9):,.0f} filas/s)")
+
+    if not resultados:
+        return pd.DataFrame(columns=CLAVES_PREDICCION + COLUMNAS_PREDICCION)
+    return pd.concat(resultados, ignore_index=True)
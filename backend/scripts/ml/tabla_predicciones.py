@@ -0,0 +1,153 @@
+"""
+Tabla de Predicciones del Modelo
+Sistema de Scouting FIFA
+
+Las predicciones del dataset completo se guardan aparte del dataset, en un
+Parquet pequeño (datos/procesados/predicciones_ml.parquet) con una fila por
+(id_sofifa, año_datos) y las columnas valor_predicho_eur,
+diferencia_porcentual, clasificacion_ml y tolerancia_porcentaje.
+
+La tabla lleva en sus metadatos la versión del modelo que la generó (hash
+del contenido de modelo, encoder, club_encoding y plan de características). La API la une al dataset
+al cargarlo solo si esa versión coincide con la de los artefactos que está
+cargando y si cubre todas las filas; si no, la ignora y predice el dataset
+al arrancar como antes.
+"""
+
+import hashlib
+import json
+import os
+from datetime import datetime
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from scripts.limpieza.cargador_datos import hash_archivo
+
+
+CLAVES_PREDICCION = ["id_sofifa", "año_datos"]
+COLUMNAS_PREDICCION = ["valor_predicho_eur", "diferencia_porcentual", "clasificacion_ml", "tolerancia_porcentaje"]
+CLAVE_METADATOS = b"prediccion_ml"
+
+# {(ruta, mtime_ns, tamaño): sha256}: recargar la API sin cambiar el modelo no lo vuelve a leer
+_HASHES_ARTEFACTOS = {}
+
+
+def hash_artefacto(ruta):
+    """sha256 del archivo, memorizado mientras no cambien su mtime ni su tamaño."""
+    estado = os.stat(ruta)
+    clave = (os.path.abspath(ruta), estado.st_mtime_ns, estado.st_size)
+    if clave not in _HASHES_ARTEFACTOS:
+        _HASHES_ARTEFACTOS[clave] = hash_archivo(ruta)
+    return _HASHES_ARTEFACTOS[clave]
+
+
+def version_modelo(*rutas_artefactos):
+    """
+    Versión del modelo: hash del contenido de sus artefactos, en el orden
+    dado (modelo, encoder, club_encoding, plan de características).
+
+    Returns:
+        16 caracteres hexadecimales
+
+    Raises:
+        FileNotFoundError: si falta alguno de los artefactos
+    """
+    partes = [hash_artefacto(ruta) for ruta in rutas_artefactos]
+    return hashlib.sha256("\n".join(partes).encode("utf-8")).hexdigest()[:16]
+
+
+def guardar_predicciones(df, ruta, version):
+    """
+    Guarda la tabla de predicciones (archivo temporal + os.replace).
+
+    Args:
+        df: DataFrame con CLAVES_PREDICCION y COLUMNAS_PREDICCION
+        ruta: ruta del .parquet
+        version: versión del modelo (version_modelo)
+
+    Returns:
+        tamaño del archivo en MB
+
+    Raises:
+        ValueError: si hay claves (id_sofifa, año_datos) repetidas
+    """
+    tabla = df[CLAVES_PREDICCION + COLUMNAS_PREDICCION].copy()
+    repetidas = tabla.duplicated(CLAVES_PREDICCION)
+    if repetidas.any():
+        raise ValueError(f"{int(repetidas.sum()):,} filas con (id_sofifa, año_datos) repetido")
+    tabla["clasificacion_ml"] = tabla["clasificacion_ml"].astype("category")
+
+    metadatos = {
+        "version_modelo": version,
+        "creado_en": datetime.now().isoformat(timespec="seconds"),
+        "filas": len(tabla)
+    }
+    tabla_arrow = pa.Table.from_pandas(tabla, preserve_index=False)
+    tabla_arrow = tabla_arrow.replace_schema_metadata({
+        **(tabla_arrow.schema.metadata or {}),
+        CLAVE_METADATOS: json.dumps(metadatos).encode("utf-8")
+    })
+
+    ruta_temporal = f"{ruta}.tmp-{os.getpid()}"
+    try:
+        pq.write_table(tabla_arrow, ruta_temporal)
+        os.replace(ruta_temporal, ruta)
+    finally:
+        if os.path.exists(ruta_temporal):
+            os.remove(ruta_temporal)
+    return os.path.getsize(ruta) / (1024 * 1024)
+
+
+def leer_predicciones(ruta):
+    """
+    Returns:
+        (DataFrame, metadatos) o (None, None) si el archivo no existe
+    """
+    if not os.path.exists(ruta):
+        return None, None
+    tabla = pq.read_table(ruta)
+    metadatos = json.loads((tabla.schema.metadata or {}).get(CLAVE_METADATOS, b"{}"))
+    return tabla.to_pandas(), metadatos
+
+
+def unir_predicciones(df_jugadores, predicciones, metadatos, version_esperada):
+    """
+    Une la tabla de predicciones al dataset por (id_sofifa, año_datos).
+
+    Args:
+        df_jugadores: dataset (no se modifica)
+        predicciones, metadatos: lo que retorna leer_predicciones
+        version_esperada: versión de los artefactos del modelo en uso
+
+    Returns:
+        (DataFrame, motivo): el dataset con las columnas de predicción
+        reemplazadas y motivo None, o el dataset sin cambios y el motivo por
+        el que no se unió
+    """
+    version = metadatos.get("version_modelo")
+    if version != version_esperada:
+        return df_jugadores, f"versión del modelo {version} != {version_esperada}"
+
+    unidas = df_jugadores[CLAVES_PREDICCION].merge(
+        predicciones, on=CLAVES_PREDICCION, how="left", validate="many_to_one"
+    )
+    faltantes = int(unidas["valor_predicho_eur"].isna().sum())
+    if faltantes:
+        return df_jugadores, f"{faltantes:,} filas del dataset sin predicción"
+
+    # merge con how="left" conserva el orden de las filas del dataset
+    nuevas = {
+        columna: unidas[columna].to_numpy() if columna != "clasificacion_ml"
+        else pd.Categorical(unidas[columna])
+        for columna in COLUMNAS_PREDICCION
+    }
+    # Sin copiar las columnas del dataset (assign copia todo en pandas 2.x
+    # sin copy-on-write): siguen mapeadas desde Arrow o desde los .npy compartidos
+    columnas = {columna: df_jugadores[columna] for columna in df_jugadores.columns}
+    columnas.update({
+        columna: pd.Series(valores, index=df_jugadores.index, name=columna, copy=False)
+        for columna, valores in nuevas.items()
+    })
+    return pd.DataFrame(columnas, copy=False), None
@@ -0,0 +1,141 @@
+"""
+SERVIDOR MULTIPROCESO - API SCOUTING FIFA
+==========================================
+Levanta varios workers de uvicorn que comparten el modelo y el dataset.
+
+`uvicorn api_scouting_fifa:app --workers N` arranca N procesos nuevos y
+cada uno carga su propia copia del bosque (500-800 MB) y del DataFrame.
+Este lanzador, en cambio:
+
+1. Activa la memoria compartida: nodos del bosque compilado, columnas
+   numéricas del dataset y predicciones se mapean de solo lectura desde
+   archivos .npy (datos/cache_servicio/), sin cargar el modelo sklearn.
+2. Carga TODO una vez en el proceso maestro (carga síncrona).
+3. Congela el heap con gc.freeze() para que el recolector de basura no
+   toque los objetos precargados (y no copie sus páginas en cada worker).
+4. Abre el socket y hace fork de N workers que sirven sobre él. Las
+   páginas precargadas quedan compartidas por copy-on-write.
+
+Los workers que terminan inesperadamente se reemplazan con un nuevo fork.
+
+Contrapartida: sin el modelo sklearn, el bosque compilado predice también
+los lotes grandes (/ml/predecir_lote, hasta FIFA_MAX_LOTE filas), y por
+núcleo es más lento que modelo.predict (5000 filas con 50 árboles: 66 ms
+contra 18 ms). Los bloques de cada lote se reparten entre FIFA_HILOS_BOSQUE
+hilos (por defecto, los núcleos de la máquina); si los lotes grandes son
+frecuentes, baja FIFA_MAX_LOTE o usa FIFA_MEMORIA_COMPARTIDA=0, que carga
+el modelo sklearn en cada worker a cambio de más memoria.
+
+Nota: la recarga en caliente (POST /admin/recargar) solo afecta al worker
+que recibe la petición. Con varios workers usa FIFA_VIGILAR_DATOS=1 para
+que cada uno detecte el cambio de archivos y recargue.
+
+Uso (Linux/macOS, requiere fork):
+    cd backend
+    python servidor_multiproceso.py --workers 4 --port 8000
+"""
+
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+
+
+def parsear_argumentos():
+    parser = argparse.ArgumentParser(description="API Scouting FIFA con varios workers y memoria compartida")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2, help="Cantidad de procesos worker")
+    parser.add_argument("--host", default="0.0.0.0", help="Host de escucha")
+    parser.add_argument("--port", type=int, default=8000, help="Puerto de escucha")
+    parser.add_argument("--espera-reporte", type=float, default=5.0,
+                        help="Segundos tras el arranque para imprimir el reporte de memoria (0 = no imprimir)")
+    return parser.parse_args()
+
+
+def main():
+    if not hasattr(os, "fork"):
+        sys.exit("El servidor multiproceso requiere fork (Linux/macOS). Usa api_scouting_fifa.py en Windows.")
+
+    args = parsear_argumentos()
+
+    # Configuración antes de importar la API: memoria compartida y carga síncrona
+    os.environ.setdefault("FIFA_MEMORIA_COMPARTIDA", "1")
+    os.environ["FIFA_CARGA_SINCRONA"] = "1"
+
+    import uvicorn
+
+    sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+    import api_scouting_fifa
+    from scripts.api.memoria_compartida import reporte_memoria, imprimir_reporte_memoria
+
+    # Lo precargado no debe ser recorrido (ni copiado) por el GC de cada worker
+    gc.collect()
+    gc.freeze()
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((args.host, args.port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+
+    def lanzar_worker():
+        pid = os.fork()
+        if pid == 0:
+            # Worker: uvicorn sirve la app ya cargada sobre el socket heredado
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            config = uvicorn.Config(api_scouting_fifa.app, log_level="info")
+            uvicorn.Server(config).run(sockets=[sock])
+            os._exit(0)
+        return pid
+
+    print("\n" + "=" * 80)
+    print("INICIANDO API SISTEMA SCOUTING FIFA (MULTIPROCESO)")
+    print("=" * 80)
+    print(f"Workers: {args.workers}")
+    print(f"Memoria compartida: {api_scouting_fifa.DIRECTORIO_COMPARTIDO if api_scouting_fifa.MEMORIA_COMPARTIDA else 'desactivada'}")
+    print(f"Servidor: http://localhost:{args.port}")
+    print("=" * 80 + "\n")
+
+    workers = {lanzar_worker() for _ in range(args.workers)}
+    terminando = False
+
+    def terminar(signum, frame):
+        nonlocal terminando
+        terminando = True
+        for pid in list(workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, terminar)
+    signal.signal(signal.SIGTERM, terminar)
+
+    if args.espera_reporte > 0:
+        time.sleep(args.espera_reporte)
+        if not terminando:
+            imprimir_reporte_memoria(
+                reporte_memoria([os.getpid(), *sorted(workers)]),
+                titulo="MEMORIA (maestro + workers)"
+            )
+
+    while workers:
+        try:
+            pid, _ = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        workers.discard(pid)
+        if not terminando:
+            print(f"⚠️  Worker {pid} terminó inesperadamente, lanzando reemplazo...")
+            workers.add(lanzar_worker())
+
+    sock.close()
+
+
+if __name__ == "__main__":
+    main()